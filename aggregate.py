@@ -1,17 +1,31 @@
+import io
+import anyio
 import sys
 import time
 import signal
+import asyncio
 import logging
-from services.register import register
-from mcp.server.fastmcp import FastMCP
-from handle.version import get_version
+# 启动分析须最先导入，才能记录之后所有模块的导入耗时
+from handle.startup_profile import PROFILE_FLAG, profiler
+if PROFILE_FLAG in sys.argv[1:]:
+    profiler.enable()
+from services.register import create_server
+from handle.loader import load_config
+from handle.version import check_version_in_background
 from handle.logger import setup_logging
 from handle.check import check_packages
 from handle.ws_utils import cleanup_all_processes
 from handle.log_filter import RequestTypeTranslator
 from handle.signal_handler import make_signal_handler
+from handle.tool_manifest import update_tool_manifest
+from handle.tool_reload import serve_stdio
+
+# 标准输出/错误统一使用 UTF-8，避免 Windows 控制台编码导致中文日志乱码
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 signal_handler = make_signal_handler('管道服务')
+profiler.mark('导入模块')
 
 if __name__ == "__main__":
     # 注册信号处理器
@@ -27,25 +41,29 @@ if __name__ == "__main__":
         # 为 MCP 底层库的日志添加中文翻译过滤器
         mcp_logger = logging.getLogger('mcp.server.lowlevel.server')
         mcp_logger.addFilter(RequestTypeTranslator())
+        profiler.mark('日志初始化')
         logger.info("启动环境检查..")
         check_packages()
+        profiler.mark('环境检查')
         logger.info("环境检查完成")
     except Exception as e:
         logger.error(f"环境检查失败：{str(e)}")
         raise
-    # 调用版本检查函数
-    get_version(False)
+    # 版本检查在后台进行，版本服务器缓慢或离线时不影响启动
+    check_version_in_background()
+    profiler.mark('版本检查')
     logger.info("启动注册服务...")
-    # 创建MCP服务器
-    mcp = FastMCP("管道服务")
-    # 注册服务
-    register(mcp)
-    # 添加初始化完成标志
-    mcp._initialized = True
+    # 创建MCP服务器并注册服务
+    mcp = create_server()
+    profiler.mark('注册工具')
+    # 工具清单过期时重新生成，下次启动管道可直接应答握手与工具列表
+    asyncio.run(update_tool_manifest(mcp, load_config()))
+    profiler.mark('工具清单')
     logger.info("服务注册完成，准备接收请求")
-    # 确保服务注册完成后再启动服务器
+    profiler.report()
+    # 确保服务注册完成后再启动服务器（同时监听工具开关变化，热更新工具分组）
     try:
-        mcp.run(transport="stdio")
+        anyio.run(serve_stdio, mcp)
     except RuntimeError as e:
         logger.error(f"服务器启动失败: {e}")
     # 等待服务端初始化完成（仅首次提示）
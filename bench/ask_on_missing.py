@@ -0,0 +1,121 @@
+"""
+缺参追问装饰器基准：对所有已注册工具，测量 ask_on_missing 每次调用的额外开销
+
+用法：
+    python bench/ask_on_missing.py [--number 20000]
+
+对每个使用 ask_on_missing 的工具，用签名与文档字符串相同的空函数代替工具实现，分别套上
+当前装饰器与改造前基于 Signature.bind 的实现，测量两种调用：
+    参数齐全 - 所有参数按关键字传入（与 FastMCP 调用工具的方式相同），校验通过后调用工具
+    缺少参数 - 不传任何参数，返回追问响应
+开销 = 装饰后的调用耗时 - 直接调用空函数的耗时。测量期间关闭日志输出，只统计校验本身。
+"""
+
+import os
+import sys
+import inspect
+import logging
+import argparse
+import functools
+import statistics
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from handle.missing_params import ask_on_missing
+from handle.missing_utils import is_missing, type_to_str, parse_param_descriptions, build_ask_response
+
+def legacy_ask_on_missing(*required_params: str):
+    """改造前的实现：每次调用绑定签名并逐个检查必填参数（用于对比）"""
+    def decorator(func):
+        sig = inspect.signature(func)
+        param_descriptions = parse_param_descriptions(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                bound = sig.bind(*args, **kwargs)
+                bound.apply_defaults()
+            except TypeError:
+                missing = []
+                for name in required_params:
+                    param_obj = sig.parameters.get(name)
+                    if param_obj and (name not in kwargs or is_missing(kwargs[name])):
+                        missing.append({'name': name, 'type': type_to_str(param_obj.annotation),
+                                        'description': param_descriptions.get(name, '')})
+                if missing:
+                    return build_ask_response(func.__name__, missing)
+                return {"need_user_input": True, "action": "ask_user", "tool": func.__name__,
+                        "missing_params": [], "message": ""}
+            missing = []
+            for name in required_params:
+                param_obj = sig.parameters.get(name)
+                if name not in bound.arguments or is_missing(bound.arguments[name]):
+                    missing.append({'name': name,
+                                    'type': type_to_str(param_obj.annotation) if param_obj else "any",
+                                    'description': param_descriptions.get(name, '')})
+            if missing:
+                return build_ask_response(func.__name__, missing)
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# 各类型参数的示例值
+SAMPLES = {str: '示例', int: 1, float: 1.0, bool: True, list: ['示例'], dict: {'键': '值'}}
+
+def sample_arguments(func) -> dict:
+    """为全部参数生成非空的示例值"""
+    return {
+        name: SAMPLES.get(param.annotation, '示例')
+        for name, param in inspect.signature(func).parameters.items()
+        if param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+    }
+
+def measure(func, kwargs: dict, number: int) -> float:
+    """单次调用耗时（微秒），取 5 轮中的最小值"""
+    return min(timeit.repeat(lambda: func(**kwargs), number=number, repeat=5)) / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="缺参追问装饰器基准")
+    parser.add_argument('--number', type=int, default=20000, help="每轮调用次数")
+    args = parser.parse_args()
+
+    from services.register import create_server
+    mcp = create_server()
+    logging.disable(logging.CRITICAL)
+
+    rows = []
+    for tool in mcp._tool_manager.list_tools():
+        required = getattr(tool.fn, '_required_params', None)
+        if required is None:
+            continue
+        original = tool.fn.__wrapped__
+
+        def stub(*a, **k):
+            return None
+        functools.update_wrapper(stub, original)
+        current = ask_on_missing(*required)(stub)
+        legacy = legacy_ask_on_missing(*required)(stub)
+        full = sample_arguments(original)
+        base = measure(stub, full, args.number)
+        rows.append((
+            tool.name,
+            measure(legacy, full, args.number) - base,
+            measure(current, full, args.number) - base,
+            measure(legacy, {}, args.number),
+            measure(current, {}, args.number),
+        ))
+
+    print(f"{'工具':<36}{'齐全-改造前':>12}{'齐全-当前':>12}{'缺参-改造前':>12}{'缺参-当前':>12}  (微秒/次)")
+    for name, *values in rows:
+        print(f"{name:<36}" + ''.join(f"{value:>12.2f}" for value in values))
+    columns = list(zip(*rows))[1:]
+    medians = [statistics.median(column) for column in columns]
+    print(f"{'中位数':<36}" + ''.join(f"{value:>12.2f}" for value in medians))
+    print(f"共 {len(rows)} 个工具（已注册 {len(mcp._tool_manager.list_tools())} 个）；"
+          f"参数齐全时开销 {medians[0]:.2f} -> {medians[1]:.2f} 微秒，"
+          f"缺少参数时 {medians[2]:.2f} -> {medians[3]:.2f} 微秒")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
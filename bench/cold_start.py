@@ -0,0 +1,125 @@
+"""
+冷启动基准：对比源码目录与 zipapp 打包文件启动注册进程，到应答 initialize 与 tools/list 的耗时
+
+用法：
+    python bench/cold_start.py [--runs 5] [--config config.yaml] [--all-groups]
+
+每轮启动一个全新的注册进程（aggregate 入口），立即通过标准输入发送 initialize 与 tools/list，记录：
+    握手耗时 - 从启动解释器到收到 initialize 结果（含解释器自身启动）
+    列表耗时 - 从启动解释器到收到 tools/list 结果
+三种模式：
+    源码(冷) - 每轮复制一份不含 __pycache__ 的源码目录，导入时需要编译全部模块（首次安装、更新后的情况）
+    源码(热) - 同一份源码目录，__pycache__ 已生成（需检查每个源码文件的修改时间）
+    打包文件 - handle.bundle 生成的打包文件（预编译字节码，只含启用的工具分组）
+配置通过 MCP_CONFIG_PATH 传入，三种模式使用同一份配置。
+"""
+
+import os
+import sys
+import json
+import time
+import yaml
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from handle.bundle import build
+
+REQUESTS = [
+    {"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {
+        "protocolVersion": "2024-11-05", "capabilities": {},
+        "clientInfo": {"name": "bench", "version": "1.0"}}},
+    {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+]
+# 复制源码时不需要的目录
+IGNORE = shutil.ignore_patterns('__pycache__', '.git', 'log', 'dist', 'bench', '*.pyc')
+
+def run_once(command: list, cwd: str, config_path: str) -> dict:
+    env = os.environ.copy()
+    env['MCP_CONFIG_PATH'] = config_path
+    env['PYTHONIOENCODING'] = 'utf-8'
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        process.stdin.write(''.join(json.dumps(r) + '\n' for r in REQUESTS).encode('utf-8'))
+        process.stdin.flush()
+        times = {}
+        while len(times) < 2:
+            line = process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"注册进程已退出: {' '.join(command)}")
+            message = json.loads(line)
+            if message.get('id') == 0:
+                times['initialize'] = time.perf_counter() - start
+            elif message.get('id') == 1:
+                times['tools_list'] = time.perf_counter() - start
+                times['tools'] = len(message['result']['tools'])
+        return times
+    finally:
+        process.kill()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动基准")
+    parser.add_argument('--runs', type=int, default=5, help="每种模式的启动次数")
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config.yaml'), help="基准使用的配置文件")
+    parser.add_argument('--all-groups', action='store_true', help="打包全部工具分组")
+    args = parser.parse_args()
+    config_path = os.path.abspath(args.config)
+    with open(config_path, encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    with tempfile.TemporaryDirectory() as directory:
+        warm_root = os.path.join(directory, 'warm')
+        shutil.copytree(ROOT, warm_root, ignore=IGNORE)
+        bundle = os.path.join(directory, 'dist', 'xiaozhi-mcp.pyz')
+        info = build(bundle, config, args.all_groups)
+        bundle_size = os.path.getsize(bundle)
+
+        def source_cold(i):
+            # 每轮一份新的源码目录，不含任何字节码缓存
+            cold_root = os.path.join(directory, f'cold{i}')
+            shutil.copytree(ROOT, cold_root, ignore=IGNORE)
+            return [sys.executable, os.path.join(cold_root, 'aggregate.py')], cold_root
+
+        modes = {
+            '源码(冷)': source_cold,
+            '源码(热)': lambda i: ([sys.executable, os.path.join(warm_root, 'aggregate.py')], warm_root),
+            '打包文件': lambda i: ([sys.executable, bundle, 'aggregate'], os.path.dirname(bundle)),
+        }
+        # 预热：生成热源码目录的 __pycache__，并让系统缓存解释器与第三方库
+        for mode in ('源码(热)', '打包文件'):
+            run_once(*modes[mode](-1), config_path)
+        results = {mode: [] for mode in modes}
+        # 交替运行，减少系统负载波动对某一模式的影响
+        for i in range(args.runs):
+            for mode, prepare in modes.items():
+                command, cwd = prepare(i)
+                results[mode].append(run_once(command, cwd, config_path))
+
+    print(f"打包文件：{info['modules']} 个模块，工具分组 {len(info['groups'])} 个，{bundle_size / 1024:.0f}KB")
+    print(f"{'模式':<10}{'工具数':>8}{'握手耗时(ms)':>14}{'列表耗时(ms)':>14}")
+    summary = {}
+    for mode, runs in results.items():
+        summary[mode] = {
+            'tools': runs[0]['tools'],
+            'initialize': statistics.median(r['initialize'] for r in runs) * 1000,
+            'tools_list': statistics.median(r['tools_list'] for r in runs) * 1000,
+        }
+        s = summary[mode]
+        print(f"{mode:<10}{s['tools']:>8}{s['initialize']:>14.1f}{s['tools_list']:>14.1f}")
+    bundled = summary['打包文件']['initialize']
+    for mode in ('源码(冷)', '源码(热)'):
+        source = summary[mode]['initialize']
+        print(f"打包文件相对{mode}：握手耗时 {bundled - source:+.1f}ms（{(bundled - source) / source * 100:+.1f}%，"
+              f"取 {args.runs} 次中位数）")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+彩色日志格式化基准：对比按字段着色与改造前按正则拆分格式化结果的耗时
+
+用法：
+    python bench/color_formatter.py [--number 20000]
+
+记录取自实际运行中常见的日志：短消息、带冒号的消息、警告、带异常堆栈的错误，
+以及窗口列表（约 4KB）与浏览器书签（约 20KB）这类多行大消息。
+每条记录先确认两种实现的输出逐字节相同，再分别测量单次格式化耗时（取 5 轮中位数）。
+"""
+
+import os
+import sys
+import copy
+import logging
+import argparse
+import statistics
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from handle.color_formatter import ColoredFormatter, FIELD_FORMAT, FIELD_DATEFMT
+
+def _record(name: str, level: int, msg: str, exc: bool = False) -> logging.LogRecord:
+    exc_info = None
+    if exc:
+        try:
+            raise ConnectionError("远程主机强迫关闭了一个现有的连接。")
+        except ConnectionError:
+            exc_info = sys.exc_info()
+    return logging.LogRecord(name, level, __file__, 0, msg, None, exc_info)
+
+def records() -> list:
+    windows = '\n'.join(f"{i}. 窗口标题：记事本 - 文档{i}.txt，进程：notepad.exe，句柄：{0x10000 + i}"
+                        for i in range(70))
+    bookmarks = '\n'.join(f"{i}. 书签：常用网站{i}，地址：https://www.example.com/path/{i}?from=bookmark"
+                          for i in range(300))
+    return [
+        ("短消息", _record('管道服务', logging.INFO, "启动环境检查..")),
+        ("带冒号", _record('版本检查', logging.INFO, "最新版本: 0.2.5.6-rc")),
+        ("警告", _record('管道代理', logging.WARNING, "连接已断开，5 秒后重连 (尝试次数: 1)")),
+        ("错误+堆栈", _record('管道代理', logging.ERROR, "WebSocket 连接错误", exc=True)),
+        ("窗口列表", _record('窗口', logging.INFO, f"窗口列表：\n{windows}")),
+        ("书签", _record('浏览器书签', logging.INFO, f"获取书签成功，共 300 个：\n{bookmarks}")),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="彩色日志格式化基准")
+    parser.add_argument('--number', type=int, default=20000, help="每轮格式化次数")
+    args = parser.parse_args()
+
+    logging.addLevelName(logging.INFO, "信息")
+    logging.addLevelName(logging.WARNING, "警告")
+    logging.addLevelName(logging.ERROR, "错误")
+    formatter = ColoredFormatter(FIELD_FORMAT, datefmt=FIELD_DATEFMT)
+
+    print(f"{'记录':<10}{'消息字节':>10}{'正则拆分(µs)':>14}{'按字段(µs)':>12}{'加速':>8}")
+    for label, record in records():
+        new = formatter.format(copy.copy(record))
+        old = formatter._format_by_regex(copy.copy(record))
+        if new != old:
+            raise AssertionError(f"{label}：两种实现的输出不一致")
+        # 与日志线程中的情况相同：记录已由队列处理器合并消息，异常文本已缓存
+        formatter.format(record)
+        size = len(record.getMessage().encode('utf-8'))
+        timings = {}
+        for mode, func in (('regex', formatter._format_by_regex), ('fields', formatter.format)):
+            runs = timeit.repeat(lambda: func(record), number=args.number, repeat=5)
+            timings[mode] = statistics.median(runs) / args.number * 1e6
+        print(f"{label:<10}{size:>10}{timings['regex']:>14.2f}{timings['fields']:>12.2f}"
+              f"{timings['regex'] / timings['fields']:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
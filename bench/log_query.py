@@ -0,0 +1,147 @@
+"""
+日志查询基准：对比逐行扫描全部日志文件与使用索引查询的耗时
+
+用法：
+    python bench/log_query.py [--days 3] [--mb-per-day 60] [--repeat 5]
+
+在临时目录中生成若干天的日志（每天按 20MB 切分为多个分段，之前日期的分段压缩为 zstd 可寻址格式），
+日志器名称、级别与消息长度按实际运行中的比例随机生成。查询：
+    单日志器错误  最后一天 10:00-11:00 音乐播放的错误（问题排查的常见查询）
+    单日志器全天  最后一天管道代理的全部日志
+    关键字        全部日期中包含"重连"的警告及以上日志
+每个查询先确认结果与逐行扫描完全相同，再分别测量：
+    逐行扫描  读取（解压）全部分段，逐行匹配
+    首次查询  没有索引，查询时生成索引
+    索引查询  索引已存在（取 --repeat 次中位数）
+    增量查询  最后一个分段追加约 1MB 日志后查询，只扫描新增的数据
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import statistics
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from handle.log_rotation import INDEX_SUFFIX, compress_segment, list_segments, read_segment, segment_path
+from handle.log_index import LEVELS, parse_time, query
+
+# (日志器名称, 权重)
+LOGGERS = [('管道代理', 30), ('管道服务', 20), ('音乐播放', 10), ('窗口Z序', 10), ('系统信息', 8),
+           ('浏览器书签', 5), ('剪切板文字', 5), ('执行命令', 5), ('日志队列', 2), ('版本检查', 5)]
+# (级别, 权重)
+LEVEL_WEIGHTS = [('信息', 90), ('警告', 7), ('错误', 2.5), ('严重错误', 0.5)]
+MESSAGES = ["收到消息：{{\"jsonrpc\": \"2.0\", \"id\": {n}, \"method\": \"tools/call\"}}",
+            "连接已断开，5 秒后重连 (尝试次数: {n})", "播放歌曲：第 {n} 首，来源：网易云音乐",
+            "返回数据：{{'cpu': {{'percent': {n}.5}}, 'memory': {{'percent': 63.1}}}}",
+            "当前桌面窗口顺序（从上到下共40个）：\\n" + "窗口标题 {n} - 记事本\\n" * 20]
+
+def _lines(rng: random.Random, day: str, count: int):
+    names, name_weights = zip(*LOGGERS)
+    levels, level_weights = zip(*LEVEL_WEIGHTS)
+    base = datetime.strptime(day, '%Y-%m-%d')
+    for i in range(count):
+        moment = base + timedelta(seconds=86399 * i // count)
+        message = rng.choice(MESSAGES).format(n=rng.randint(0, 9999))
+        yield (f"{moment:%Y-%m-%d %H:%M:%S} - {rng.choices(names, name_weights)[0]}："
+               f"{rng.choices(levels, level_weights)[0]}，{message}\n")
+
+def generate(log_dir: str, days: int, mb_per_day: int, segment_mb: int = 20) -> str:
+    """生成日志，返回最后一天的日期"""
+    rng = random.Random(0)
+    last = datetime(2026, 1, 1) + timedelta(days=days - 1)
+    for d in range(days):
+        day = (last - timedelta(days=days - 1 - d)).strftime('%Y-%m-%d')
+        index, f = 0, open(segment_path(log_dir, day), 'w', encoding='utf-8')
+        for line in _lines(rng, day, mb_per_day * 1024 * 1024 // 150):
+            if f.tell() > segment_mb * 1024 * 1024:
+                f.close()
+                index += 1
+                f = open(segment_path(log_dir, day, index), 'w', encoding='utf-8')
+            f.write(line)
+        f.close()
+    for segment in list_segments(log_dir):
+        if segment.day != last.strftime('%Y-%m-%d'):
+            compress_segment(segment.path, 10)
+    return last.strftime('%Y-%m-%d')
+
+_RECORD = re.compile(r'^(\S+ \S+) - (.+?)：(\S+?)，')
+
+def scan(log_dir: str, start: str, end: str, loggers, level: str, contains: str) -> list:
+    """逐行扫描全部分段（改造前的排查方式）"""
+    results, min_level = [], LEVELS[level] if level else None
+    for segment in list_segments(log_dir):
+        text = b''.join(data for _, data in read_segment(segment.path)).decode('utf-8')
+        for line in text.splitlines():
+            record = _RECORD.match(line)
+            if not record:
+                continue
+            moment, name, level_name = record.groups()
+            if (start and moment < start) or (end and moment > end) or (loggers and name not in loggers):
+                continue
+            if (min_level and LEVELS.get(level_name, 0) < min_level) or (contains and contains not in line):
+                continue
+            results.append(line)
+    return results
+
+def _timed(func):
+    begin = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - begin) * 1000
+
+def _remove_indexes(log_dir: str):
+    for name in os.listdir(log_dir):
+        if name.endswith(INDEX_SUFFIX):
+            os.remove(os.path.join(log_dir, name))
+
+def main():
+    parser = argparse.ArgumentParser(description="日志查询基准")
+    parser.add_argument('--days', type=int, default=3, help="生成多少天的日志")
+    parser.add_argument('--mb-per-day', type=int, default=60, help="每天的日志大小（MB）")
+    parser.add_argument('--repeat', type=int, default=5, help="索引查询的重复次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        last = generate(log_dir, args.days, args.mb_per_day)
+        queries = {
+            '单日志器错误': (parse_time('10:00', day=last), parse_time('11:00', end=True, day=last), ['音乐播放'], '错误', None),
+            '单日志器全天': (parse_time(last), parse_time(last, end=True), ['管道代理'], None, None),
+            '关键字': (None, None, None, '警告', '重连'),
+        }
+        total = sum(os.path.getsize(os.path.join(log_dir, name)) for name in os.listdir(log_dir))
+        print(f"{args.days} 天日志，每天 {args.mb_per_day}MB，磁盘占用 {total / 1024 / 1024:.1f}MB"
+              f"（{len(list_segments(log_dir))} 个分段）")
+        print(f"{'查询':<10}{'结果行数':>8}{'逐行扫描(ms)':>14}{'首次查询(ms)':>14}{'索引查询(ms)':>14}"
+              f"{'增量查询(ms)':>14}{'读取数据块':>12}")
+        rng = random.Random(1)
+        for label, (start, end, loggers, level, contains) in queries.items():
+            expected, scan_ms = _timed(lambda: scan(log_dir, start, end, loggers, level, contains))
+            _remove_indexes(log_dir)
+            run = lambda stats=None: list(query(log_dir, start, end, loggers, level, contains, stats))
+            lines, cold_ms = _timed(run)
+            if lines != expected:
+                raise AssertionError(f"{label}：索引查询结果与逐行扫描不一致")
+            stats = {}
+            warm_ms = statistics.median(_timed(lambda: run(stats))[1] for _ in range(args.repeat))
+            # 最后一天的最后一个分段追加日志（时间在最后一天之内）
+            latest = list_segments(log_dir)[-1].path
+            with open(latest, 'a', encoding='utf-8') as f:
+                f.writelines(_lines(rng, last, 1024 * 1024 // 150))
+            expected = scan(log_dir, start, end, loggers, level, contains)
+            lines, grow_ms = _timed(run)
+            if lines != expected:
+                raise AssertionError(f"{label}：追加日志后的查询结果与逐行扫描不一致")
+            print(f"{label:<10}{len(lines):>8}{scan_ms:>14.1f}{cold_ms:>14.1f}{warm_ms:>14.1f}{grow_ms:>14.1f}"
+                  f"{stats['candidates']:>6}/{stats['blocks']}")
+        index_bytes = sum(os.path.getsize(os.path.join(log_dir, name))
+                          for name in os.listdir(log_dir) if name.endswith(INDEX_SUFFIX))
+        print(f"索引文件共 {index_bytes / 1024:.1f}KB")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+日志队列基准：对比直接写入与经日志队列写入时，记录日志的工具调用耗时
+
+用法：
+    python bench/logging_queue.py [--calls 2000] [--payload 4096] [--interval 0.5] [--console-delay 0]
+
+模拟的工具调用记录三条 INFO 日志：开始、结果（--payload 字节的多行内容，如窗口列表、书签）、完成，
+调用之间间隔 --interval 毫秒。每种模式各运行一次 setup_logging：
+    直接写入 - logging.queue 关闭，着色、控制台输出与文件写入都在调用线程中完成（改造前的行为）
+    日志队列 - 调用线程只把日志放入队列，由日志线程写入（溢出策略 reject）
+控制台输出写入空设备，--console-delay 为每次控制台写入附加的等待（微秒），用于模拟缓慢的 Windows 控制台；
+日志文件写入临时目录。每种模式分别测量轻量日志（无结果内容）与大量日志两种情况。
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from handle.logger import setup_logging, stop_logging, BoundedQueueHandler
+
+class SlowConsole(io.TextIOBase):
+    """写入空设备的控制台，每次写入附加固定等待"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._null = open(os.devnull, 'w', encoding='utf-8')
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        return self._null.write(text)
+
+    def flush(self):
+        self._null.flush()
+
+def make_payload(size: int) -> str:
+    """类似窗口列表的多行内容"""
+    lines, total, i = [], 0, 0
+    while total < size:
+        line = f"{i}. 窗口标题：记事本 - 文档{i}.txt，进程：notepad.exe，句柄：{0x10000 + i}"
+        lines.append(line)
+        total += len(line.encode('utf-8')) + 1
+        i += 1
+    return '\n'.join(lines)
+
+def run_mode(queued: bool, payload: str, calls: int, interval: float) -> dict:
+    setup_logging({'queue': queued})
+    logger = logging.getLogger('基准工具')
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        logger.info(f"开始执行工具 get_windows，第 {i} 次调用")
+        if payload:
+            logger.info(f"窗口列表：\n{payload}")
+        logger.info("工具执行完成")
+        samples.append(time.perf_counter() - start)
+        if interval:
+            time.sleep(interval)
+    dropped = sum(h.dropped for h in logging.getLogger('').handlers if isinstance(h, BoundedQueueHandler))
+    start = time.perf_counter()
+    stop_logging()
+    drain = time.perf_counter() - start
+    samples.sort()
+    return {
+        'median': statistics.median(samples) * 1e6,
+        'p99': samples[int(len(samples) * 0.99) - 1] * 1e6,
+        'drain': drain * 1000,
+        'dropped': dropped,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="日志队列基准")
+    parser.add_argument('--calls', type=int, default=2000, help="每种情况的工具调用次数")
+    parser.add_argument('--payload', type=int, default=4096, help="大量日志时结果内容的字节数")
+    parser.add_argument('--interval', type=float, default=0.5, help="调用间隔（毫秒）")
+    parser.add_argument('--console-delay', type=float, default=0, help="每次控制台写入附加的等待（微秒）")
+    args = parser.parse_args()
+
+    stderr = sys.stderr
+    cwd = os.getcwd()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        sys.stderr = SlowConsole(args.console_delay / 1e6)
+        try:
+            for label, size in (('轻量日志', 0), ('大量日志', args.payload)):
+                payload = make_payload(size) if size else ''
+                for mode, queued in (('直接写入', False), ('日志队列', True)):
+                    results[(label, mode)] = run_mode(queued, payload, args.calls, args.interval / 1000)
+        finally:
+            root_logger = logging.getLogger('')
+            for handler in list(root_logger.handlers):
+                root_logger.removeHandler(handler)
+                handler.close()
+            sys.stderr = stderr
+            os.chdir(cwd)
+
+    print(f"{args.calls} 次调用，结果内容 {args.payload} 字节，调用间隔 {args.interval}ms，"
+          f"控制台写入等待 {args.console_delay}µs")
+    print(f"{'情况':<10}{'模式':<10}{'中位数(µs)':>12}{'P99(µs)':>12}{'退出写完(ms)':>14}{'丢弃':>8}")
+    for (label, mode), r in results.items():
+        print(f"{label:<10}{mode:<10}{r['median']:>12.1f}{r['p99']:>12.1f}{r['drain']:>14.1f}{r['dropped']:>8}")
+    for label in ('轻量日志', '大量日志'):
+        direct, queued = results[(label, '直接写入')], results[(label, '日志队列')]
+        print(f"{label}：日志队列使调用耗时中位数 {direct['median']:.1f}µs -> {queued['median']:.1f}µs"
+              f"（{(queued['median'] - direct['median']) / direct['median'] * 100:+.1f}%）")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
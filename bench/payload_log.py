@@ -0,0 +1,140 @@
+"""
+载荷日志基准：重放一段工具调用会话，对比改造前直接记录完整内容与 log_payload 的 CPU 耗时与日志字节数
+
+用法：
+    python bench/payload_log.py [--rounds 200] [--max-bytes 2048] [--sample-interval 30]
+
+会话由常见的大段日志组成，每轮依次调用：
+    get_system_status       系统状态字典（每轮数值不同）
+    get_windows_z_order     约 40 个窗口的彩色表格（每 3 轮变化一次）
+    identify_text_position  约 80 个文字块的识别结果（每 5 轮一次）
+    get_browser_bookmarks   300 个书签（每 10 轮一次，内容不变）
+    get_clipboard_text      约 2KB 的剪切板文字（每 4 轮一次）
+两种模式都经过 setup_logging 配置的日志队列写入控制台（空设备，统计字节数）与临时目录中的日志文件：
+    完整内容 - 改造前的写法，f-string 立即生成完整文本
+    载荷日志 - log_payload，按 --max-bytes 截断并按 --sample-interval 采样
+CPU 耗时为整个进程（含日志线程）的 CPU 时间，从第一次调用到日志全部写完。
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import handle.payload_log as payload_log
+from handle.payload_log import log_payload
+from handle.logger import setup_logging, stop_logging
+
+class CountingConsole(io.TextIOBase):
+    """统计写入字节数的控制台"""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, text):
+        self.bytes += len(text.encode('utf-8'))
+        return len(text)
+
+def make_session(rounds: int) -> list:
+    """生成会话：[(日志器名称, 前缀, 内容)]"""
+    rng = random.Random(0)
+    bookmarks = [{'name': f'常用网站{i}', 'url': f'https://www.example.com/path/{i}?from=bookmark',
+                  'folder': '书签栏/工作'} for i in range(300)]
+    clipboard = '\n'.join(f'第{i}行：复制的会议纪要内容，包含若干中文与 English words。' for i in range(40))
+    session = []
+    windows = None
+    for i in range(rounds):
+        status = {
+            'system': {'os': 'Windows 11', 'hostname': 'DESKTOP-1234', 'boot_time': '2026-10-18 08:00:00'},
+            'cpu': {'percent': rng.uniform(0, 100), 'count': 16, 'freq': rng.uniform(2000, 4000)},
+            'memory': {'total': 34359738368, 'used': rng.randint(8, 30) * 1 << 30, 'percent': rng.uniform(20, 90)},
+            'disk': [{'device': f'{d}:\\', 'total': 512 << 30, 'used': rng.randint(100, 500) << 30} for d in 'CDE'],
+            'network': {'ip': '192.168.1.23', 'sent': rng.randint(0, 1 << 40), 'recv': rng.randint(0, 1 << 40)},
+        }
+        session.append(('系统信息', "返回数据：", status))
+        if windows is None or i % 3 == 0:
+            windows = "\n".join(
+                f"\033[33m{n:>2}.\033[0m \033[1;37m窗口标题 {n} - {rng.randint(0, 999)}\033[0m  "
+                f"\033[32m|\033[0m  \033[32m{0x10000 + n}\033[0m  \033[32m|\033[0m  \033[34m(0, 0, 1920, 1080)\033[0m"
+                for n in range(1, 41))
+        session.append(('窗口Z序', "当前桌面窗口顺序（从上到下共40个）：\n", windows))
+        if i % 5 == 0:
+            ocr = [{'text': f'识别文字{n}', 'box': [[n, n], [n + 80, n], [n + 80, n + 20], [n, n + 20]],
+                    'confidence': rng.random()} for n in range(80)]
+            session.append(('图像文字识别', "识别结果: ", ocr))
+        if i % 10 == 0:
+            session.append(('书签工具', "书签内容：", bookmarks))
+        if i % 4 == 0:
+            session.append(('剪切板文字', "获取到剪切板文字: ", clipboard))
+    return session
+
+def replay(session: list, payload: bool) -> dict:
+    console = CountingConsole()
+    stderr = sys.stderr
+    sys.stderr = console
+    try:
+        setup_logging({'compress': False, 'max_total_mb': 0, 'max_days': 0})
+    finally:
+        sys.stderr = stderr
+    loggers = {name: logging.getLogger(name) for name, _, _ in session}
+    cpu, wall = time.process_time(), time.perf_counter()
+    for name, message, content in session:
+        if payload:
+            log_payload(loggers[name], message, content)
+        else:
+            loggers[name].info(f"{message}{content}")
+    call_wall = time.perf_counter() - wall
+    stop_logging()
+    cpu = time.process_time() - cpu
+    file_bytes = sum(os.path.getsize(os.path.join('log', name)) for name in os.listdir('log'))
+    root_logger = logging.getLogger('')
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+        handler.close()
+    for name in os.listdir('log'):
+        os.remove(os.path.join('log', name))
+    return {'cpu': cpu * 1000, 'wall': call_wall * 1000, 'console': console.bytes, 'file': file_bytes}
+
+def main():
+    parser = argparse.ArgumentParser(description="载荷日志基准")
+    parser.add_argument('--rounds', type=int, default=200, help="会话轮数")
+    parser.add_argument('--max-bytes', type=int, default=2048, help="每条日志中内容的最大字节数")
+    parser.add_argument('--sample-interval', type=float, default=30, help="相同内容的采样间隔（秒），0 表示不采样")
+    args = parser.parse_args()
+
+    # 使用命令行参数代替配置文件中的 logging.payload 段
+    options = dict(payload_log.PAYLOAD_DEFAULTS, max_bytes=args.max_bytes, sample_interval=args.sample_interval)
+    payload_log._options = lambda: options
+
+    session = make_session(args.rounds)
+    cwd = os.getcwd()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            # 预热一次，避免首轮导入与创建文件影响结果
+            replay(session[:10], False)
+            for mode, payload in (('完整内容', False), ('载荷日志', True)):
+                payload_log._samples.clear()
+                results[mode] = replay(session, payload)
+        finally:
+            os.chdir(cwd)
+
+    print(f"{len(session)} 条大段日志（{args.rounds} 轮），内容上限 {args.max_bytes} 字节，采样间隔 {args.sample_interval}s")
+    print(f"{'模式':<10}{'CPU(ms)':>10}{'调用耗时(ms)':>14}{'控制台(KB)':>12}{'日志文件(KB)':>14}")
+    for mode, r in results.items():
+        print(f"{mode:<10}{r['cpu']:>10.1f}{r['wall']:>14.1f}{r['console'] / 1024:>12.1f}{r['file'] / 1024:>14.1f}")
+    full, lazy = results['完整内容'], results['载荷日志']
+    print(f"CPU 减少 {(1 - lazy['cpu'] / full['cpu']) * 100:.1f}%，"
+          f"日志文件减少 {(1 - lazy['file'] / full['file']) * 100:.1f}%，"
+          f"控制台输出减少 {(1 - lazy['console'] / full['console']) * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
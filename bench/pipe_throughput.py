@@ -0,0 +1,124 @@
+"""
+管道吞吐基准：对比 线程池 readline（旧实现）与 asyncio 子进程流（新实现）
+
+用法：
+    python bench/pipe_throughput.py [--messages 20000] [--window 64] [--size 512]
+
+子进程为一个逐行回显的最小 Python 程序，测量每条 JSON-RPC 消息从写入 stdin
+到从 stdout 读回的往返时间，输出 消息/秒 与 p50/p99 延迟。
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+
+# 逐行回显的子进程，模拟 MCP 服务端的 stdio 收发
+ECHO_CHILD = (
+    "import sys\n"
+    "r, w = sys.stdin.buffer, sys.stdout.buffer\n"
+    "for line in r:\n"
+    "    w.write(line)\n"
+    "    w.flush()\n"
+)
+
+STREAM_LIMIT = 16 * 1024 * 1024
+
+class ExecutorPipe:
+    """旧实现：subprocess.Popen + run_in_executor(readline) + 阻塞 write/flush"""
+
+    async def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-c', ECHO_CHILD],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    async def send(self, data: bytes):
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    async def readline(self) -> bytes:
+        return await asyncio.get_event_loop().run_in_executor(
+            None, self.process.stdout.readline
+        )
+
+    async def stop(self):
+        self.process.stdin.close()
+        self.process.wait(timeout=5)
+
+class StreamPipe:
+    """新实现：asyncio.create_subprocess_exec + StreamReader/StreamWriter + drain()"""
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, '-c', ECHO_CHILD,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            limit=STREAM_LIMIT,
+        )
+
+    async def send(self, data: bytes):
+        self.process.stdin.write(data)
+        await self.process.stdin.drain()
+
+    async def readline(self) -> bytes:
+        return await self.process.stdout.readline()
+
+    async def stop(self):
+        self.process.stdin.close()
+        await self.process.wait()
+
+async def run_case(pipe, messages: int, window: int, size: int) -> dict:
+    """以固定在途窗口突发发送消息，统计吞吐与延迟"""
+    await pipe.start()
+    padding = 'x' * size
+    sent_at = {}
+    latencies = []
+    slots = asyncio.Semaphore(window)
+
+    async def writer():
+        for i in range(messages):
+            await slots.acquire()
+            line = json.dumps({"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                               "params": {"payload": padding}}) + '\n'
+            sent_at[i] = time.perf_counter()
+            await pipe.send(line.encode('utf-8'))
+
+    async def reader():
+        for _ in range(messages):
+            line = await pipe.readline()
+            now = time.perf_counter()
+            msg_id = json.loads(line)['id']
+            latencies.append(now - sent_at.pop(msg_id))
+            slots.release()
+
+    start = time.perf_counter()
+    await asyncio.gather(writer(), reader())
+    elapsed = time.perf_counter() - start
+    await pipe.stop()
+
+    latencies.sort()
+    return {
+        "msgs_per_sec": messages / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="管道吞吐基准")
+    parser.add_argument('--messages', type=int, default=20000, help="消息总数")
+    parser.add_argument('--window', type=int, default=64, help="在途消息窗口（模拟突发流量）")
+    parser.add_argument('--size', type=int, default=512, help="每条消息的负载字节数")
+    args = parser.parse_args()
+
+    print(f"消息数={args.messages} 窗口={args.window} 负载={args.size}B")
+    print(f"{'实现':<12}{'消息/秒':>12}{'p50(ms)':>12}{'p99(ms)':>12}")
+    for name, pipe in (("executor", ExecutorPipe()), ("streams", StreamPipe())):
+        result = await run_case(pipe, args.messages, args.window, args.size)
+        print(f"{name:<12}{result['msgs_per_sec']:>12.0f}{result['p50_ms']:>12.3f}{result['p99_ms']:>12.3f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+重连恢复基准：本地 websockets 服务端按计划反复断开，测量管道的恢复耗时
+
+用法：
+    python bench/reconnect_flap.py [--schedule clean:2:0,abort:2:1,...] [--policy jitter|legacy]
+
+计划由逗号分隔的阶段组成，每个阶段为 方式:保持秒数:停机秒数
+    clean  - 服务端以 1001 正常关闭连接（模拟服务端重启/下线）
+    abort  - 直接断开 TCP，不发送关闭帧（模拟网络中断）
+停机秒数大于 0 时，服务端在断开后停止监听相应时间，再重新开始监听。
+
+每个阶段记录两个耗时：
+    恢复延迟 - 服务端重新可用到管道重新连上的时间（越小说明重连调度越及时）
+    中断时长 - 连接断开到重新连上的总时间
+--policy legacy 使用改造前的翻倍退避策略作为对比。
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websockets.asyncio.server import serve
+from handle import ws_connection
+from handle.ws_reconnect import ReconnectScheduler, classify_error
+
+HOST = '127.0.0.1'
+DEFAULT_SCHEDULE = 'clean:2:0,abort:2:0,clean:2:2,abort:2:3,clean:2:0,abort:2:1'
+
+# 不处理任何消息的最小子进程，只为让管道完整走一遍连接流程
+STUB_CHILD = "import sys\nfor line in sys.stdin:\n    pass\n"
+
+class LegacyScheduler(ReconnectScheduler):
+    """改造前的策略：每次失败等待时间翻倍，错误信息含 timed out 时回到初始值"""
+
+    def failed(self, error):
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+        self.attempt += 1
+        if 'timed out' in str(error):
+            self._delay = self.initial_backoff
+        else:
+            self._delay = min(self._delay * 2, self.max_backoff)
+        return classify_error(error), self._delay * (1 + random.random() * 0.1)
+
+class FlappingServer:
+    """按计划断开连接、停止/恢复监听的服务端"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.server = None
+        self.connections = asyncio.Queue()
+
+    async def _handler(self, websocket):
+        self.connections.put_nowait((time.perf_counter(), websocket))
+        await websocket.wait_closed()
+
+    async def start(self):
+        self.server = await serve(self._handler, HOST, self.port)
+
+    async def stop(self, close_connections: bool = False):
+        self.server.close(close_connections=close_connections)
+        await self.server.wait_closed()
+        self.server = None
+
+async def run_schedule(server, schedule) -> list:
+    results = []
+    _, websocket = await server.connections.get()
+    for mode, up, down in schedule:
+        await asyncio.sleep(up)
+        dropped_at = time.perf_counter()
+        if mode == 'clean':
+            await websocket.close(1001, 'going away')
+        else:
+            websocket.transport.abort()
+        ready_at = dropped_at
+        if down > 0:
+            await server.stop()
+            await asyncio.sleep(down)
+            await server.start()
+            ready_at = time.perf_counter()
+        connected_at, websocket = await server.connections.get()
+        results.append({
+            "mode": mode, "down": down,
+            "recovery_ms": (connected_at - ready_at) * 1000,
+            "outage_ms": (connected_at - dropped_at) * 1000,
+        })
+    return results
+
+def parse_schedule(text: str) -> list:
+    schedule = []
+    for item in text.split(','):
+        mode, up, down = item.split(':')
+        if mode not in ('clean', 'abort'):
+            raise ValueError(f"未知的断开方式: {mode}")
+        schedule.append((mode, float(up), float(down)))
+    return schedule
+
+async def main():
+    parser = argparse.ArgumentParser(description="重连恢复基准")
+    parser.add_argument('--schedule', default=DEFAULT_SCHEDULE, help="断开计划，方式:保持秒数:停机秒数")
+    parser.add_argument('--policy', choices=('jitter', 'legacy'), default='jitter', help="重连策略")
+    parser.add_argument('--port', type=int, default=8799, help="本地服务端端口")
+    parser.add_argument('--verbose', action='store_true', help="输出管道日志")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as f:
+        f.write(STUB_CHILD)
+        stub = f.name
+    uri = f"ws://{HOST}:{args.port}/mcp"
+    ws_connection.set_config({
+        "reconnection": {"initial_backoff": 1, "max_backoff": 60},
+        "queue": {"stats_interval": 0},
+    })
+    ws_connection.set_mcp_script(stub)
+    session = ws_connection._get_session(uri)
+    if args.policy == 'legacy':
+        session.scheduler = LegacyScheduler(1, 60)
+
+    server = FlappingServer(args.port)
+    await server.start()
+    client = asyncio.create_task(ws_connection.connect_endpoints([uri]))
+    try:
+        results = await run_schedule(server, parse_schedule(args.schedule))
+    finally:
+        await server.stop(close_connections=True)
+        client.cancel()
+        await asyncio.gather(client, return_exceptions=True)
+        await ws_connection.shutdown_child()
+        os.unlink(stub)
+
+    print(f"策略={args.policy}")
+    print(f"{'方式':<8}{'停机(s)':>8}{'恢复延迟(ms)':>14}{'中断时长(ms)':>14}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['down']:>8.1f}{r['recovery_ms']:>14.1f}{r['outage_ms']:>14.1f}")
+    recoveries = sorted(r['recovery_ms'] for r in results)
+    print(f"恢复延迟 平均 {sum(recoveries) / len(recoveries):.1f}ms，最大 {recoveries[-1]:.1f}ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
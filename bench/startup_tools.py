@@ -0,0 +1,101 @@
+"""
+工具进程启动基准：对比开启/关闭延迟导入时，注册全部工具的耗时与常驻内存
+
+用法：
+    python bench/startup_tools.py [--runs 5] [--config config.yaml]
+
+每轮启动一个全新的解释器，导入 services.register 并调用 create_server()，记录：
+    注册耗时 - 从导入 services.register 到 create_server() 返回
+    进程耗时 - 从启动解释器到子进程报告结果（含解释器自身启动）
+    常驻内存 - 注册完成后进程的 RSS
+    模块数   - 注册完成后 sys.modules 中的模块数量
+两种模式使用同一份配置，仅 startup.lazy_import 不同（通过 MCP_CONFIG_PATH 传入临时配置）。
+"""
+
+import os
+import sys
+import json
+import time
+import yaml
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子进程：注册全部工具后输出测量结果
+CHILD = (
+    "import sys, time, json\n"
+    "start = time.perf_counter()\n"
+    "from services.register import create_server\n"
+    "mcp = create_server()\n"
+    "elapsed = time.perf_counter() - start\n"
+    "tools = len(mcp._tool_manager.list_tools())\n"
+    "modules = len(sys.modules)\n"
+    "import psutil\n"
+    "rss = psutil.Process().memory_info().rss\n"
+    "print(json.dumps({'elapsed': elapsed, 'tools': tools, 'modules': modules, 'rss': rss}))\n"
+)
+
+def run_once(config_path: str) -> dict:
+    env = os.environ.copy()
+    env['MCP_CONFIG_PATH'] = config_path
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD],
+        cwd=ROOT, env=env, capture_output=True, text=True, encoding='utf-8',
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"子进程启动失败:\n{result.stderr}")
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    data['wall'] = wall
+    return data
+
+def write_config(base: dict, lazy: bool, directory: str) -> str:
+    config = dict(base)
+    config['startup'] = dict(config.get('startup') or {}, lazy_import=lazy)
+    path = os.path.join(directory, f"config_{'lazy' if lazy else 'eager'}.yaml")
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="工具进程启动基准")
+    parser.add_argument('--runs', type=int, default=5, help="每种模式的启动次数")
+    parser.add_argument('--config', default=os.path.join(ROOT, 'config.yaml'), help="基准使用的配置文件")
+    args = parser.parse_args()
+
+    with open(args.config, encoding='utf-8') as f:
+        base = yaml.safe_load(f)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {mode: write_config(base, mode == 'lazy', directory) for mode in ('eager', 'lazy')}
+        # 预热一次，避免首轮编译 .pyc 影响结果
+        for path in paths.values():
+            run_once(path)
+        results = {mode: [] for mode in paths}
+        # 交替运行，减少系统负载波动对某一模式的影响
+        for _ in range(args.runs):
+            for mode, path in paths.items():
+                results[mode].append(run_once(path))
+
+    print(f"{'模式':<8}{'工具数':>8}{'注册耗时(ms)':>14}{'进程耗时(ms)':>14}{'常驻内存(MB)':>14}{'模块数':>8}")
+    summary = {}
+    for mode, runs in results.items():
+        summary[mode] = {
+            'tools': runs[0]['tools'],
+            'elapsed': statistics.median(r['elapsed'] for r in runs) * 1000,
+            'wall': statistics.median(r['wall'] for r in runs) * 1000,
+            'rss': statistics.median(r['rss'] for r in runs) / 1024 / 1024,
+            'modules': statistics.median(r['modules'] for r in runs),
+        }
+        s = summary[mode]
+        print(f"{mode:<8}{s['tools']:>8}{s['elapsed']:>14.1f}{s['wall']:>14.1f}{s['rss']:>14.1f}{s['modules']:>8.0f}")
+    eager, lazy = summary['eager'], summary['lazy']
+    print(f"延迟导入：注册耗时 -{eager['elapsed'] - lazy['elapsed']:.1f}ms，"
+          f"常驻内存 -{eager['rss'] - lazy['rss']:.1f}MB（取 {args.runs} 次中位数）")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,29 +1,46 @@
 import sys
 import time
 import logging
-from handle.ws_connection import set_mcp_script, connect_with_retry
+from handle.loader import get_endpoint_urls
+from handle.ws_pipe import set_tool_manifest
+from handle.startup_profile import profiler
+from handle.tool_manifest import load_tool_manifest
+from handle.ws_connection import set_mcp_script, start_child_pool, connect_endpoints, shutdown_child
 
 async def main(config, logger, args=None, on_process_end=None):
     """管道服务主入口函数"""
     try:
         if args is None:
             args = sys.argv[1:]
-        if not args:
+        # 进程内模式直接在本进程注册工具，无需指定子进程脚本
+        inprocess = (config.get('transport') or {}).get('mode') == 'inprocess'
+        if not args and not inprocess:
             logger.error("请指定要运行的管道服务代理路径")
             time.sleep(30)
             return 1
-        set_mcp_script(args[0])
+        set_mcp_script(args[0] if args else None)
         logger.info("准备运行管道服务...")
         if not config.get('endpoint') or not isinstance(config['endpoint'], dict):
             logger.error("请确认配置，该配置是无效的")
             time.sleep(30)
             return 1
-        endpoint_url = config['endpoint'].get('url', '')
-        if not endpoint_url.startswith(('wss://', 'ws://')):
+        endpoint_urls = get_endpoint_urls(config)
+        if not endpoint_urls or not all(url.startswith(('wss://', 'ws://')) for url in endpoint_urls):
             logger.error("请确认配置，WebSocket端点URL必须以wss://或ws://开头")
             time.sleep(30)
             return 1
-        return await connect_with_retry(config['endpoint']['url'])
+        if len(endpoint_urls) > 1:
+            logger.info(f"已配置 {len(endpoint_urls)} 个端点，共享同一个注册进程")
+        # 工具清单有效时，握手与工具列表无需等待注册进程完成注册
+        if (config.get('startup') or {}).get('tool_manifest', True):
+            set_tool_manifest(load_tool_manifest(config))
+            profiler.mark('加载工具清单')
+        # 备用子进程的启动与首次连接并行进行
+        start_child_pool()
+        try:
+            return await connect_endpoints(endpoint_urls)
+        finally:
+            await shutdown_child()
     except Exception as e:
         from handle.ws_utils import translate_ws_error
         logger.error(f"管道服务启动失败: {translate_ws_error(e)}")
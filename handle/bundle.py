@@ -0,0 +1,259 @@
+"""
+打包：生成 zipapp 打包文件，包含预编译的字节码，只打包配置中启用的工具分组
+
+    python -m handle.bundle [--output dist/xiaozhi-mcp.pyz] [--config config.yaml] [--all-groups]
+
+运行打包文件（config.yaml 放在打包文件旁边）：
+    python dist/xiaozhi-mcp.pyz              # 管道服务，同 python mcp_pipe.py aggregate.py
+    python dist/xiaozhi-mcp.pyz aggregate    # 只运行注册进程
+管道服务以打包文件自身作为注册进程脚本，通过环境变量告知子进程运行 aggregate 入口。
+
+字节码使用不校验的哈希模式，导入时不再比较源码修改时间；字节码与打包时的 Python 版本绑定，
+版本不一致时自动改用包内源码。第三方依赖不打包（多数含扩展模块，无法从压缩包中导入），
+仍使用当前环境中安装的库。
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import functools
+
+logger = logging.getLogger('打包')
+
+BUNDLE_INFO = 'bundle.json'
+ENTRY_ENV = 'MCP_BUNDLE_ENTRY'
+ENTRIES = ('mcp_pipe', 'aggregate')
+DEFAULT_OUTPUT = os.path.join('dist', 'xiaozhi-mcp.pyz')
+# 全部打包的目录；utils 只打包启用的工具分组及其依赖
+PACKAGE_DIRS = ('handle', 'services')
+ENTRY_SCRIPTS = ('aggregate.py', 'mcp_pipe.py')
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MAIN_TEMPLATE = '''\
+"""打包入口：python {name} [mcp_pipe|aggregate]"""
+import os
+import sys
+import runpy
+
+ENTRY_ENV = {entry_env!r}
+ENTRIES = {entries!r}
+PYTHON = {python!r}
+
+if sys.version_info[:2] != PYTHON:
+    sys.stderr.write("打包文件由 Python %d.%d 编译，当前为 Python %d.%d，将使用包内源码运行（启动较慢）\\n"
+                     % (PYTHON + sys.version_info[:2]))
+entry = os.environ.pop(ENTRY_ENV, None)
+if len(sys.argv) > 1 and sys.argv[1] in ENTRIES:
+    entry = sys.argv.pop(1)
+if entry == 'aggregate':
+    runpy.run_module('aggregate', run_name='__main__', alter_sys=True)
+else:
+    # 注册进程由打包文件自身启动，并通过环境变量运行 aggregate 入口
+    os.environ[ENTRY_ENV] = 'aggregate'
+    sys.argv.insert(1, sys.argv[0])
+    runpy.run_module('mcp_pipe', run_name='__main__', alter_sys=True)
+'''
+
+def bundle_archive():
+    """以 zipapp 打包文件运行时返回打包文件路径，否则返回 None"""
+    return _ROOT if os.path.isfile(_ROOT) else None
+
+@functools.lru_cache(maxsize=None)
+def bundle_info():
+    """打包信息（版本、工具分组、源码哈希等），源码运行时返回 None"""
+    archive = bundle_archive()
+    if archive is None:
+        return None
+    return json.loads(__loader__.get_data(os.path.join(archive, BUNDLE_INFO)))
+
+def _registrations() -> list:
+    """从 services/register.py 中读取工具注册配置列表（不导入工具模块）"""
+    import ast
+    with open(os.path.join(_ROOT, 'services', 'register.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'TOOL_REGISTRATIONS' for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise RuntimeError("services/register.py 中没有找到 TOOL_REGISTRATIONS")
+
+def enabled_groups(config: dict) -> list:
+    """配置中启用的工具分组：(分组名, 注册模块)，判断方式与 register_tool 相同"""
+    groups = []
+    for config_path, register_func, tool_name in _registrations():
+        tool_config = config
+        for key in config_path:
+            tool_config = tool_config.get(key, {}) if isinstance(tool_config, dict) else {}
+        if isinstance(tool_config, dict) and any(tool_config.values()):
+            groups.append((tool_name, register_func.split(':')[0]))
+    return groups
+
+def _module_file(name: str):
+    """项目内模块名对应的相对路径，不是项目模块时返回 None"""
+    base = os.path.join(*name.split('.'))
+    for candidate in (base + '.py', os.path.join(base, '__init__.py')):
+        if os.path.isfile(os.path.join(_ROOT, candidate)):
+            return candidate.replace(os.sep, '/')
+    return None
+
+def _imports(path: str) -> set:
+    """源码中导入的全部模块名（含函数内的延迟导入）"""
+    import ast
+    with open(os.path.join(_ROOT, path), encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+            names.update(f'{node.module}.{alias.name}' for alias in node.names)
+    return names
+
+def _collect(roots: list, known: set) -> set:
+    """从 roots 出发收集导入的项目源码（不含 known 中已收集的），源码无法解析时抛出 SyntaxError"""
+    files, pending = set(), [path for path in roots if path]
+    while pending:
+        path = pending.pop()
+        if path in files or path in known:
+            continue
+        files.add(path)
+        for name in _imports(path):
+            # handle 中对工具模块的导入都是可选的（如进程清理时的音乐模块），不跟随
+            if path.startswith('handle/') and name.startswith('utils.'):
+                continue
+            target = _module_file(name)
+            if target is not None and target not in files and target not in known:
+                pending.append(target)
+    return files
+
+def _syntax_error(e: SyntaxError) -> str:
+    return (f"{e.filename} 第 {e.lineno} 行无法在 Python {sys.version_info[0]}.{sys.version_info[1]} 中解析"
+            f"（{e.msg}），需要使用更高版本的 Python 打包")
+
+def collect_files(groups: list) -> tuple:
+    """从入口脚本、handle、services 与各工具分组的注册模块出发，收集需要打包的项目源码
+
+    groups 为 [(分组名, 注册模块)]。分组的源码无法在当前 Python 版本中解析时跳过该分组。
+
+    Returns:
+        (源码路径列表, 打包的分组列表)
+    """
+    roots = list(ENTRY_SCRIPTS)
+    for directory in PACKAGE_DIRS:
+        for name in sorted(os.listdir(os.path.join(_ROOT, directory))):
+            if name.endswith('.py'):
+                roots.append(f'{directory}/{name}')
+    try:
+        files = _collect(roots, set())
+    except SyntaxError as e:
+        raise RuntimeError(_syntax_error(e)) from None
+    packed = []
+    for group in groups:
+        try:
+            files |= _collect([_module_file(group[1])], files)
+        except SyntaxError as e:
+            logger.error(f"工具分组 {group[0]} 已跳过：{_syntax_error(e)}")
+            continue
+        packed.append(group)
+    return sorted(files), packed
+
+def _compile(path: str) -> bytes:
+    """编译为不校验源码的哈希字节码（无需比较修改时间，压缩包内的时间戳精度也不影响）"""
+    import tempfile
+    import py_compile
+    with tempfile.TemporaryDirectory() as directory:
+        cfile = os.path.join(directory, 'module.pyc')
+        py_compile.compile(os.path.join(_ROOT, path), cfile=cfile, dfile=path, doraise=True,
+                           invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        with open(cfile, 'rb') as f:
+            return f.read()
+
+def build(output: str, config: dict, all_groups: bool = False, compress: bool = False) -> dict:
+    """生成打包文件，返回打包信息"""
+    import hashlib
+    import zipfile
+    from handle.tool_manifest import source_hash
+
+    start = time.perf_counter()
+    if all_groups:
+        groups = [(tool_name, register_func.split(':')[0]) for _, register_func, tool_name in _registrations()]
+    else:
+        groups = enabled_groups(config)
+    files, groups = collect_files(groups)
+    group_names = [name for name, _ in groups]
+    info = {
+        'version': config.get('version'),
+        'python': list(sys.version_info[:2]),
+        'built_at': time.time(),
+        'groups': group_names,
+        'modules': len(files),
+        # 工具清单以此区分不同的打包文件（同一份源码打包不同分组时也不同）
+        'source_hash': hashlib.sha256(
+            (source_hash() + json.dumps(group_names, ensure_ascii=False)).encode('utf-8')
+        ).hexdigest(),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    temp_path = f'{output}.{os.getpid()}.tmp'
+    method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(b'#!/usr/bin/env python3\n')
+            with zipfile.ZipFile(f, 'w', compression=method) as archive:
+                archive.writestr('__main__.py', MAIN_TEMPLATE.format(
+                    name=os.path.basename(output), entry_env=ENTRY_ENV, entries=ENTRIES,
+                    python=tuple(sys.version_info[:2]),
+                ))
+                archive.writestr(BUNDLE_INFO, json.dumps(info, ensure_ascii=False, indent=2))
+                # 项目包没有 __init__.py（命名空间包），压缩包内须有目录条目才能被导入
+                for directory in sorted({os.path.dirname(path) for path in files} - {''}):
+                    parts = directory.split('/')
+                    for i in range(1, len(parts) + 1):
+                        name = '/'.join(parts[:i]) + '/'
+                        if name not in archive.NameToInfo:
+                            archive.writestr(name, b'')
+                for path in files:
+                    # 同时保留源码：用于异常堆栈显示源码行，以及 Python 版本不一致时的回退
+                    archive.write(os.path.join(_ROOT, path), path)
+                    archive.writestr(path[:-3] + '.pyc', _compile(path))
+        os.replace(temp_path, output)
+    finally:
+        # 生成失败时不留下未完成的临时文件
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    # 配置文件放在打包文件旁边，已存在时不覆盖
+    config_path = os.path.join(os.path.dirname(os.path.abspath(output)), 'config.yaml')
+    if not os.path.exists(config_path):
+        import shutil
+        shutil.copy2(os.path.join(_ROOT, 'config.yaml'), config_path)
+
+    all_utils = sum(1 for base, _, names in os.walk(os.path.join(_ROOT, 'utils'))
+                    if '__pycache__' not in base for name in names if name.endswith('.py'))
+    packed_utils = sum(1 for path in files if path.startswith('utils/'))
+    logger.info(f"已生成打包文件 {output}：{len(files)} 个模块，工具分组 {len(groups)} 个（{'、'.join(group_names)}），"
+                f"工具模块 {packed_utils}/{all_utils} 个，{os.path.getsize(output) / 1024:.0f}KB，"
+                f"耗时 {time.perf_counter() - start:.1f}s")
+    return info
+
+if __name__ == "__main__":
+    import yaml
+    import argparse
+    sys.path.insert(0, _ROOT)
+    from handle.logger import setup_logging
+    setup_logging()
+    parser = argparse.ArgumentParser(description="生成 zipapp 打包文件")
+    parser.add_argument('--output', default=os.path.join(_ROOT, DEFAULT_OUTPUT), help="打包文件路径")
+    parser.add_argument('--config', default=os.path.join(_ROOT, 'config.yaml'), help="决定打包哪些工具分组的配置文件")
+    parser.add_argument('--all-groups', action='store_true', help="打包全部工具分组（之后可在配置中随时启用）")
+    parser.add_argument('--compress', action='store_true', help="压缩打包文件（体积更小，导入稍慢）")
+    args = parser.parse_args()
+    with open(args.config, encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    try:
+        build(args.output, config, args.all_groups, args.compress)
+    except RuntimeError as e:
+        logger.error(f"打包失败：{e}")
+        sys.exit(1)
\ No newline at end of file
@@ -1,44 +1,101 @@
+import os
 import re
 import sys
+import json
+import time
+import site
+import hashlib
 import logging
+import sysconfig
 import subprocess
+from importlib import metadata
 from handle.logger import setup_logging
+from handle.path import get_cache_dir
 from handle.requirements import requirements
 
 logger = setup_logging()
 logger = logging.getLogger('环境检查')
 
-def check_packages():
-    # 将需求字符串转换为列表
-    req_list = [req.strip() for req in requirements.strip().split('\n')]
-    missing_packages = []
-    # 获取已安装的库列表
+try:
+    from packaging.requirements import Requirement, InvalidRequirement
+except ImportError:
+    # packaging 缺失时只检查是否安装，不校验版本
+    Requirement = None
+
+# 环境指纹缓存文件名（位于缓存目录）
+FINGERPRINT_FILE = 'env_check.json'
+
+def _site_packages_dirs() -> list:
+    """当前解释器的第三方库目录"""
+    paths = sysconfig.get_paths()
+    dirs = {paths.get('purelib'), paths.get('platlib')}
+    if site.ENABLE_USER_SITE:
+        dirs.add(site.getusersitepackages())
+    return sorted(d for d in dirs if d and os.path.isdir(d))
+
+def _fingerprint(req_text: str) -> str:
+    """环境指纹：依赖清单 + 解释器路径 + 各第三方库目录的修改时间
+
+    安装、升级或卸载库都会增删 dist-info 目录，使所在目录的修改时间变化。
+    """
+    digest = hashlib.sha256()
+    digest.update(req_text.encode('utf-8'))
+    digest.update(sys.executable.encode('utf-8'))
+    for directory in _site_packages_dirs():
+        digest.update(f'{directory}:{os.stat(directory).st_mtime_ns}'.encode('utf-8'))
+    return digest.hexdigest()
+
+def _fingerprint_path() -> str:
+    return os.path.join(get_cache_dir(), FINGERPRINT_FILE)
+
+def _read_fingerprint():
     try:
-        installed_packages_output = subprocess.check_output([sys.executable, '-m', 'pip', 'list', '--format=freeze'], stderr=subprocess.PIPE)
-        try:
-            installed_packages_output = installed_packages_output.decode('utf-8')
-        except UnicodeDecodeError:
-            installed_packages_output = installed_packages_output.decode('gbk')
-        installed_packages = installed_packages_output.lower().split('\n')
-    except subprocess.CalledProcessError as e:
+        with open(_fingerprint_path(), encoding='utf-8') as f:
+            return json.load(f).get('fingerprint')
+    except (OSError, ValueError):
+        return None
+
+def _write_fingerprint(fingerprint: str):
+    try:
+        with open(_fingerprint_path(), 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'checked_at': time.time()}, f)
+    except OSError as e:
+        logger.warning(f'写入环境检查缓存失败: {e}')
+
+def _is_satisfied(req: str) -> bool:
+    """判断依赖是否已安装且版本符合要求"""
+    if Requirement is None:
+        name = re.split(r'[<>=!~;\[\s]', req, 1)[0]
         try:
-            stderr_text = e.stderr.decode('utf-8')
-        except UnicodeDecodeError:
-            stderr_text = e.stderr.decode('gbk')
-        logger.error(f'获取已安装库列表时出错（返回码 {e.returncode}）: {stderr_text}')
-        installed_packages = []  # 出错时设置为空列表，继续后续检查
-    # 检查每个包是否安装
-    for req in req_list:
-        # 提取包名和版本要求，使用正则表达式正确提取包名
-        package_name = re.split(r'>=|==|<=|<|>|~=', req)[0].strip().lower()
-        # 检查包是否在已安装列表中
-        found = False
-        for installed in installed_packages:
-            if installed.startswith(package_name.lower()):
-                found = True
-                break
-        if not found:
-            missing_packages.append(req)
+            metadata.version(name)
+            return True
+        except metadata.PackageNotFoundError:
+            return False
+    try:
+        requirement = Requirement(req)
+    except InvalidRequirement:
+        logger.warning(f'无法解析依赖 {req}，跳过检查')
+        return True
+    if requirement.marker is not None and not requirement.marker.evaluate():
+        # 不适用于当前平台的依赖
+        return True
+    try:
+        installed = metadata.version(requirement.name)
+    except metadata.PackageNotFoundError:
+        return False
+    return not requirement.specifier or requirement.specifier.contains(installed, prereleases=True)
+
+def check_packages():
+    start = time.perf_counter()
+    # 环境未变化时跳过逐个检查
+    fingerprint = _fingerprint(requirements)
+    if fingerprint == _read_fingerprint():
+        logger.info(f'环境未变化，跳过依赖检查（耗时 {(time.perf_counter() - start) * 1000:.1f}ms）')
+        return
+    # 将需求字符串转换为列表
+    req_list = [req.strip() for req in requirements.strip().split('\n') if req.strip()]
+    missing_packages = [req for req in req_list if not _is_satisfied(req)]
+    failed = False
     if missing_packages:
         for package in missing_packages:
             logger.info(f'发现缺失的库 {package}，正在安装...')
@@ -47,5 +104,10 @@ def check_packages():
                 logger.info(f'{package} 安装成功')
             except subprocess.CalledProcessError:
                 logger.error(f'{package} 安装失败')
+                failed = True
     else:
-        logger.info('所有环境都已安装')
\ No newline at end of file
+        logger.info('所有环境都已安装')
+    # 有库安装失败时不写缓存，下次启动重新检查
+    if not failed:
+        _write_fingerprint(_fingerprint(requirements))
+    logger.info(f'依赖检查完成（耗时 {(time.perf_counter() - start) * 1000:.1f}ms）')
\ No newline at end of file
@@ -40,6 +40,12 @@ LEVEL_COLORS = {
 # Logger 名称颜色映射（所有logger名称显示为蓝色）
 LOGGER_COLOR = BLUE
 
+# 按字段着色的格式与时间格式（与 setup_logging 一致），其他格式仍按正则解析格式化结果
+FIELD_FORMAT = '%(asctime)s - %(name)s：%(levelname)s，%(message)s'
+FIELD_DATEFMT = '%Y-%m-%d %H:%M:%S'
+# 名称前缀缓存的最大数量，超出时清空
+NAME_CACHE_SIZE = 1024
+
 class ColoredFormatter(logging.Formatter):
     """分段着色日志格式化器
 
@@ -52,13 +58,74 @@ class ColoredFormatter(logging.Formatter):
         - 分隔符 "："（第一个）：白色
         - 第一个 ： 到第二个 ： 之间的内容（级别名+消息）：按级别着色
         - 分隔符 "："（第二个）及之后的内容：白色
+
+    使用上述格式时直接按 LogRecord 的字段着色（级别前缀、名称前缀预先生成并缓存），
+    不再格式化后用正则拆分，耗时不随消息长度增长；输出与按正则拆分的结果逐字节相同。
     """
 
     def __init__(self, fmt=None, datefmt=None):
         super().__init__(fmt, datefmt)
         self._reset = RESET
+        self._by_fields = fmt == FIELD_FORMAT and datefmt == FIELD_DATEFMT
+        # 级别名 -> (级别颜色 + 级别名 + "，", 第二个分隔符之后内容的颜色)
+        self._level_prefixes = {
+            level_name: (f"{color}{level_name}，", color if level_name != '信息' else WHITE)
+            for level_name, color in LEVEL_COLORS.items()
+        }
+        # logger 名称 -> " - 名称：" 着色后的片段
+        self._name_parts = {}
+        # 同一秒内的日志共用格式化后的时间：(秒, 着色后的时间)
+        self._time_part = (None, '')
 
     def format(self, record):
+        if not self._by_fields:
+            return self._format_by_regex(record)
+        level = self._level_prefixes.get(record.levelname)
+        name_part = self._name_parts.get(record.name)
+        if name_part is None:
+            if not record.name or '：' in record.name:
+                # 名称为空或含全角冒号时，按正则拆分的结果与字段不一致，保持原有行为
+                return self._format_by_regex(record)
+            if len(self._name_parts) >= NAME_CACHE_SIZE:
+                self._name_parts.clear()
+            name_part = f"{WHITE} - {RESET}{LOGGER_COLOR}{record.name}{RESET}{WHITE}：{RESET}"
+            self._name_parts[record.name] = name_part
+
+        # 与 logging.Formatter.format 相同：设置 message、asctime，附加异常与调用栈
+        record.message = record.getMessage()
+        second = int(record.created)
+        cached_second, time_part = self._time_part
+        if second != cached_second:
+            record.asctime = self.formatTime(record, self.datefmt)
+            time_part = f"{WHITE}{record.asctime}{RESET}"
+            self._time_part = (second, time_part)
+        else:
+            record.asctime = time_part[len(WHITE):-len(RESET)]
+        body = record.message
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            if body[-1:] != "\n":
+                body = body + "\n"
+            body = body + record.exc_text
+        if record.stack_info:
+            if body[-1:] != "\n":
+                body = body + "\n"
+            body = body + self.formatStack(record.stack_info)
+
+        if level is None:
+            # 未着色的级别（如 DEBUG）原样输出
+            return f"{record.asctime} - {record.name}：{record.levelname}，{body}"
+        level_prefix, after_color = level
+        # 第二个分隔符：消息中最后一个全角或半角冒号（不能是消息的第一个字符）
+        split = max(body.rfind('：'), body.rfind(':'))
+        if split < 1:
+            return f"{time_part}{name_part}{level_prefix}{body}{RESET}"
+        return (f"{time_part}{name_part}{level_prefix}{body[:split]}{RESET}"
+                f"{WHITE}{body[split]}{RESET}{after_color}{body[split + 1:]}{RESET}")
+
+    def _format_by_regex(self, record):
+        """格式化后用正则拆分各部分再着色（自定义格式时使用）"""
         raw_msg = super().format(record)
 
         # 解析格式：时间 - 名称：级别，消息  [分隔符 后续]
@@ -0,0 +1,67 @@
+import sys
+import logging
+import importlib.util
+import importlib.machinery
+
+logger = logging.getLogger('延迟导入')
+
+# 工具实现依赖的重量级第三方库
+# 工具模块在注册阶段只需要函数签名与文档字符串，这些库等到工具第一次被调用时才真正加载
+# 只匹配完整模块名：子模块需要单独列出，且使用处须写成 import a.b 而不是 from a import b
+LAZY_MODULES = frozenset({
+    'pyautogui',
+    'pyperclip',
+    'xlsxwriter',
+    'docx',
+    'wxauto',
+    'getmac',
+    'PIL.Image',
+    'PIL.ImageGrab',
+    'ruamel.yaml',
+    'win32con',
+})
+# 后台线程也会使用的库：
+#   requests            版本检查线程
+#   psutil              音乐播放的播放与清理线程
+#   pycaw.pycaw、comtypes 音乐播放的状态监控线程
+# LazyLoader 在 Python 3.13 之前（3.12 为 3.12.3 之前）不是线程安全的：首次访问属性时无锁执行模块代码，
+# 两个线程同时首次访问会重复执行或读到未初始化完的模块，这些库只在之后的版本中延迟加载
+THREADED_MODULES = frozenset({
+    'requests',
+    'psutil',
+    'pycaw.pycaw',
+    'comtypes',
+})
+if sys.version_info >= (3, 12, 3):
+    LAZY_MODULES |= THREADED_MODULES
+
+class _LazyFinder:
+    """把 LAZY_MODULES 中的模块交给 LazyLoader：import 语句只创建模块对象，首次访问属性时才执行模块代码"""
+
+    @classmethod
+    def find_spec(cls, name, path=None, target=None):
+        if name not in LAZY_MODULES:
+            return None
+        for finder in sys.meta_path:
+            if finder is cls or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        # 扩展模块（.pyd/.so）在创建模块对象时就已完成加载，延迟没有意义
+        loader = spec.loader
+        if isinstance(loader, importlib.machinery.ExtensionFileLoader) or not hasattr(loader, 'exec_module'):
+            return spec
+        spec.loader = importlib.util.LazyLoader(loader)
+        return spec
+
+def enable_lazy_imports():
+    """安装延迟导入钩子，须在导入工具模块之前调用"""
+    if _LazyFinder in sys.meta_path:
+        return
+    sys.meta_path.insert(0, _LazyFinder)
+    already = sorted(name for name in LAZY_MODULES if name in sys.modules)
+    if already:
+        logger.debug(f"以下模块已提前导入，不会延迟加载: {', '.join(already)}")
\ No newline at end of file
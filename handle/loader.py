@@ -1,33 +1,89 @@
 import os
 import yaml
+import atexit
+import logging
 import platform
+import threading
+import functools
 from handle.path import get_config_path
 
-_config_cache = None
-_config_mtime = None
+logger = logging.getLogger('配置加载')
 
-def _read_config():
-    """实际读取配置文件并注入派生字段"""
-    config_path = get_config_path()
-    if not os.path.exists(config_path):
-        raise FileNotFoundError(f"没有找到配置文件: {config_path}")
+# 当前配置快照：只读，整体替换，读取方无需加锁
+_snapshot = None
+_snapshot_mtime = None
+# 监听线程运行中时，load_config 直接返回快照，不再检查文件修改时间
+_watching = False
+_watch_thread = None
+_watch_lock = threading.Lock()
+_watch_stop = threading.Event()
+# 配置变化回调：快照内容变化后调用 callback(新快照)
+_listeners = []
 
-    with open(config_path, encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+class FrozenDict(dict):
+    """只读字典：配置快照在多个线程之间共享，禁止原地修改"""
 
-    version = config.get('version', 'unknown')
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("配置快照是只读的，请复制后再修改，如 dict(config)")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+class FrozenList(list):
+    """只读列表，与 FrozenDict 配合使用"""
 
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("配置快照是只读的，请复制后再修改，如 list(config[...])")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(_freeze(item) for item in value)
+    return value
+
+@functools.lru_cache(maxsize=None)
+def _system_info() -> str:
+    """系统信息在进程内不会变化，只获取一次"""
     system = platform.system()
     architecture = platform.architecture()[0]
     if system == 'Windows':
         win32_ver = platform.win32_ver()
         nt_version = win32_ver[1]
         arch_str = 'x64' if architecture == '64bit' else 'x32'
-        system_info = f"Windows NT {nt_version}; {arch_str}"
-    else:
-        system_info = platform.platform()
+        return f"Windows NT {nt_version}; {arch_str}"
+    return platform.platform()
+
+def _read_config():
+    """实际读取配置文件并注入派生字段，返回只读快照"""
+    config_path = get_config_path()
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f"没有找到配置文件: {config_path}")
 
-    endpoint_url = config.get('endpoint', {}).get('url', '')
+    with open(config_path, encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    version = config.get('version', 'unknown')
+    system_info = _system_info()
+
+    # token 与 API 域名取自第一个端点
+    endpoint_urls = get_endpoint_urls(config)
+    endpoint_url = endpoint_urls[0] if endpoint_urls else ''
     token = ""
     ai_api_base = ""
     if 'token=' in endpoint_url:
@@ -42,32 +98,131 @@ def _read_config():
     config['token'] = token
     config['ai_api_base'] = ai_api_base
     config['user_agent'] = f"mcp_control_the_computer/{version}({system_info})"
-    return config
+    return _freeze(config)
 
-def load_config():
-    """配置加载器（带修改时间校验的缓存）"""
-    global _config_cache, _config_mtime
+def get_endpoint_urls(config: dict) -> list:
+    """获取配置的所有 WebSocket 端点地址（endpoint.url 与 endpoint.urls 合并去重）"""
+    endpoint = config.get('endpoint') or {}
+    if not isinstance(endpoint, dict):
+        return []
+    urls = []
+    for url in [endpoint.get('url')] + list(endpoint.get('urls') or []):
+        if isinstance(url, str) and url and url not in urls:
+            urls.append(url)
+    return urls
 
-    config_path = get_config_path()
+def _config_mtime():
     try:
-        current_mtime = os.path.getmtime(config_path)
+        return os.path.getmtime(get_config_path())
     except OSError:
-        _config_cache = _read_config()
-        _config_mtime = 0
-        return _config_cache
+        return 0
+
+def _swap(snapshot, mtime):
+    # 单次赋值即完成替换，读取方拿到的要么是旧快照要么是新快照
+    global _snapshot, _snapshot_mtime
+    previous = _snapshot
+    _snapshot_mtime = mtime
+    _snapshot = snapshot
+    if previous is not None and previous != snapshot:
+        for callback in list(_listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.warning(f"配置变化回调执行失败: {e}")
+    return snapshot
+
+def add_config_listener(callback):
+    """注册配置变化回调，在替换快照的线程中调用（通常是监听线程），回调须尽快返回"""
+    _listeners.append(callback)
 
-    if _config_cache is not None and _config_mtime == current_mtime:
-        return _config_cache
+def remove_config_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
 
-    _config_cache = _read_config()
-    _config_mtime = current_mtime
-    return _config_cache
+def _load_by_mtime():
+    """未启用监听时的回退方式：每次调用检查文件修改时间"""
+    mtime = _config_mtime()
+    if _snapshot is not None and mtime and _snapshot_mtime == mtime:
+        return _snapshot
+    return _swap(_read_config(), mtime)
+
+def _refresh():
+    """监听线程中重新读取配置；配置文件写到一半或格式错误时保留旧快照"""
+    mtime = _config_mtime()
+    if mtime and mtime == _snapshot_mtime:
+        return
+    try:
+        snapshot = _read_config()
+    except Exception as e:
+        logger.warning(f"重新加载配置文件失败，继续使用原配置: {e}")
+        return
+    logger.info("配置文件已修改，已重新加载")
+    _swap(snapshot, mtime)
+
+def _watch_config(config_path: str):
+    global _watching
+    import watchfiles
+    # watchfiles 每次检测到变化都会输出英文日志，由本模块输出中文日志代替
+    logging.getLogger('watchfiles').setLevel(logging.WARNING)
+    target = os.path.normcase(os.path.abspath(config_path))
+
+    def _is_config(change, path):
+        return os.path.normcase(os.path.abspath(path)) == target
+
+    try:
+        # 只监听配置文件所在目录本身（不含 log、cache 等子目录），编辑器先写临时文件再改名也能捕获
+        for changes in watchfiles.watch(os.path.dirname(target), watch_filter=_is_config,
+                                        recursive=False, debounce=200, rust_timeout=5000,
+                                        yield_on_timeout=True, stop_event=_watch_stop):
+            if not _watching:
+                # 首次返回说明监听已就绪，补查一次启动期间发生的修改
+                _watching = True
+                _refresh()
+            elif changes:
+                _refresh()
+    except Exception as e:
+        logger.warning(f"配置文件监听已停止，改为按修改时间检查: {e}")
+    finally:
+        _watching = False
+
+def start_config_watcher():
+    """启动配置文件监听线程（每个进程一个）；watchfiles 不可用时保持按修改时间检查"""
+    global _watch_thread
+    with _watch_lock:
+        if _watch_thread is not None:
+            return
+        try:
+            import watchfiles  # noqa: F401
+        except ImportError:
+            logger.info("未安装 watchfiles，配置文件按修改时间检查")
+            _watch_thread = False
+            return
+        _watch_thread = threading.Thread(target=_watch_config, args=(get_config_path(),),
+                                         name='配置监听', daemon=True)
+        _watch_thread.start()
+        atexit.register(_stop_config_watcher)
+
+def _stop_config_watcher():
+    # 解释器退出时先停止监听，避免守护线程在原生代码中被强行终止
+    _watch_stop.set()
+    if _watch_thread:
+        _watch_thread.join(timeout=1)
+
+def load_config():
+    """配置加载器：返回当前只读快照
+
+    监听线程运行时直接返回快照（无文件系统调用），配置文件变化由监听线程整体替换快照；
+    监听未就绪或不可用时按修改时间检查。需要修改时请先复制：dict(load_config())。
+    """
+    snapshot = _snapshot
+    if _watching and snapshot is not None:
+        return snapshot
+    snapshot = _load_by_mtime()
+    if _watch_thread is None and snapshot.get('startup', {}).get('config_watch', True):
+        start_config_watcher()
+    return snapshot
 
 
 def reload_config():
     """强制重新加载配置文件"""
-    global _config_cache, _config_mtime
-    config_path = get_config_path()
-    _config_cache = _read_config()
-    _config_mtime = os.path.getmtime(config_path)
-    return _config_cache
\ No newline at end of file
+    return _swap(_read_config(), _config_mtime())
\ No newline at end of file
@@ -0,0 +1,319 @@
+"""
+日志索引：为 log 目录中的每个分段生成小的索引文件，按时间、日志器名称与级别查询日志时只读取可能匹配的数据块
+
+    python -m handle.log_index --logger 音乐播放 --level 错误 --start 10:00 --end 11:00
+    python -m handle.log_index --date 2026-01-01 --logger 管道代理,管道服务 --contains 重连
+
+索引文件（log/2026-01-01.log.idx）：
+    分段在日志行的开头切分为约 BLOCK_SIZE 的数据块（多行的日志不跨数据块），每个数据块记录偏移、长度、时间范围、出现的日志器名称与级别。
+    偏移为原始（未压缩）数据的偏移，分段压缩前后共用同一个索引；压缩的分段按帧解压，只解压数据块所在的帧。
+    查询时先更新索引：分段增长后只扫描新增的数据（以及上次末尾未满的数据块），分段变小时重新生成。
+不属于任何日志的行（如多行的异常信息）视为上一行日志的一部分。
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from handle.path import get_log_dir
+from handle.log_rotation import INDEX_SUFFIX, ZST_SUFFIX, list_segments, read_seek_table, read_segment
+
+# 索引格式版本，变化后重新生成
+INDEX_VERSION = 2
+# 每个数据块的原始数据大小（在行尾处截断）
+BLOCK_SIZE = 64 * 1024
+# 日志级别（日志文件中的名称）-> 数值，中文化前写入的日志使用英文名称
+LEVELS = {
+    'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50,
+    '信息': 20, '警告': 30, '错误': 40, '严重错误': 50,
+}
+# 查询参数中的级别别名
+LEVEL_ALIASES = {'debug': 'DEBUG', 'info': '信息', 'warning': '警告', 'warn': '警告', 'error': '错误', 'critical': '严重错误'}
+
+# 日志行：'2026-01-01 10:00:00 - 日志器名称：级别，消息'（handle.logger 的格式）
+_LINE = re.compile(
+    (r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) - (.+?)：(' + '|'.join(map(re.escape, LEVELS)) + r')，').encode('utf-8'),
+    re.M
+)
+
+def index_path(path: str) -> str:
+    """分段对应的索引文件路径"""
+    if path.endswith(ZST_SUFFIX):
+        path = path[:-len(ZST_SUFFIX)]
+    return path + INDEX_SUFFIX
+
+def _segment_size(path: str):
+    """分段的原始数据大小；没有帧表的压缩文件无法直接得到，返回 None"""
+    if not path.endswith(ZST_SUFFIX):
+        return os.path.getsize(path)
+    frames = read_seek_table(path)
+    if frames is None:
+        return None
+    return sum(frame[3] for frame in frames)
+
+def _load_index(path: str):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+def _save_index(path: str, index: dict):
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, path)
+    except OSError:
+        # 日志目录只读等情况下仍可使用内存中的索引
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+def _new_index() -> dict:
+    return {'version': INDEX_VERSION, 'size': 0, 'names': [], 'levels': [], 'blocks': []}
+
+def _add_block(index: dict, ids: dict, offset: int, data: bytes):
+    """为一个数据块（完整的若干条日志）生成索引项：[偏移, 长度, 最早时间, 最晚时间, 日志器编号, 级别编号]"""
+    records = _LINE.findall(data)
+    block = [offset, len(data), None, None, [], []]
+    if records:
+        times = [record[0] for record in records]
+        block[2], block[3] = min(times).decode('ascii'), max(times).decode('ascii')
+        for position, key, column in ((4, 'names', 1), (5, 'levels', 2)):
+            values = {record[column] for record in records}
+            table = ids[key]
+            for value in values:
+                if value not in table:
+                    table[value] = len(index[key])
+                    index[key].append(value.decode('utf-8', 'replace'))
+            block[position] = sorted(table[value] for value in values)
+    index['blocks'].append(block)
+
+def update_index(path: str, rebuild: bool = False) -> dict:
+    """更新并返回分段的索引：只扫描上次索引之后新增的数据，分段变小时重新生成"""
+    idx_path = index_path(path)
+    size = _segment_size(path)
+    index = None if rebuild else _load_index(idx_path)
+    if index is not None and (size is None or size == index['size']):
+        return index
+    if index is None or size < index['size']:
+        index = _new_index()
+    # 末尾未满的数据块重新扫描，使数据块保持在 BLOCK_SIZE 左右
+    blocks = index['blocks']
+    if blocks and blocks[-1][1] < BLOCK_SIZE:
+        blocks.pop()
+    start = blocks[-1][0] + blocks[-1][1] if blocks else 0
+    ids = {key: {value.encode('utf-8'): i for i, value in enumerate(index[key])} for key in ('names', 'levels')}
+
+    pending, pending_offset = b'', start
+    for offset, data in read_segment(path, start):
+        if offset < start:
+            data = data[start - offset:]
+        pending += data
+        position = 0
+        while len(pending) - position > BLOCK_SIZE:
+            # 在下一条日志的开头切分，异常信息等后续行与所属的日志在同一个数据块中
+            record = _LINE.search(pending, position + BLOCK_SIZE)
+            if record is None:
+                break
+            _add_block(index, ids, pending_offset + position, pending[position:record.start()])
+            position = record.start()
+        pending, pending_offset = pending[position:], pending_offset + position
+    # 未压缩的分段可能仍在写入，最后一行不完整时留到下次更新；压缩的分段已写完，全部加入索引
+    end = len(pending) - 1 if path.endswith(ZST_SUFFIX) else pending.rfind(b'\n')
+    if end >= 0:
+        _add_block(index, ids, pending_offset, pending[:end + 1])
+        pending_offset += end + 1
+    index['size'] = pending_offset
+    _save_index(idx_path, index)
+    return index
+
+class _SegmentReader:
+    """按原始数据偏移读取分段，压缩的分段缓存最近解压的帧"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.compressed = path.endswith(ZST_SUFFIX)
+        self.frames = read_seek_table(path) if self.compressed else None
+        self._file = open(path, 'rb')
+        self._cache = (None, b'')
+        self._data = None
+        self.bytes_read = 0
+
+    def close(self):
+        self._file.close()
+
+    def _frame(self, i: int) -> bytes:
+        if self._cache[0] != i:
+            import zstandard
+            compressed_offset, _, compressed_size, size = self.frames[i]
+            self._file.seek(compressed_offset)
+            data = self._file.read(compressed_size)
+            self.bytes_read += len(data)
+            self._cache = (i, zstandard.ZstdDecompressor().decompress(data, max_output_size=size))
+        return self._cache[1]
+
+    def read(self, offset: int, length: int) -> bytes:
+        if not self.compressed:
+            self._file.seek(offset)
+            data = self._file.read(length)
+            self.bytes_read += len(data)
+            return data
+        if self.frames is None:
+            # 没有帧表的压缩文件只能整体解压
+            if self._data is None:
+                self._data = b''.join(data for _, data in read_segment(self.path))
+                self.bytes_read += os.path.getsize(self.path)
+            return self._data[offset:offset + length]
+        parts = []
+        for i, (_, frame_offset, _, size) in enumerate(self.frames):
+            if frame_offset + size <= offset:
+                continue
+            if frame_offset >= offset + length:
+                break
+            data = self._frame(i)
+            parts.append(data[max(0, offset - frame_offset):offset + length - frame_offset])
+        return b''.join(parts)
+
+def parse_time(text: str, end: bool = False, day: str = None):
+    """查询时间：'HH:MM[:SS]'（day 或当天）、'YYYY-MM-DD' 或 'YYYY-MM-DD HH:MM[:SS]'，结束时间包含在内"""
+    if not text:
+        return None
+    text = text.strip().replace('T', ' ')
+    day = day or datetime.now().strftime('%Y-%m-%d')
+    if re.fullmatch(r'\d{1,2}:\d{2}(:\d{2})?', text):
+        text = f'{day} {text}'
+    formats = (('%Y-%m-%d %H:%M:%S', '', ''), ('%Y-%m-%d %H:%M', ':00', ':59'), ('%Y-%m-%d', ' 00:00:00', ' 23:59:59'))
+    for fmt, start_suffix, end_suffix in formats:
+        try:
+            value = datetime.strptime(text, fmt).strftime(fmt)
+        except ValueError:
+            continue
+        return value + (end_suffix if end else start_suffix)
+    raise ValueError(f"无法识别的时间：{text}")
+
+def parse_level(text: str):
+    """最低级别：中文或英文级别名称，返回数值"""
+    if not text:
+        return None
+    name = LEVEL_ALIASES.get(text.strip().lower(), text.strip())
+    if name not in LEVELS:
+        raise ValueError(f"无法识别的日志级别：{text}，可选：{'、'.join(dict.fromkeys(LEVEL_ALIASES.values()))}")
+    return LEVELS[name]
+
+def query(log_dir: str = 'log', start: str = None, end: str = None, loggers=None, level=None,
+          contains: str = None, stats: dict = None):
+    """按时间范围（start、end 为 parse_time 的结果）、日志器名称、最低级别与关键字查询日志，按时间顺序逐行返回
+
+    stats 不为 None 时记录查询的分段数、数据块数与实际读取的字节数。
+    """
+    loggers = set(loggers or ())
+    min_level = parse_level(level) if isinstance(level, str) else level
+    keyword = contains.encode('utf-8') if contains else None
+    start_bytes = start.encode('ascii') if start else None
+    end_bytes = end.encode('ascii') if end else None
+    filtered = bool(start or end or loggers or min_level is not None)
+    # 逐行筛选时直接比较字节
+    name_bytes = {name.encode('utf-8') for name in loggers}
+    level_bytes = {name.encode('utf-8') for name, value in LEVELS.items() if min_level is None or value >= min_level}
+    if stats is not None:
+        stats.update(segments=0, blocks=0, candidates=0, bytes_read=0)
+    for segment in list_segments(log_dir):
+        if (start and segment.day < start[:10]) or (end and segment.day > end[:10]):
+            continue
+        index = update_index(segment.path)
+        name_ids = {i for i, name in enumerate(index['names']) if name in loggers}
+        level_ids = {i for i, name in enumerate(index['levels'])
+                     if min_level is None or LEVELS.get(name, 0) >= min_level}
+        if (loggers and not name_ids) or not level_ids:
+            if stats is not None:
+                stats['segments'] += 1
+                stats['blocks'] += len(index['blocks'])
+            continue
+        candidates = []
+        for offset, length, first, last, names, levels in index['blocks']:
+            # 没有任何日志行的数据块无法判断，直接读取
+            if first is not None:
+                if (start and last < start) or (end and first > end):
+                    continue
+                if loggers and name_ids.isdisjoint(names):
+                    continue
+                if level_ids.isdisjoint(levels):
+                    continue
+            candidates.append((offset, length))
+        if stats is not None:
+            stats['segments'] += 1
+            stats['blocks'] += len(index['blocks'])
+            stats['candidates'] += len(candidates)
+        if not candidates:
+            continue
+        reader = _SegmentReader(segment.path)
+        try:
+            for offset, length in candidates:
+                data = reader.read(offset, length)
+                if keyword is not None and keyword not in data:
+                    continue
+                # 不属于任何日志的行跟随上一行日志
+                matched = not filtered
+                for line in data.splitlines():
+                    record = _LINE.match(line)
+                    if record:
+                        time_, name, level_name = record.groups()
+                        matched = (
+                            (not start_bytes or time_ >= start_bytes) and (not end_bytes or time_ <= end_bytes)
+                            and (not name_bytes or name in name_bytes) and level_name in level_bytes
+                        )
+                    if matched and (keyword is None or keyword in line):
+                        yield line.decode('utf-8', 'replace')
+        finally:
+            if stats is not None:
+                stats['bytes_read'] += reader.bytes_read
+            reader.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="按时间、日志器名称与级别查询日志（使用索引，只读取可能匹配的数据块）")
+    parser.add_argument('--dir', help="日志目录，默认为配置文件所在目录下的 log")
+    parser.add_argument('--logger', help="日志器名称，多个用逗号分隔，例如 音乐播放,管道代理")
+    parser.add_argument('--level', help="最低级别：信息、警告、错误、严重错误（或 info、warning、error、critical）")
+    parser.add_argument('--start', help="开始时间：HH:MM[:SS]、YYYY-MM-DD 或 YYYY-MM-DD HH:MM[:SS]")
+    parser.add_argument('--end', help="结束时间（包含），格式同开始时间")
+    parser.add_argument('--date', help="只写时刻时使用的日期（YYYY-MM-DD），默认为当天")
+    parser.add_argument('--contains', help="日志中包含的文字")
+    parser.add_argument('--limit', type=int, default=0, help="最多输出多少行（最新的），0 表示不限制")
+    parser.add_argument('--rebuild', action='store_true', help="重新生成全部索引")
+    parser.add_argument('--stats', action='store_true', help="输出读取的数据块数与字节数")
+    args = parser.parse_args()
+
+    try:
+        start = parse_time(args.start or args.date, day=args.date)
+        end = parse_time(args.end or args.date, end=True, day=args.date)
+        parse_level(args.level)
+    except ValueError as e:
+        parser.error(str(e))
+    if not args.dir:
+        args.dir = get_log_dir()
+    if args.rebuild:
+        for segment in list_segments(args.dir):
+            update_index(segment.path, rebuild=True)
+    loggers = [name.strip() for name in args.logger.split(',') if name.strip()] if args.logger else None
+    stats = {}
+    lines = query(args.dir, start, end, loggers, args.level, args.contains, stats)
+    if args.limit > 0:
+        from collections import deque
+        lines = deque(lines, maxlen=args.limit)
+    for line in lines:
+        print(line)
+    if args.stats:
+        print(f"分段 {stats['segments']} 个，数据块 {stats['candidates']}/{stats['blocks']} 个，"
+              f"读取 {stats['bytes_read'] / 1024:.1f}KB", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
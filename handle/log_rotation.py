@@ -0,0 +1,386 @@
+"""
+日志轮转：按天与文件大小切换日志文件，写完的分段由后台线程用 zstd 压缩，并按总大小与保留天数清理 log 目录中的分段
+
+日志文件：
+    log/2026-01-01.log        当天第一个分段
+    log/2026-01-01.1.log      超出大小上限后的下一个分段，依次编号
+    log/2026-01-01.log.zst    压缩后的分段（zstd 可寻址格式，可直接用 zstd -d 解压）
+管道与注册进程写入同一个日志文件，各自判断是否切换：当天最后一个分段未超出上限时继续写入，否则写入下一个编号。
+分段属于之前的日期或已有更新的分段、且一段时间内没有写入时才视为写完，之后才会被压缩或清理。
+"""
+
+import os
+import re
+import time
+import atexit
+import struct
+import logging
+import threading
+from datetime import datetime, timedelta
+from collections import namedtuple
+
+logger = logging.getLogger('日志轮转')
+
+LOG_SUFFIX = '.log'
+ZST_SUFFIX = '.zst'
+# 分段的索引文件（handle.log_index）：未压缩的分段路径 + .idx，压缩前后通用
+INDEX_SUFFIX = '.idx'
+# 分段文件名：日期[.编号].log[.zst]
+_SEGMENT = re.compile(r'^(\d{4}-\d{2}-\d{2})(?:\.(\d+))?\.log(\.zst)?$')
+# 分段最后一次写入后多久视为写完（秒），避免压缩其他进程仍在写入的分段
+CLOSE_DELAY = 60
+# 后台线程定期检查的间隔（秒），切换分段时立即检查
+ARCHIVE_INTERVAL = 600
+# 压缩时每个 zstd 帧包含的原始数据大小（在行尾处截断），按帧解压即可从分段中间开始读取
+FRAME_SIZE = 1024 * 1024
+# zstd 可寻址格式（seekable format）：末尾的跳过帧保存每个帧的压缩前后大小
+_SKIPPABLE_MAGIC = 0x184D2A5E
+_SEEKABLE_MAGIC = 0x8F92EAB1
+_SEEK_FOOTER = struct.Struct('<IBI')
+
+Segment = namedtuple('Segment', 'day index path compressed')
+
+def segment_path(log_dir: str, day: str, index: int = 0) -> str:
+    """分段的日志文件路径（未压缩）"""
+    name = f'{day}{LOG_SUFFIX}' if not index else f'{day}.{index}{LOG_SUFFIX}'
+    return os.path.join(log_dir, name)
+
+def list_segments(log_dir: str) -> list:
+    """log 目录中的全部分段，按时间顺序排列；同一分段的压缩与未压缩文件同时存在时（压缩后删除原文件失败）只返回未压缩的文件"""
+    segments = {}
+    try:
+        names = os.listdir(log_dir)
+    except OSError:
+        return []
+    for name in names:
+        match = _SEGMENT.match(name)
+        if not match:
+            continue
+        key = (match.group(1), int(match.group(2) or 0))
+        compressed = bool(match.group(3))
+        if key in segments and compressed:
+            continue
+        segments[key] = Segment(key[0], key[1], os.path.join(log_dir, name), compressed)
+    return [segments[key] for key in sorted(segments)]
+
+def _next_midnight(timestamp: float) -> float:
+    day = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+class RotatingLogHandler(logging.FileHandler):
+    """按天与文件大小切换分段的日志文件处理器"""
+
+    def __init__(self, log_dir: str, max_bytes: int = 0, encoding: str = 'utf-8', on_rollover=None):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.on_rollover = on_rollover
+        now = time.time()
+        super().__init__(self._current_segment(datetime.fromtimestamp(now).strftime('%Y-%m-%d')), encoding=encoding)
+        self._rollover_at = _next_midnight(now)
+
+    def _current_segment(self, day: str) -> str:
+        """当天最后一个分段；已压缩或已超出大小上限时使用下一个编号"""
+        index = max((s.index for s in list_segments(self.log_dir) if s.day == day), default=0)
+        path = segment_path(self.log_dir, day, index)
+        if os.path.exists(path + ZST_SUFFIX) or (
+                self.max_bytes and os.path.exists(path) and os.path.getsize(path) >= self.max_bytes):
+            path = segment_path(self.log_dir, day, index + 1)
+        return path
+
+    def _size_exceeded(self) -> bool:
+        # 按文件实际大小判断（含其他进程写入的内容）
+        try:
+            return os.fstat(self.stream.fileno()).st_size >= self.max_bytes
+        except (OSError, ValueError):
+            return False
+
+    def emit(self, record):
+        if record.created >= self._rollover_at or (self.max_bytes and self.stream and self._size_exceeded()):
+            try:
+                self.rollover(record.created)
+            except Exception:
+                self.handleError(record)
+        super().emit(record)
+
+    def rollover(self, timestamp: float):
+        """切换到日志时间所在日期的当前分段"""
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        day = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+        self.baseFilename = os.path.abspath(self._current_segment(day))
+        self.stream = self._open()
+        self._rollover_at = _next_midnight(timestamp)
+        if self.on_rollover is not None:
+            self.on_rollover()
+
+def read_seek_table(path: str):
+    """读取可寻址格式的帧表：[(压缩数据偏移, 原始数据偏移, 压缩大小, 原始大小)]，没有帧表时返回 None"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size < _SEEK_FOOTER.size:
+            return None
+        f.seek(size - _SEEK_FOOTER.size)
+        count, descriptor, magic = _SEEK_FOOTER.unpack(f.read(_SEEK_FOOTER.size))
+        entry_size = 12 if descriptor & 0x80 else 8
+        table_size = 8 + count * entry_size + _SEEK_FOOTER.size
+        if magic != _SEEKABLE_MAGIC or table_size > size:
+            return None
+        f.seek(size - table_size)
+        header = f.read(8)
+        if struct.unpack('<II', header) != (_SKIPPABLE_MAGIC, table_size - 8):
+            return None
+        data = f.read(count * entry_size)
+    frames, compressed_offset, offset = [], 0, 0
+    for i in range(count):
+        compressed_size, size = struct.unpack_from('<II', data, i * entry_size)
+        frames.append((compressed_offset, offset, compressed_size, size))
+        compressed_offset += compressed_size
+        offset += size
+    return frames
+
+def read_segment(path: str, start: int = 0):
+    """从原始数据偏移 start 处开始读取分段，依次返回 (块的原始数据偏移, 数据)
+
+    未压缩的分段从 start 处按 FRAME_SIZE 分块读取；压缩的分段从 start 所在的帧开始逐帧解压。
+    """
+    if not path.endswith(ZST_SUFFIX):
+        with open(path, 'rb') as f:
+            f.seek(start)
+            while True:
+                offset = f.tell()
+                data = f.read(FRAME_SIZE)
+                if not data:
+                    return
+                yield offset, data
+    import zstandard
+    frames = read_seek_table(path)
+    decompressor = zstandard.ZstdDecompressor()
+    with open(path, 'rb') as f:
+        if frames is None:
+            # 其他工具生成的压缩文件：没有帧表，从头解压
+            offset = 0
+            with decompressor.stream_reader(f) as reader:
+                while True:
+                    data = reader.read(FRAME_SIZE)
+                    if not data:
+                        return
+                    if offset + len(data) > start:
+                        yield offset, data
+                    offset += len(data)
+        for compressed_offset, offset, compressed_size, size in frames:
+            if offset + size <= start:
+                continue
+            f.seek(compressed_offset)
+            yield offset, decompressor.decompress(f.read(compressed_size), max_output_size=size)
+
+def compress_segment(path: str, level: int, stop_event: threading.Event = None) -> bool:
+    """把分段压缩为 zstd 可寻址格式并删除原文件，中途停止时返回 False"""
+    import zstandard
+    compressor = zstandard.ZstdCompressor(level=level, write_checksum=True)
+    target = path + ZST_SUFFIX
+    temp_path = f'{target}.{os.getpid()}.tmp'
+    entries = []
+    try:
+        with open(path, 'rb') as src, open(temp_path, 'wb') as dst:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                # 每帧在行尾处截断，帧内不会只有半行日志
+                data = src.read(FRAME_SIZE)
+                if not data:
+                    break
+                if not data.endswith(b'\n'):
+                    data += src.readline()
+                frame = compressor.compress(data)
+                dst.write(frame)
+                entries.append((len(frame), len(data)))
+            table = b''.join(struct.pack('<II', *entry) for entry in entries)
+            dst.write(struct.pack('<II', _SKIPPABLE_MAGIC, len(table) + _SEEK_FOOTER.size))
+            dst.write(table)
+            dst.write(_SEEK_FOOTER.pack(len(entries), 0, _SEEKABLE_MAGIC))
+        # 压缩期间分段又被写入（其他进程尚未切换）时放弃，下次再压缩
+        stat = os.stat(path)
+        if stat.st_size != sum(size for _, size in entries):
+            return False
+        # 保留原文件的修改时间，按保留天数清理时以日志的最后写入时间为准
+        os.utime(temp_path, (stat.st_atime, stat.st_mtime))
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    try:
+        os.remove(path)
+    except OSError as e:
+        # Windows 下其他进程仍打开该文件时无法删除，下次再删除
+        logger.debug(f"删除已压缩的日志失败: {e}")
+    return True
+
+class LogArchiver:
+    """后台压缩写完的分段，并按总大小与保留天数清理 log 目录（每个进程一个线程）"""
+
+    def __init__(self, log_dir: str, compress: bool = True, level: int = 10,
+                 max_total_bytes: int = 0, max_days: int = 0):
+        self.log_dir = log_dir
+        self.compress = compress
+        self.level = level
+        self.max_total_bytes = max_total_bytes
+        self.max_days = max_days
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.compress:
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                logger.info("未安装 zstandard，日志分段不压缩")
+                self.compress = False
+        self._thread = threading.Thread(target=self._run, name='日志压缩', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """切换分段后调用，立即检查"""
+        self._wake.set()
+
+    def stop(self):
+        """停止后台线程（正在压缩的分段保留原文件，下次启动再压缩）"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.maintain()
+            except Exception as e:
+                logger.warning(f"日志压缩与清理失败: {e}")
+            self._wake.wait(ARCHIVE_INTERVAL)
+            self._wake.clear()
+            # 等待刚切换的分段不再有写入
+            self._stop.wait(CLOSE_DELAY + 1)
+
+    def _closed_segments(self) -> list:
+        """已写完的未压缩分段：日期早于当天最后一个分段，且一段时间内没有写入"""
+        segments = list_segments(self.log_dir)
+        latest = max(((s.day, s.index) for s in segments), default=None)
+        now = time.time()
+        closed = []
+        for segment in segments:
+            if segment.compressed or (segment.day, segment.index) == latest:
+                continue
+            try:
+                if now - os.path.getmtime(segment.path) >= CLOSE_DELAY:
+                    closed.append(segment)
+            except OSError:
+                pass
+        return closed
+
+    def maintain(self):
+        """压缩写完的分段，再按保留天数与总大小删除最早的文件"""
+        if self.compress:
+            for segment in self._closed_segments():
+                if self._stop.is_set():
+                    return
+                size = os.path.getsize(segment.path)
+                start = time.perf_counter()
+                if compress_segment(segment.path, self.level, self._stop):
+                    compressed = os.path.getsize(segment.path + ZST_SUFFIX)
+                    logger.info(f"已压缩日志 {os.path.basename(segment.path)}：{size / 1024:.0f}KB -> "
+                                f"{compressed / 1024:.0f}KB，耗时 {time.perf_counter() - start:.1f}s")
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        if not self.max_total_bytes and not self.max_days:
+            return
+        segments = list_segments(self.log_dir)
+        latest = max(((s.day, s.index) for s in segments), default=None)
+        active = {os.path.normcase(segment_path(self.log_dir, *latest))} if latest else set()
+        now = time.time()
+        files, total = [], 0
+        for name in os.listdir(self.log_dir):
+            # 只统计与清理分段（含压缩文件）及其索引，log 目录中的其他文件（如启动耗时记录）不受影响
+            base = name[:-len(INDEX_SUFFIX)] if name.endswith(INDEX_SUFFIX) else name
+            if not _SEGMENT.match(base):
+                continue
+            path = os.path.join(self.log_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not os.path.isfile(path):
+                continue
+            total += stat.st_size
+            # 正在写入的分段不删除
+            if os.path.normcase(path) in active or now - stat.st_mtime < CLOSE_DELAY:
+                continue
+            if name.endswith(INDEX_SUFFIX):
+                # 索引随分段一起删除；分段已不存在的索引直接删除
+                base = path[:-len(INDEX_SUFFIX)]
+                if os.path.exists(base) or os.path.exists(base + ZST_SUFFIX):
+                    continue
+                files.insert(0, (0, stat.st_size, path))
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        removed, freed = 0, 0
+        for mtime, size, path in files:
+            expired = self.max_days and now - mtime > self.max_days * 86400
+            if mtime and not expired and (not self.max_total_bytes or total <= self.max_total_bytes):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            freed += size
+            size = self._remove_index(path)
+            total -= size
+            freed += size
+        if removed:
+            logger.info(f"已清理 {removed} 个日志文件，释放 {freed / 1024 / 1024:.1f}MB，"
+                        f"log 目录当前 {total / 1024 / 1024:.1f}MB")
+
+    @staticmethod
+    def _remove_index(path: str) -> int:
+        """分段的压缩与未压缩文件都已删除时，删除其索引文件，返回释放的字节数"""
+        if not _SEGMENT.match(os.path.basename(path)):
+            return 0
+        base = path[:-len(ZST_SUFFIX)] if path.endswith(ZST_SUFFIX) else path
+        index_path = base + INDEX_SUFFIX
+        if os.path.exists(base) or os.path.exists(base + ZST_SUFFIX) or not os.path.exists(index_path):
+            return 0
+        try:
+            size = os.path.getsize(index_path)
+            os.remove(index_path)
+        except OSError:
+            return 0
+        return size
+
+# 当前进程的后台压缩线程
+_archiver = None
+
+def start_log_archiver(log_dir: str, options: dict) -> LogArchiver:
+    """按 logging 配置启动（或替换）当前进程的后台压缩线程"""
+    global _archiver
+    if _archiver is not None:
+        _archiver.stop()
+    else:
+        atexit.register(stop_log_archiver)
+    _archiver = LogArchiver(
+        log_dir,
+        compress=bool(options.get('compress', True)),
+        level=int(options.get('compress_level', 10)),
+        max_total_bytes=int(float(options.get('max_total_mb', 0) or 0) * 1024 * 1024),
+        max_days=int(options.get('max_days', 0) or 0),
+    )
+    _archiver.start()
+    return _archiver
+
+def stop_log_archiver():
+    if _archiver is not None:
+        _archiver.stop()
\ No newline at end of file
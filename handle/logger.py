@@ -1,7 +1,27 @@
-import os
+import time
+import queue
+import atexit
+import threading
 import logging
-from datetime import datetime
+import logging.handlers
+from handle.path import get_log_dir
 from handle.color_formatter import ColoredFormatter
+from handle.log_rotation import RotatingLogHandler, start_log_archiver
+
+# 日志队列与日志文件的默认配置（config.yaml 的 logging 段）
+LOGGING_DEFAULTS = {
+    'queue': True, 'queue_size': 10000, 'policy': 'reject',
+    'max_file_mb': 20, 'compress': True, 'compress_level': 10, 'max_total_mb': 200, 'max_days': 30,
+}
+# 溢出策略，与消息队列（queue 段）的策略名称一致
+LOG_POLICIES = ('block', 'drop_oldest', 'reject')
+# 丢弃日志的提示最多每隔多少秒输出一次
+DROP_REPORT_INTERVAL = 5
+# 队列满时等待日志线程写入的最长秒数，超时后按丢弃计数
+BLOCK_TIMEOUT = 1
+
+# 当前的日志线程，重新配置日志或退出时停止
+_listener = None
 
 class SingleLineFormatter(logging.Formatter):
     """保证每条日志只占一行的格式化器"""
@@ -27,42 +47,162 @@ class RootLoggerFilter(logging.Filter):
             record.args = ()
         return True
 
-def setup_logging():
-    """日志配置"""
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """把日志放入有界队列，由日志线程着色并写入控制台与文件
+
+    记录日志的线程只合并消息参数（与 QueueHandler 相同），队列满时按溢出策略处理：
+        block       - 等待日志线程写入
+        drop_oldest - 丢弃队列中最早的日志
+        reject      - 丢弃新日志
+    警告及以上级别的日志在队列满时也会等待。等待最多 BLOCK_TIMEOUT 秒，超时后按溢出策略丢弃；
+    日志线程自身（如处理器出错时）记录的日志从不等待，避免等待自己写入而死锁。丢弃的条数汇总后作为警告日志输出。
+    """
+
+    def __init__(self, log_queue, policy: str):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+        self._reported = 0
+        self._last_report = 0.0
+        # 读取队列的日志线程，由 setup_logging 在启动日志线程后设置
+        self.listener_thread = None
+
+    def _put(self, record, wait: bool):
+        if wait and threading.current_thread() is not self.listener_thread:
+            self.queue.put(record, timeout=BLOCK_TIMEOUT)
+        else:
+            self.queue.put_nowait(record)
+
+    def enqueue(self, record):
+        # Handler.handle 已持有 self.lock，计数无需另外加锁
+        try:
+            self._put(record, self.policy == 'block' or record.levelno >= logging.WARNING)
+        except queue.Full:
+            if self.policy != 'drop_oldest' or not self._replace_oldest(record):
+                self.dropped += 1
+                return
+        if self.dropped > self._reported and time.monotonic() - self._last_report >= DROP_REPORT_INTERVAL:
+            self.report_dropped()
+
+    def _replace_oldest(self, record) -> bool:
+        try:
+            self.queue.get_nowait()
+            self.queue.put_nowait(record)
+        except (queue.Empty, queue.Full):
+            return False
+        self.dropped += 1
+        return True
+
+    def report_dropped(self):
+        """输出上次提示以来丢弃的日志条数"""
+        count = self.dropped - self._reported
+        if count <= 0:
+            return
+        self._last_report = time.monotonic()
+        record = logging.LogRecord('日志队列', logging.WARNING, __file__, 0,
+                                   f"日志队列已满，丢弃了 {count} 条日志（累计 {self.dropped} 条）", None, None)
+        try:
+            self._put(record, True)
+        except queue.Full:
+            # 未能输出的条数留到下次提示
+            return
+        self._reported = self.dropped
+
+class LogListener(logging.handlers.QueueListener):
+    """日志线程：停止时等待队列有空位再放入结束标记（队列满时 QueueListener 会直接抛出 queue.Full）"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+def _logging_options() -> dict:
+    try:
+        from handle.loader import load_config
+        options = load_config().get('logging') or {}
+    except Exception:
+        options = {}
+    options = dict(LOGGING_DEFAULTS, **options)
+    if options['policy'] not in LOG_POLICIES:
+        options['policy'] = LOGGING_DEFAULTS['policy']
+    return options
+
+def stop_logging():
+    """停止日志线程：写完队列中的日志后，root 日志器改为直接写入控制台与文件（进程退出前调用）"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    root_logger = logging.getLogger('')
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, BoundedQueueHandler):
+            with handler.lock:
+                handler.report_dropped()
+            root_logger.removeHandler(handler)
+    listener.stop()
+    # 退出过程中（如清理子进程时）记录的日志直接写入
+    for handler in listener.handlers:
+        root_logger.addHandler(handler)
+
+def setup_logging(options: dict = None):
+    """日志配置
+
+    控制台与文件写入由单独的日志线程完成（config.yaml 的 logging 段），
+    options 为 None 时从配置文件读取。
+    """
     logger = logging.getLogger('管道服务')
+    options = _logging_options() if options is None else dict(LOGGING_DEFAULTS, **options)
 
     # 配置中文化级别名称
     logging.addLevelName(logging.INFO, "信息")
-    logging.addLevelName(logging.WARNING, "警告") 
+    logging.addLevelName(logging.WARNING, "警告")
     logging.addLevelName(logging.ERROR, "错误")
     logging.addLevelName(logging.CRITICAL, "严重错误")
 
     fmt = '%(asctime)s - %(name)s：%(levelname)s，%(message)s'
     datefmt = '%Y-%m-%d %H:%M:%S'
 
+    # 重复配置时先写完上一次配置的日志，并关闭其文件
+    stop_logging()
+
     # 手动配置 root logger
     root_logger = logging.getLogger('')
     root_logger.setLevel(logging.INFO)
-    root_logger.handlers.clear()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+        handler.close()
 
     # 控制台处理器（带颜色）
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(ColoredFormatter(fmt, datefmt=datefmt))
-    root_logger.addHandler(console_handler)
-
-    # 文件处理器
-    log_dir = 'log'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    today = datetime.today().strftime('%Y-%m-%d')
-    log_file = os.path.join(log_dir, f'{today}.log')
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+
+    # 文件处理器：按天与大小切换分段，写完的分段在后台压缩并按保留策略清理
+    log_dir = get_log_dir()
+    archiver = start_log_archiver(log_dir, options)
+    file_handler = RotatingLogHandler(
+        log_dir, int(float(options['max_file_mb'] or 0) * 1024 * 1024), on_rollover=archiver.wake
+    )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(SingleLineFormatter(fmt, datefmt=datefmt))
-    root_logger.addHandler(file_handler)
+
+    if options['queue']:
+        # 记录日志的线程只把日志放入队列，着色与写入由日志线程完成
+        global _listener
+        queue_handler = BoundedQueueHandler(queue.Queue(max(1, int(options['queue_size']))), options['policy'])
+        _listener = LogListener(
+            queue_handler.queue, console_handler, file_handler, respect_handler_level=True
+        )
+        _listener.start()
+        queue_handler.listener_thread = _listener._thread
+        root_logger.addHandler(queue_handler)
+    else:
+        root_logger.addHandler(console_handler)
+        root_logger.addHandler(file_handler)
 
     # 为 root 日志器添加过滤器（改名 + 翻译）
-    root_logger.addFilter(RootLoggerFilter())
+    if not any(isinstance(f, RootLoggerFilter) for f in root_logger.filters):
+        root_logger.addFilter(RootLoggerFilter())
+
+    return logger
 
-    return logger
\ No newline at end of file
+# 退出前写完队列中的日志（先于 logging 模块自身的退出清理执行）
+atexit.register(stop_logging)
\ No newline at end of file
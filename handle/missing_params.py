@@ -4,14 +4,111 @@ import functools
 from typing import Any, Callable, Dict, List, Optional
 
 from handle.missing_utils import (
+    SENTINEL,
     is_missing,
     type_to_str,
     parse_param_descriptions,
-    build_ask_response,
+    ask_entry,
+    assemble_ask_response,
 )
 
 logger = logging.getLogger('缺参追问')
 
+_SIMPLE_KINDS = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+
+def _compile_validator(func: Callable, required_params: tuple, use_bind: bool = False) -> Callable:
+    """在装饰时为工具生成专用的参数校验函数
+
+    预先计算每个必填参数的位置下标、默认值、类型字符串与追问条目，调用时只需少量字典查找。
+    返回的 validate(args, kwargs) 参数齐全时返回 None，否则返回追问响应。
+    use_bind 为 True 时总是返回基于 Signature.bind 的通用校验函数（测试中与预先计算的版本对比）。
+    """
+    sig = inspect.signature(func)
+    param_descriptions = parse_param_descriptions(func)
+    params = sig.parameters
+    tool_name = func.__name__
+
+    # 必填参数的追问条目（类型与描述在装饰时确定）
+    entries = {}
+    for name in required_params:
+        param_obj = params.get(name)
+        type_str = type_to_str(param_obj.annotation) if param_obj else "any"
+        entries[name] = ask_entry(name, type_str, param_descriptions.get(name, ''))
+
+    def ask(missing: list, reason: str):
+        logger.info(f"工具 {tool_name} {reason}: {missing}，返回追问响应")
+        return assemble_ask_response(tool_name, [entries[name] for name in missing])
+
+    # 参数绑定失败时的通用追问
+    generic_message = (
+        f"要完成「{tool_name}」操作，缺少必要参数，请提供相关信息后重新调用。\n"
+        f"期望参数：{', '.join(params.keys())}"
+    )
+    # 绑定失败时只按关键字参数判断（不在签名中的必填参数忽略）
+    bind_failed_checks = tuple(name for name in required_params if name in params)
+
+    def bind_failed(args, kwargs):
+        missing = [name for name in bind_failed_checks if name not in kwargs or is_missing(kwargs[name])]
+        if missing:
+            return ask(missing, "参数绑定失败，缺少参数")
+        logger.info(f"工具 {tool_name} 参数绑定失败（args={args}, kwargs={kwargs}），返回通用追问")
+        return {
+            "need_user_input": True,
+            "action": "ask_user",
+            "tool": tool_name,
+            "missing_params": [],
+            "message": generic_message,
+        }
+
+    def validate_bind(args, kwargs):
+        """通用路径：与 inspect.Signature.bind 完全一致，用于含可变参数或仅位置参数的签名"""
+        try:
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+        except TypeError:
+            return bind_failed(args, kwargs)
+        arguments = bound.arguments
+        missing = [name for name in required_params if name not in arguments or is_missing(arguments[name])]
+        if missing:
+            return ask(missing, "缺少参数")
+        return None
+
+    if use_bind or not all(param.kind in _SIMPLE_KINDS for param in params.values()):
+        return validate_bind
+
+    # 只含普通参数与仅关键字参数的签名（所有工具都属于此类）：预先计算绑定规则
+    positional = [name for name, param in params.items() if param.kind is inspect.Parameter.POSITIONAL_OR_KEYWORD]
+    accepted = frozenset(params)
+    no_default = [name for name, param in params.items() if param.default is inspect.Parameter.empty]
+    # 传入 n 个位置参数时：已被位置参数占用的参数名、仍须通过关键字提供的无默认值参数名
+    taken = [frozenset(positional[:n]) for n in range(len(positional) + 1)]
+    needed = [frozenset(name for name in no_default if name not in taken[n]) for n in range(len(positional) + 1)]
+    max_positional = len(positional)
+    # 必填参数：(参数名, 位置下标, 默认值)；仅关键字参数与不在签名中的参数不会按位置传入，
+    # 不在签名中的必填参数默认值为 SENTINEL，始终视为缺失
+    checks = tuple(
+        (name,
+         positional.index(name) if name in positional else max_positional,
+         params[name].default if name in params else SENTINEL)
+        for name in required_params
+    )
+
+    def validate(args, kwargs):
+        count = len(args)
+        keys = kwargs.keys()
+        if count > max_positional or not keys <= accepted or keys & taken[count] or not needed[count] <= keys:
+            # 与 Signature.bind 失败的条件相同：位置参数过多、未知/重复的关键字参数、缺少无默认值参数
+            return bind_failed(args, kwargs)
+        missing = [
+            name for name, index, default in checks
+            if is_missing(args[index] if index < count else kwargs.get(name, default))
+        ]
+        if missing:
+            return ask(missing, "缺少参数")
+        return None
+
+    return validate
+
 def ask_on_missing(*required_params: str):
     """
     装饰器：
@@ -24,86 +121,20 @@ def ask_on_missing(*required_params: str):
             "missing_params": [...],
             "message": "自然语言追问信息"
         }
+    校验逻辑在装饰时针对每个工具生成，调用时不再绑定签名。
     """
 
     def decorator(func: Callable) -> Callable:
-        sig = inspect.signature(func)
-        param_descriptions = parse_param_descriptions(func)
+        validate = _compile_validator(func, required_params)
 
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            try:
-                bound = sig.bind(*args, **kwargs)
-                bound.apply_defaults()
-            except TypeError:
-                # 参数绑定失败，直接从 kwargs 判断哪些 required_params 缺失
-                missing = []
-                for name in required_params:
-                    param_obj = sig.parameters.get(name)
-                    if not param_obj:
-                        continue
-                    if name not in kwargs:
-                        type_str = type_to_str(param_obj.annotation)
-                        missing.append({
-                            'name': name,
-                            'type': type_str,
-                            'description': param_descriptions.get(name, '')
-                        })
-                        continue
-                    value = kwargs[name]
-                    if is_missing(value):
-                        type_str = type_to_str(param_obj.annotation)
-                        missing.append({
-                            'name': name,
-                            'type': type_str,
-                            'description': param_descriptions.get(name, '')
-                        })
-
-                if missing:
-                    response = build_ask_response(func.__name__, missing)
-                    logger.info(f"工具 {func.__name__} 参数绑定失败，缺少参数: {[m['name'] for m in missing]}，返回追问响应")
-                    return response
-
-                logger.info(f"工具 {func.__name__} 参数绑定失败（args={args}, kwargs={kwargs}），返回通用追问")
-                return {
-                    "need_user_input": True,
-                    "action": "ask_user",
-                    "tool": func.__name__,
-                    "missing_params": [],
-                    "message": (
-                        f"要完成「{func.__name__}」操作，缺少必要参数，请提供相关信息后重新调用。\n"
-                        f"期望参数：{', '.join(sig.parameters.keys())}"
-                    )
-                }
-
-            missing = []
-            for name in required_params:
-                if name not in bound.arguments:
-                    param_obj = sig.parameters.get(name)
-                    type_str = type_to_str(param_obj.annotation) if param_obj else "any"
-                    missing.append({
-                        'name': name,
-                        'type': type_str,
-                        'description': param_descriptions.get(name, '')
-                    })
-                    continue
-
-                value = bound.arguments[name]
-                if is_missing(value):
-                    param_obj = sig.parameters.get(name)
-                    type_str = type_to_str(param_obj.annotation) if param_obj else "any"
-                    missing.append({
-                        'name': name,
-                        'type': type_str,
-                        'description': param_descriptions.get(name, '')
-                    })
-
-            if missing:
-                response = build_ask_response(func.__name__, missing)
-                logger.info(f"工具 {func.__name__} 缺少参数: {[m['name'] for m in missing]}，返回追问响应")
+            response = validate(args, kwargs)
+            if response is not None:
                 return response
-
             return func(*args, **kwargs)
 
+        # 供基准脚本等读取该工具的必填参数
+        wrapper._required_params = required_params
         return wrapper
     return decorator
\ No newline at end of file
@@ -80,20 +80,23 @@ def generate_question(param_name: str, description: str) -> str:
         return f"请提供：{description}"
     return f"请提供参数 '{param_name}' 的值"
 
-def build_ask_response(tool_name: str, missing_params: List[Dict]) -> Dict:
-    """构建结构化的追问响应"""
-    param_list = []
-    questions = []
-    for p in missing_params:
-        desc = p.get('description', p['name'])
-        param_list.append(f"- **{p['name']}** ({p['type']}): {desc}")
-        questions.append(generate_question(p['name'], desc))
+def ask_entry(name: str, type_str: str, description: str) -> tuple:
+    """预先生成单个缺失参数的追问条目：(missing_params 中的字典, 追问信息中的一行)"""
+    param = {
+        "name": name,
+        "type": type_str,
+        "description": description,
+        "question": generate_question(name, description),
+    }
+    return param, f"- **{name}** ({type_str}): {description}"
 
+def assemble_ask_response(tool_name: str, entries: List[tuple]) -> Dict:
+    """用预先生成的追问条目拼装追问响应"""
     message_lines = [
         f"要完成「{tool_name}」操作，还需要以下信息，请向用户询问：",
         "",
     ]
-    message_lines.extend(param_list)
+    message_lines.extend(line for _, line in entries)
     message_lines.append("")
     message_lines.append("请根据以上缺失参数，逐一向用户提问以获取必要信息后，重新调用该工具。")
 
@@ -101,14 +104,13 @@ def build_ask_response(tool_name: str, missing_params: List[Dict]) -> Dict:
         "need_user_input": True,
         "action": "ask_user",
         "tool": tool_name,
-        "missing_params": [
-            {
-                "name": p['name'],
-                "type": p['type'],
-                "description": p.get('description', ''),
-                "question": generate_question(p['name'], p.get('description', ''))
-            }
-            for p in missing_params
-        ],
+        "missing_params": [dict(param) for param, _ in entries],
         "message": "\n".join(message_lines)
-    }
\ No newline at end of file
+    }
+
+def build_ask_response(tool_name: str, missing_params: List[Dict]) -> Dict:
+    """构建结构化的追问响应"""
+    return assemble_ask_response(tool_name, [
+        ask_entry(p['name'], p['type'], p.get('description', ''))
+        for p in missing_params
+    ])
\ No newline at end of file
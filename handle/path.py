@@ -11,7 +11,23 @@ def get_config_path():
         exe_dir = os.path.dirname(sys.executable)
         return os.path.join(exe_dir, 'config.yaml')
     else:
-        return os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            'config.yaml'
-        )
\ No newline at end of file
+        return os.path.join(get_app_dir(), 'config.yaml')
+
+def get_app_dir():
+    """程序目录：源码运行时为项目根目录，以 zipapp 打包文件运行时为打包文件所在目录"""
+    root = os.path.dirname(os.path.dirname(__file__))
+    if os.path.isfile(root):
+        root = os.path.dirname(root)
+    return root
+
+def get_cache_dir():
+    """缓存目录获取器（与配置文件同级的 cache 目录，不存在时创建）"""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(get_config_path())), 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def get_log_dir():
+    """日志目录获取器（与配置文件同级的 log 目录，不存在时创建）"""
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(get_config_path())), 'log')
+    os.makedirs(log_dir, exist_ok=True)
+    return log_dir
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+载荷日志：工具结果、书签、系统状态、窗口列表等大段内容的日志策略
+
+    from handle.payload_log import log_payload
+    log_payload(logger, "书签内容：", bookmarks)
+
+    - 延迟格式化：日志级别未开启时不生成文本；内容可以是返回内容的函数，需要输出时才调用
+    - 按日志器设置字节上限，超出时保留开头与结尾；列表、字典按元素截断，不必先转为完整文本
+    - 同一日志器在采样间隔内重复输出相同内容时只输出一次，下次输出时附带省略的次数
+    - 开启 debug_full 时另外以 DEBUG 级别记录完整内容（只写入日志文件，不输出到控制台，不受采样影响）
+配置见 config.yaml 的 logging.payload 段，修改后立即生效。
+"""
+
+import time
+import logging
+import threading
+
+# 载荷日志的默认配置（config.yaml 的 logging.payload 段）
+PAYLOAD_DEFAULTS = {'max_bytes': 2048, 'tail_bytes': 256, 'loggers': {}, 'sample_interval': 30, 'debug_full': False}
+# 采样记录的最大数量，超出时清空
+SAMPLE_CACHE_SIZE = 1024
+
+# (配置快照, 载荷日志配置)，配置重新加载后重新生成
+_options_cache = (None, None)
+# (日志器名称, 前缀, 内容哈希) -> [上次输出时间, 之后省略的次数]
+_samples = {}
+_samples_lock = threading.Lock()
+
+def _options() -> dict:
+    global _options_cache
+    try:
+        from handle.loader import load_config
+        config = load_config()
+    except Exception:
+        config = {}
+    cached_config, options = _options_cache
+    if options is not None and cached_config is config:
+        return options
+    options = dict(PAYLOAD_DEFAULTS, **((config.get('logging') or {}).get('payload') or {}))
+    _options_cache = (config, options)
+    return options
+
+def _size(text: str) -> int:
+    return len(text.encode('utf-8'))
+
+def truncate_text(text: str, max_bytes: int, tail_bytes: int = 0) -> str:
+    """超出 max_bytes（UTF-8）时保留开头与结尾 tail_bytes 字节，多行内容在行边界处截断"""
+    data = text.encode('utf-8')
+    if not max_bytes or len(data) <= max_bytes:
+        return text
+    tail_bytes = min(tail_bytes, max_bytes // 2)
+    head = data[:max_bytes - tail_bytes].decode('utf-8', 'ignore')
+    tail = data[len(data) - tail_bytes:].decode('utf-8', 'ignore') if tail_bytes else ''
+    if '\n' in head[1:] or '\n' in tail[:-1]:
+        # 多行内容（如窗口列表）只保留完整的行
+        if '\n' in head[1:]:
+            head = head[:head.rindex('\n')]
+        if '\n' in tail[:-1]:
+            tail = tail[tail.index('\n') + 1:]
+        omitted = len(data) - _size(head) - _size(tail)
+        return f"{head}\n…（省略 {omitted} 字节）…\n{tail}"
+    omitted = len(data) - _size(head) - _size(tail)
+    return f"{head}…（省略 {omitted} 字节）…{tail}"
+
+def _truncate_container(payload, max_bytes: int, tail_bytes: int) -> str:
+    """列表、元组、字典按元素保留开头与结尾，只生成保留的元素的文本"""
+    if isinstance(payload, dict):
+        items, start, end = list(payload.items()), '{', '}'
+        render = lambda item: f"{item[0]!r}: {item[1]!r}"
+    else:
+        items, start, end = payload, '[' if isinstance(payload, list) else '(', ']' if isinstance(payload, list) else ')'
+        render = repr
+    tail_bytes = min(tail_bytes, max_bytes // 2)
+    head, used = [], 2
+    for item in items:
+        text = render(item)
+        used += _size(text) + 2
+        if used > max_bytes - tail_bytes and head:
+            break
+        head.append(text)
+    if len(head) == len(items):
+        return truncate_text(str(payload), max_bytes, tail_bytes)
+    tail, used = [], 0
+    for item in reversed(items[len(head):]):
+        text = render(item)
+        used += _size(text) + 2
+        if used > tail_bytes:
+            break
+        tail.append(text)
+    omitted = len(items) - len(head) - len(tail)
+    parts = head + [f"…（省略 {omitted} 项，共 {len(items)} 项）…"] + tail[::-1]
+    return truncate_text(start + ', '.join(parts) + end, max_bytes, tail_bytes)
+
+def render_payload(payload, max_bytes: int, tail_bytes: int = 0) -> str:
+    """按字节上限生成载荷文本，max_bytes 为 0 时返回完整文本（同 str）"""
+    if max_bytes and isinstance(payload, (list, tuple, dict)):
+        return _truncate_container(payload, max_bytes, tail_bytes)
+    text = payload if isinstance(payload, str) else str(payload)
+    return truncate_text(text, max_bytes, tail_bytes)
+
+def _sample(key: tuple, interval: float):
+    """采样间隔内已输出过相同内容时返回 None，否则返回上次输出后省略的次数"""
+    now = time.monotonic()
+    with _samples_lock:
+        entry = _samples.get(key)
+        if entry is not None and now - entry[0] < interval:
+            entry[1] += 1
+            return None
+        if len(_samples) >= SAMPLE_CACHE_SIZE:
+            _samples.clear()
+        _samples[key] = [now, 0]
+        return entry[1] if entry is not None else 0
+
+def log_payload(logger: logging.Logger, message: str, payload, level: int = logging.INFO):
+    """记录大段内容：message 为前缀（如 "书签内容："），payload 为内容或返回内容的函数"""
+    options = _options()
+    debug_full = options['debug_full']
+    if not logger.isEnabledFor(level) and not debug_full:
+        return
+    if callable(payload):
+        payload = payload()
+    max_bytes = (options['loggers'] or {}).get(logger.name, options['max_bytes'])
+    if logger.isEnabledFor(level):
+        text = render_payload(payload, max_bytes, options['tail_bytes'])
+        interval = options['sample_interval']
+        # 采样只作用于截断的日志，完整内容每次都写入
+        suppressed = _sample((logger.name, message, hash(text)), interval) if interval else 0
+        if suppressed is not None:
+            if suppressed:
+                text = f"{text}（上次输出后相同内容又出现 {suppressed} 次，已省略）"
+            logger.log(level, "%s%s", message, text)
+    if debug_full:
+        # 不受日志器级别限制，控制台处理器为 INFO 级别，完整内容只写入日志文件
+        logger.handle(logger.makeRecord(logger.name, logging.DEBUG, '(payload)', 0, "%s%s",
+                                        (message, render_payload(payload, 0)), None))
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import logging
+from handle.logger import stop_logging
 from handle.ws_utils import cleanup_all_processes
 
 def make_signal_handler(logger_name='管道服务'):
@@ -16,6 +17,8 @@ def make_signal_handler(logger_name='管道服务'):
         logger = logging.getLogger(logger_name)
         logger.info(f"收到信号 {signum}，开始优雅退出...")
         cleanup_all_processes()
+        # os._exit 不执行 atexit，先写完日志队列中的日志
+        stop_logging()
         # 使用 os._exit 而非 sys.exit：避免在 asyncio 事件循环中抛出 SystemExit
         # 引发级联异常和未捕获的任务异常
         os._exit(0)
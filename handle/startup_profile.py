@@ -0,0 +1,197 @@
+"""
+启动耗时分析：记录各启动阶段、各工具分组注册与每个模块导入的耗时
+
+开启方式（任选其一），管道启动的注册进程会继承环境变量一并分析（命令行参数由入口脚本解析后调用 enable）：
+    python mcp_pipe.py aggregate.py --profile-startup
+    MCP_PROFILE_STARTUP=1 python aggregate.py
+
+启动完成后输出按耗时排序的报告，并在日志目录写入 JSON 文件，便于对比不同版本：
+    python -m handle.startup_profile 旧版本.json 新版本.json
+模块导入耗时与 -X importtime 的口径一致：自身耗时不含其导入的子模块，累计耗时包含。
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextlib
+from datetime import datetime
+from handle.path import get_log_dir
+
+logger = logging.getLogger('启动分析')
+
+PROFILE_FLAG = '--profile-startup'
+PROFILE_ENV = 'MCP_PROFILE_STARTUP'
+# 报告中列出的耗时最多的模块数量
+TOP_IMPORTS = 15
+
+class StartupProfiler:
+    """启动耗时记录器，未开启时所有方法均为空操作"""
+
+    def __init__(self, name: str, enabled: bool):
+        self.name = name
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._last = self._start
+        # 顺序执行的启动阶段：(名称, 秒)
+        self.marks = []
+        # 阶段内的明细（如各工具分组的注册）：(名称, 秒)
+        self.phases = []
+        # 模块导入：(模块名, 自身秒数, 累计秒数, 嵌套深度)
+        self.imports = []
+        self._import_stack = threading.local()
+        self._original_find_and_load = None
+        self._reported = False
+        if enabled:
+            self._track_imports()
+
+    def enable(self):
+        """开启记录（入口脚本解析到 --profile-startup 时调用），并通过环境变量让子进程一并分析"""
+        os.environ[PROFILE_ENV] = '1'
+        if not self.enabled:
+            self.enabled = True
+            self._track_imports()
+
+    def _track_imports(self):
+        """包装导入系统的 _find_and_load（与 -X importtime 计时的位置相同）"""
+        bootstrap = sys.modules.get('_frozen_importlib')
+        original = getattr(bootstrap, '_find_and_load', None)
+        if original is None:
+            return
+        local = self._import_stack
+
+        def _find_and_load(name, import_):
+            stack = local.__dict__.setdefault('stack', [])
+            start = time.perf_counter()
+            stack.append(0.0)
+            try:
+                return original(name, import_)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                self.imports.append((name, elapsed - children, elapsed, len(stack)))
+
+        self._original_find_and_load = original
+        bootstrap._find_and_load = _find_and_load
+
+    def _untrack_imports(self):
+        if self._original_find_and_load is not None:
+            sys.modules['_frozen_importlib']._find_and_load = self._original_find_and_load
+            self._original_find_and_load = None
+
+    def mark(self, name: str):
+        """记录一个启动阶段结束，耗时从上一个阶段结束算起"""
+        if not self.enabled or self._reported:
+            return
+        now = time.perf_counter()
+        self.marks.append((name, now - self._last))
+        self._last = now
+
+    def phase(self, name: str):
+        """记录阶段内某一步骤的耗时（上下文管理器）"""
+        if not self.enabled or self._reported:
+            return contextlib.nullcontext()
+        return self._phase(name)
+
+    @contextlib.contextmanager
+    def _phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        """输出排序后的启动报告并写入 JSON 文件，之后不再记录（只在首次调用时生效）"""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        total = time.perf_counter() - self._start
+        self._untrack_imports()
+        imports = list(self.imports)
+
+        lines = [f"{self.name} 启动耗时 {total * 1000:.1f}ms（不含解释器自身启动）"]
+        lines.append("启动阶段：")
+        for i, (name, seconds) in enumerate(sorted(self.marks, key=lambda m: -m[1]), 1):
+            lines.append(f"  {i:>2}. {name:<16}{seconds * 1000:>10.1f}ms {seconds / total * 100:>5.1f}%")
+        if self.phases:
+            lines.append("阶段明细：")
+            for i, (name, seconds) in enumerate(sorted(self.phases, key=lambda p: -p[1]), 1):
+                lines.append(f"  {i:>2}. {name:<16}{seconds * 1000:>10.1f}ms")
+        if imports:
+            imported = sum(item[1] for item in imports)
+            lines.append(f"模块导入：{len(imports)} 个模块，合计 {imported * 1000:.1f}ms，自身耗时最多的模块：")
+            for i, (name, own, cumulative, _) in enumerate(
+                    sorted(imports, key=lambda item: -item[1])[:TOP_IMPORTS], 1):
+                lines.append(f"  {i:>2}. {name:<40}自身 {own * 1000:>8.1f}ms  累计 {cumulative * 1000:>8.1f}ms")
+        for line in lines:
+            logger.info(line)
+
+        artifact = {
+            'process': self.name,
+            'pid': os.getpid(),
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'started_at': self.started_at,
+            'total_ms': total * 1000,
+            'marks': [{'name': name, 'ms': seconds * 1000} for name, seconds in self.marks],
+            'phases': [{'name': name, 'ms': seconds * 1000} for name, seconds in self.phases],
+            'imports': [
+                {'module': name, 'self_us': round(own * 1e6), 'cumulative_us': round(cumulative * 1e6), 'depth': depth}
+                for name, own, cumulative, depth in imports
+            ],
+        }
+        try:
+            from handle.loader import load_config
+            artifact['version'] = load_config().get('version')
+        except Exception:
+            pass
+        try:
+            stamp = datetime.fromtimestamp(self.started_at).strftime('%Y%m%d-%H%M%S')
+            stem = os.path.splitext(self.name)[0]
+            path = os.path.join(get_log_dir(), f'startup-{stem}-{stamp}-{os.getpid()}.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(artifact, f, ensure_ascii=False, indent=2)
+            logger.info(f"启动分析结果已写入 {path}")
+        except OSError as e:
+            logger.warning(f"写入启动分析结果失败: {e}")
+
+profiler = StartupProfiler(os.path.basename(sys.argv[0]) or 'python',
+                           os.environ.get(PROFILE_ENV, '') not in ('', '0'))
+
+def compare(old: dict, new: dict) -> list:
+    """对比两次启动分析结果，返回按耗时变化排序的报告行"""
+    lines = [f"{old.get('version')} -> {new.get('version')}：启动耗时 "
+             f"{old['total_ms']:.1f}ms -> {new['total_ms']:.1f}ms（{new['total_ms'] - old['total_ms']:+.1f}ms）"]
+    for title, key in (("启动阶段", 'marks'), ("阶段明细", 'phases')):
+        before = {item['name']: item['ms'] for item in old.get(key, [])}
+        after = {item['name']: item['ms'] for item in new.get(key, [])}
+        names = sorted(set(before) | set(after), key=lambda n: -abs(after.get(n, 0) - before.get(n, 0)))
+        if names:
+            lines.append(f"{title}：")
+        for name in names:
+            lines.append(f"  {name:<16}{before.get(name, 0):>10.1f}ms -> {after.get(name, 0):>10.1f}ms"
+                         f"（{after.get(name, 0) - before.get(name, 0):+.1f}ms）")
+    before = {item['module']: item['self_us'] for item in old.get('imports', [])}
+    after = {item['module']: item['self_us'] for item in new.get('imports', [])}
+    names = sorted(set(before) | set(after), key=lambda n: -abs(after.get(n, 0) - before.get(n, 0)))
+    lines.append(f"模块导入自身耗时变化最大的 {TOP_IMPORTS} 个模块：")
+    for name in names[:TOP_IMPORTS]:
+        lines.append(f"  {name:<40}{before.get(name, 0) / 1000:>8.1f}ms -> {after.get(name, 0) / 1000:>8.1f}ms"
+                     f"（{(after.get(name, 0) - before.get(name, 0)) / 1000:+.1f}ms）")
+    return lines
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("用法: python -m handle.startup_profile 旧版本.json 新版本.json")
+        sys.exit(1)
+    with open(sys.argv[1], encoding='utf-8') as f:
+        old_result = json.load(f)
+    with open(sys.argv[2], encoding='utf-8') as f:
+        new_result = json.load(f)
+    print('\n'.join(compare(old_result, new_result)))
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+工具说明压缩：tools/list 中只发送压缩后的工具说明，减少每次连接时的传输量
+
+压缩规则：
+    1. 去掉 Returns/Raises 段（返回值格式由工具结果自身体现）
+    2. Args 段去掉参数类型（inputSchema 中已有类型）
+    3. 可选（boilerplate_min_tools，默认关闭）：在多个工具中重复出现的行视为样板，从各工具中去掉，
+       只在服务说明（instructions）中保留一份
+    4. 缩进减半，合并连续空行
+    5. 超出字节预算时按段落优先级保留：简介、Args、其余段落按原顺序，放不下的段落整体省略
+完整说明通过 get_tool_detail 工具查看。
+
+对比压缩前后 tools/list 的字节数：
+    python -m handle.tool_compact
+"""
+
+import re
+import sys
+import json
+import inspect
+import logging
+from collections import Counter
+
+logger = logging.getLogger('工具说明')
+
+DETAIL_TOOL = 'get_tool_detail'
+# 需要整段去掉的段落标题
+DROP_SECTIONS = ('Returns', 'Return', 'Raises', 'Yields')
+# 段落标题：不缩进、以冒号结尾的短行，如 "Args:"、"使用场景："、"Notice："
+_SECTION = re.compile(r'^(\S.{0,15}?)\s*[:：]\s*$')
+# Args 段中的参数行："name (type): 说明"
+_ARG_TYPE = re.compile(r'^(\s*[A-Za-z_]\w*)\s*\([^)]*\)\s*[:：]')
+# 多数工具的返回值说明，去掉 Returns 段后在服务说明中统一说明一次
+RETURNS_NOTE = "多数工具返回包含 success（是否成功）与 result（结果消息）字段的字典。"
+
+def _sections(text: str) -> list:
+    """把说明拆成段落：[(标题, 行列表)]，第一段（简介）标题为空"""
+    sections = [('', [])]
+    for line in inspect.cleandoc(text).split('\n'):
+        match = _SECTION.match(line)
+        if match:
+            sections.append((match.group(1), [line]))
+        else:
+            sections[-1][1].append(line)
+    return sections
+
+def _compact_lines(title: str, lines: list, boilerplate: set) -> list:
+    result = []
+    for line in lines:
+        if line.strip() in boilerplate:
+            continue
+        if title == 'Args':
+            line = _ARG_TYPE.sub(r'\1:', line)
+        stripped = line.lstrip(' ')
+        # 缩进减半
+        line = ' ' * ((len(line) - len(stripped)) // 2) + stripped
+        if not line.strip() and (not result or not result[-1].strip()):
+            continue
+        result.append(line.rstrip())
+    while result and not result[-1].strip():
+        result.pop()
+    return result
+
+def _size(text: str) -> int:
+    return len(text.encode('utf-8'))
+
+def compact_description(text: str, boilerplate: set = frozenset(), max_bytes: int = 0) -> str:
+    """生成单个工具的压缩说明，max_bytes 为 0 时不限制长度"""
+    if not text:
+        return text
+    sections = []
+    for title, lines in _sections(text):
+        if title in DROP_SECTIONS:
+            continue
+        lines = _compact_lines(title, lines, boilerplate)
+        if lines:
+            sections.append((title, '\n'.join(lines)))
+    compact = '\n'.join(body for _, body in sections)
+    if not max_bytes or _size(compact) <= max_bytes:
+        return compact
+
+    # 超出预算：简介与 Args 优先，其余段落按原顺序放入，放不下的整体省略
+    priority = sorted(range(len(sections)), key=lambda i: (sections[i][0] not in ('', 'Args'), i))
+    kept, omitted, used = set(), [], 0
+    for i in priority:
+        size = _size(sections[i][1]) + 1
+        if used + size <= max_bytes or not kept:
+            kept.add(i)
+            used += size
+        else:
+            omitted.append(sections[i][0] or '简介')
+    body = '\n'.join(sections[i][1] for i in sorted(kept))
+    if _size(body) > max_bytes:
+        # 单个段落已超出预算，按字符截断
+        body = body.encode('utf-8')[:max_bytes].decode('utf-8', 'ignore').rstrip() + '…'
+    omitted_note = f"省略了{'、'.join(omitted)}，" if omitted else ''
+    return f"{body}\n（说明已压缩，{omitted_note}完整说明请调用 {DETAIL_TOOL} 查看）"
+
+def find_boilerplate(texts: list, min_tools: int) -> list:
+    """在至少 min_tools 个工具说明中出现的行，按出现次数排序
+
+    不含段落标题、去掉的段落与 Args 段（参数说明属于各自的工具，不能移到服务说明中）。
+    """
+    if not min_tools:
+        return []
+    counter = Counter()
+    for text in texts:
+        lines = set()
+        for title, section_lines in _sections(text):
+            if title in DROP_SECTIONS or title == 'Args':
+                continue
+            lines.update(line.strip() for line in section_lines if not _SECTION.match(line))
+        counter.update(line for line in lines if len(line) >= 4)
+    return [line for line, count in counter.most_common() if count >= min_tools]
+
+def _json_size(text: str) -> int:
+    """字符串在 tools/list 中序列化后的字节数"""
+    return _size(json.dumps(text or '', ensure_ascii=False))
+
+def compact_tools(mcp, config: dict) -> bool:
+    """按配置压缩所有已注册工具的说明（注册或热更新工具分组后调用），返回是否有说明变化
+
+    完整说明保存在 mcp._tool_details，工具重新注册后自动取新的完整说明。
+    """
+    options = config.get('tool_description') or {}
+    tools = mcp._tool_manager.list_tools()
+    details = getattr(mcp, '_tool_details', {})
+    compacted = getattr(mcp, '_compacted_descriptions', {})
+    names = {tool.name for tool in tools}
+    # 新注册的工具（说明不是压缩后的版本）记录完整说明，已注销的工具删除记录
+    for tool in tools:
+        if compacted.get(tool.name) != tool.description:
+            details[tool.name] = tool.description or ''
+    for name in list(details):
+        if name not in names:
+            details.pop(name)
+    mcp._tool_details = details
+
+    enabled = options.get('compact', True)
+    changed = False
+    if enabled != (DETAIL_TOOL in names):
+        # 开启压缩时注册 get_tool_detail，关闭时注销
+        if enabled:
+            _register_detail_tool(mcp)
+            details[DETAIL_TOOL] = mcp._tool_manager.get_tool(DETAIL_TOOL).description
+        else:
+            if mcp._tool_manager.get_tool(DETAIL_TOOL) is not None:
+                mcp._tool_manager.remove_tool(DETAIL_TOOL)
+            details.pop(DETAIL_TOOL, None)
+        tools = mcp._tool_manager.list_tools()
+        changed = True
+
+    if enabled:
+        boilerplate = find_boilerplate(list(details.values()), options.get('boilerplate_min_tools', 0))
+        boilerplate_set = set(boilerplate)
+        max_bytes = options.get('max_bytes', 0) or 0
+        targets = {name: compact_description(text, boilerplate_set, max_bytes) for name, text in details.items()}
+        notes = [RETURNS_NOTE, f"工具说明已压缩，需要参数细节、返回值格式或注意事项时可调用 {DETAIL_TOOL} 查看完整说明。"]
+        if boilerplate:
+            notes.append("以下说明适用于多个工具：")
+            notes.extend(f"- {line}" for line in boilerplate)
+        mcp._mcp_server.instructions = '\n'.join(notes)
+    else:
+        targets = dict(details)
+        mcp._mcp_server.instructions = None
+
+    for tool in tools:
+        target = targets.get(tool.name, tool.description)
+        if tool.description != target:
+            tool.description = target
+            changed = True
+    mcp._compacted_descriptions = targets if enabled else {}
+
+    if changed:
+        before = sum(_json_size(text) for text in details.values())
+        after = sum(_json_size(targets[name]) for name in details)
+        logger.info(f"工具说明{'已压缩' if enabled else '已恢复完整版本'}：{len(details)} 个工具，"
+                    f"说明共 {before} 字节 -> {after} 字节")
+    return changed
+
+def _register_detail_tool(mcp):
+    from handle.missing_params import ask_on_missing
+
+    @mcp.tool()
+    @ask_on_missing('tool_name')
+    def get_tool_detail(tool_name: str = None) -> dict:
+        """查看工具的完整说明。工具列表中的说明为压缩版本，需要参数细节、返回值格式或注意事项时调用该工具
+        Args:
+            tool_name (str): 工具名称，必须
+        Returns:
+            dict: 包含操作结果的字典，格式为:
+                {
+                    "success": bool,  # 是否成功
+                    "result": str     # 工具的完整说明
+                }
+        """
+        detail = getattr(mcp, '_tool_details', {}).get(tool_name)
+        if detail is None:
+            return {"success": False, "result": f"没有找到工具 {tool_name}"}
+        return {"success": True, "result": detail}
+
+async def _tools_list_size(mcp) -> int:
+    from mcp import types
+    result = types.ListToolsResult(tools=await mcp.list_tools())
+    return _size(json.dumps(result.model_dump(by_alias=True, mode='json', exclude_none=True), ensure_ascii=False))
+
+async def _report(mcp, config: dict):
+    """对比完整说明与压缩说明的 tools/list 字节数（不含 get_tool_detail 工具自身）"""
+    options = dict(config.get('tool_description') or {})
+    compact_tools(mcp, dict(config, tool_description=dict(options, compact=False)))
+    full = await _tools_list_size(mcp)
+    compact_tools(mcp, dict(config, tool_description=dict(options, compact=True)))
+    details = mcp._tool_details
+    mcp._tool_manager.remove_tool(DETAIL_TOOL)
+    compacted = await _tools_list_size(mcp)
+    print(f"{'工具':<36}{'完整说明':>10}{'压缩后':>10}  (字节)")
+    for tool in mcp._tool_manager.list_tools():
+        print(f"{tool.name:<36}{_json_size(details.get(tool.name)):>10}{_json_size(tool.description):>10}")
+    print(f"tools/list：{full} 字节 -> {compacted} 字节（减少 {(full - compacted) / full * 100:.1f}%），"
+          f"每个工具说明最多 {options.get('max_bytes', 0) or '不限'} 字节")
+    print(f"服务说明（instructions）{_json_size(mcp._mcp_server.instructions)} 字节：")
+    print(mcp._mcp_server.instructions)
+
+if __name__ == "__main__":
+    import os
+    import asyncio
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from handle.loader import load_config
+    from services.register import create_server
+    asyncio.run(_report(create_server(), load_config()))
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+工具清单：注册进程完成工具注册后，把 initialize 与 tools/list 的结果保存到缓存目录
+
+管道启动时读取清单，服务端的握手与工具列表请求不必等待注册进程导入全部工具模块即可应答，
+工具调用仍然转发给注册进程。清单以源码哈希为键，工具源码、mcp 版本或平台变化后自动失效；
+同时记录生成时 config.yaml 中 utils 段的工具开关与 tool_description 段的说明压缩配置，变化后同样失效。
+
+手动生成（发布前构建）：
+    python -m handle.tool_manifest
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+from importlib import metadata
+from handle.path import get_cache_dir
+from handle.bundle import bundle_info
+
+logger = logging.getLogger('工具清单')
+
+# 清单文件名（位于缓存目录）
+MANIFEST_FILE = 'tool_manifest.json'
+MANIFEST_VERSION = 1
+# 参与源码哈希的目录：工具实现、注册逻辑与参数装饰器
+SOURCE_DIRS = ('services', 'utils', 'handle')
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _source_files() -> list:
+    files = []
+    for directory in SOURCE_DIRS:
+        for base, dirs, names in os.walk(os.path.join(_ROOT, directory)):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            files.extend(os.path.join(base, name) for name in sorted(names) if name.endswith('.py'))
+    return files
+
+def source_hash() -> str:
+    """工具源码哈希：各源码文件的相对路径与内容 + mcp 版本 + 平台
+
+    以打包文件运行时使用打包时记录的源码哈希。
+    """
+    digest = hashlib.sha256()
+    info = bundle_info()
+    if info is not None:
+        digest.update(info['source_hash'].encode('utf-8'))
+    else:
+        for path in _source_files():
+            digest.update(os.path.relpath(path, _ROOT).replace(os.sep, '/').encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    try:
+        digest.update(metadata.version('mcp').encode('utf-8'))
+    except metadata.PackageNotFoundError:
+        pass
+    digest.update(sys.platform.encode('utf-8'))
+    return digest.hexdigest()
+
+def _tool_flags(config: dict) -> str:
+    """决定注册哪些工具（utils 段）及工具说明内容（tool_description 段）的配置，序列化后用于比较"""
+    flags = {'utils': config.get('utils') or {}, 'tool_description': config.get('tool_description') or {}}
+    return json.dumps(flags, sort_keys=True, ensure_ascii=False)
+
+def _manifest_path() -> str:
+    return os.path.join(get_cache_dir(), MANIFEST_FILE)
+
+def load_tool_manifest(config: dict):
+    """读取与当前源码、配置一致的工具清单，不存在或已过期时返回 None"""
+    start = time.perf_counter()
+    try:
+        with open(_manifest_path(), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        logger.info("没有可用的工具清单，等待注册进程生成")
+        return None
+    if (manifest.get('version') != MANIFEST_VERSION
+            or manifest.get('flags') != _tool_flags(config)
+            or manifest.get('source_hash') != source_hash()):
+        logger.info("工具清单已过期，等待注册进程重新生成")
+        return None
+    logger.info(f"已加载工具清单：{len(manifest['tools_list']['tools'])} 个工具"
+                f"（耗时 {(time.perf_counter() - start) * 1000:.1f}ms）")
+    return manifest
+
+def initialize_result(manifest: dict, params: dict) -> dict:
+    """按客户端请求的协议版本生成 initialize 结果，与 mcp 的协商规则一致"""
+    requested = (params or {}).get('protocolVersion')
+    if requested not in manifest['protocol_versions']:
+        requested = manifest['latest_protocol_version']
+    return dict(manifest['initialize'], protocolVersion=requested)
+
+async def build_tool_manifest(mcp, config: dict) -> dict:
+    """从已完成注册的 FastMCP 服务生成工具清单"""
+    from mcp import types
+    from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
+    options = mcp._mcp_server.create_initialization_options()
+    initialize = types.InitializeResult(
+        protocolVersion=types.LATEST_PROTOCOL_VERSION,
+        capabilities=options.capabilities,
+        serverInfo=types.Implementation(name=options.server_name, version=options.server_version),
+        instructions=options.instructions,
+    ).model_dump(by_alias=True, mode='json', exclude_none=True)
+    del initialize['protocolVersion']
+    tools_list = types.ListToolsResult(tools=await mcp.list_tools())
+    return {
+        'version': MANIFEST_VERSION,
+        'source_hash': source_hash(),
+        'flags': _tool_flags(config),
+        'created_at': time.time(),
+        'protocol_versions': list(SUPPORTED_PROTOCOL_VERSIONS),
+        'latest_protocol_version': types.LATEST_PROTOCOL_VERSION,
+        'initialize': initialize,
+        'tools_list': tools_list.model_dump(by_alias=True, mode='json', exclude_none=True),
+        # 工具分组：分组名 -> {配置路径, 工具名列表}
+        'groups': getattr(mcp, '_tool_groups', {}),
+    }
+
+async def update_tool_manifest(mcp, config: dict):
+    """清单缺失或过期时重新生成（注册进程启动后调用，写入失败不影响服务）"""
+    if load_tool_manifest(config) is not None:
+        return
+    try:
+        manifest = await build_tool_manifest(mcp, config)
+        # 多个注册进程可能同时生成，先写临时文件再替换
+        path = _manifest_path()
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        logger.info(f"已生成工具清单：{len(manifest['tools_list']['tools'])} 个工具")
+    except Exception as e:
+        logger.warning(f"生成工具清单失败: {e}")
+
+if __name__ == "__main__":
+    import asyncio
+    sys.path.insert(0, _ROOT)
+    from handle.loader import load_config
+    from handle.logger import setup_logging
+    from services.register import create_server
+    setup_logging()
+    asyncio.run(update_tool_manifest(create_server(), load_config()))
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+工具分组热更新：config.yaml 中 utils 段的工具开关修改后，注册进程只重新注册受影响的工具分组，
+并向服务端发送 notifications/tools/list_changed，无需重启注册进程。
+已导入的工具模块保留在进程内，重新启用的分组无需再次导入。
+"""
+
+import anyio
+import asyncio
+import logging
+from mcp.types import JSONRPCMessage, JSONRPCNotification
+from mcp.shared.message import SessionMessage
+from handle.loader import load_config, add_config_listener, remove_config_listener
+
+logger = logging.getLogger('工具热更新')
+
+def _list_changed() -> SessionMessage:
+    return SessionMessage(JSONRPCMessage(
+        JSONRPCNotification(jsonrpc='2.0', method='notifications/tools/list_changed')
+    ))
+
+async def watch_tool_groups(mcp, write_stream):
+    """等待配置变化，同步工具分组并通知服务端（与 MCP 服务运行在同一事件循环中）"""
+    from services.register import sync_tool_groups
+    from handle.tool_manifest import update_tool_manifest
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+
+    def _on_change(config):
+        # 在配置监听线程中调用，转交到服务所在的事件循环
+        try:
+            loop.call_soon_threadsafe(changed.set)
+        except RuntimeError:
+            pass
+
+    add_config_listener(_on_change)
+    try:
+        while True:
+            await changed.wait()
+            changed.clear()
+            config = load_config()
+            if not config.get('startup', {}).get('hot_reload', True):
+                continue
+            try:
+                if not sync_tool_groups(mcp):
+                    continue
+            except Exception as e:
+                logger.error(f"更新工具分组失败: {e}")
+                continue
+            await write_stream.send(_list_changed())
+            logger.info(f"工具列表已更新，当前 {len(mcp._tool_manager.list_tools())} 个工具，已通知服务端")
+            # 同步更新工具清单，下次启动管道时直接使用
+            await update_tool_manifest(mcp, config)
+    finally:
+        remove_config_listener(_on_change)
+
+async def serve_stdio(mcp):
+    """以标准输入输出运行 MCP 服务（同 mcp.run(transport="stdio")），同时监听工具开关变化"""
+    from mcp.server.stdio import stdio_server
+    async with stdio_server() as (read_stream, write_stream):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(watch_tool_groups, mcp, write_stream)
+            await mcp._mcp_server.run(
+                read_stream,
+                write_stream,
+                mcp._mcp_server.create_initialization_options(),
+            )
+            tg.cancel_scope.cancel()
\ No newline at end of file
@@ -1,14 +1,37 @@
+import os
+import json
+import time
 import logging
+import threading
 import requests
 from handle.loader import load_config
+from handle.path import get_cache_dir
 from handle.identifier import get_device_headers
-from requests.exceptions import SSLError, ConnectionError, Timeout
 
 logger = logging.getLogger('版本检查')
 
+VERSION_URL = 'https://qaqbuyan.com:88/乔安模块/?mk=sj&id=mcp-client'
+# 版本信息缓存文件名（位于缓存目录）
+CACHE_FILE = 'version.json'
+# 版本信息缓存有效期（秒），可由配置 version_check.ttl 覆盖
+DEFAULT_TTL = 3600
+
+# 版本信息缓存：{fetched_at, etag, last_modified, data}，首次使用时从磁盘读取
+_cache = None
+_cache_loaded = False
+# 同一时间只有一个线程请求版本服务器
+_fetch_lock = threading.Lock()
+
+class _StatusError(Exception):
+    """版本服务器返回了非 200/304 的状态码"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"请求返回非 200 状态码: {status_code}")
+        self.status_code = status_code
+
 def _get_friendly_error_message(error: Exception) -> str:
     """将网络请求异常转换为用户友好的提示信息"""
-    if isinstance(error, SSLError):
+    if isinstance(error, requests.exceptions.SSLError):
         cert_error = getattr(error, 'reason', None) or str(error)
         # 检查是否为证书过期
         if 'certificate has expired' in str(cert_error):
@@ -25,12 +48,12 @@ def _get_friendly_error_message(error: Exception) -> str:
             "无法获取版本信息：连接版本服务器时出现 SSL 错误。"
             "请检查网络环境或联系开发者。"
         )
-    if isinstance(error, ConnectionError):
+    if isinstance(error, requests.exceptions.ConnectionError):
         return (
             "无法获取版本信息：无法连接到版本服务器。"
             "请检查网络连接是否正常，或稍后重试。"
         )
-    if isinstance(error, Timeout):
+    if isinstance(error, requests.exceptions.Timeout):
         return (
             "无法获取版本信息：连接版本服务器超时。"
             "请检查网络连接是否正常，或稍后重试。"
@@ -41,142 +64,232 @@ def _get_friendly_error_message(error: Exception) -> str:
         "如果问题持续存在，请联系开发者。"
     )
 
-def get_version(all_version: bool = False) -> dict:
-    logger.info("进行获取版本更新...")
-    config = load_config()
-    current_version = config['version']
+def _cache_path() -> str:
+    return os.path.join(get_cache_dir(), CACHE_FILE)
+
+def _load_cache():
+    global _cache, _cache_loaded
+    if not _cache_loaded:
+        _cache_loaded = True
+        try:
+            with open(_cache_path(), encoding='utf-8') as f:
+                record = json.load(f)
+            if isinstance(record, dict) and 'data' in record and 'fetched_at' in record:
+                _cache = record
+        except (OSError, ValueError):
+            pass
+    return _cache
+
+def _save_cache(record: dict):
+    global _cache
+    _cache = record
+    try:
+        path = _cache_path()
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"写入版本信息缓存失败: {e}")
+
+def _is_fresh(record: dict, config: dict) -> bool:
+    ttl = (config.get('version_check') or {}).get('ttl', DEFAULT_TTL)
+    return time.time() - record['fetched_at'] < ttl
+
+def _fetch(config: dict) -> dict:
+    """请求版本服务器并更新缓存，带上缓存的 ETag / Last-Modified 做条件请求
+
+    Returns:
+        最新的缓存记录（304 时沿用缓存的数据，只刷新获取时间）
+    """
+    cached = _load_cache()
     user_agent = config.get('user_agent')
-    url = 'https://qaqbuyan.com:88/乔安模块/?mk=sj&id=mcp-client'
     headers = {}
     if user_agent:
         headers['User-Agent'] = user_agent
     headers['x-requested-with'] = 'XMLHttpRequest'
     headers.update(get_device_headers())
+    if cached is not None:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    response = requests.get(VERSION_URL, headers=headers, timeout=5)
+    if response.status_code == 304 and cached is not None:
+        logger.info("版本信息未变化，沿用缓存")
+        record = dict(cached, fetched_at=time.time())
+    elif response.status_code == 200:
+        record = {
+            'fetched_at': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'data': response.json(),
+        }
+        if cached is not None and cached['data'] != record['data']:
+            logger.info("版本信息已更新")
+    else:
+        raise _StatusError(response.status_code)
+    _save_cache(record)
+    return record
+
+def _revalidate():
+    """后台重新验证过期的缓存，已有请求在进行时跳过"""
+    if not _fetch_lock.acquire(blocking=False):
+        return
     try:
-        response = requests.get(url, headers=headers, timeout=5)
-        # 检查状态码
-        if response.status_code == 200:
-            response.raise_for_status()
-            json_data = response.json()
-            # 检查服务器返回的状态码
-            api_code = json_data.get('code')
-            if api_code is not None and api_code < 0:
-                # API 返回了错误码（如 code=-4, message="没有这个版本"）
-                api_msg = json_data.get('message', '未知错误')
-                error_msg = f"版本服务器返回错误: {api_msg}(code={api_code})"
-                logger.error(error_msg)
-                return {
-                    "error": error_msg,
-                    "current_version": config.get('version', 'unknown'),
-                    "latest_version": None
-                }
-            # 检查版本是否一致
-            messages = json_data.get('message', [])
-            if not isinstance(messages, list):
-                error_msg = f"版本服务器返回的 message 格式异常: {messages}"
-                logger.error(error_msg)
-                return {
-                    "error": error_msg,
-                    "current_version": config.get('version', 'unknown'),
-                    "latest_version": None
-                }
-            if all_version:
-                all_updates = []
-                for message in messages:
-                    if isinstance(message, dict):
-                        version_str = message.get('version')
-                        version_number, _, version_type = version_str.partition('-')
-                        update_info = {
-                            "version": version_str,
-                            "type": message.get('type', ''),
-                            "content": message.get('content', ''),
-                            "requirements": message.get('requirements', ''),
-                            "time": message.get('time', ''),
-                            "link": message.get('link', ''),
-                            "size": message.get('size', ''),
-                            "hash": message.get('hash', '')
-                        }
-                        all_updates.append(update_info)
-                # 找出最新版本
-                latest_version = None
-                if all_updates:
-                    latest = max(all_updates, key=lambda x: x["version"].partition('-')[0])
-                    latest_version = f"{latest['version'].partition('-')[0]}-{latest['type'].lower()}" if latest['type'] else latest['version']
-                result = {
-                    "current_version": current_version,
-                    "latest_version": latest_version,
-                    "all_updates": all_updates
+        _fetch(load_config())
+    except (requests.RequestException, _StatusError) as e:
+        logger.warning(f"后台更新版本信息失败，继续使用缓存: {e}")
+    finally:
+        _fetch_lock.release()
+
+def _get_record(config: dict) -> dict:
+    """获取版本信息缓存记录
+
+    缓存未过期时直接返回；已过期时先返回旧数据，同时在后台重新验证；
+    没有缓存时才同步请求版本服务器。
+    """
+    record = _load_cache()
+    if record is not None:
+        if not _is_fresh(record, config):
+            threading.Thread(target=_revalidate, name='版本检查', daemon=True).start()
+        return record
+    with _fetch_lock:
+        # 等待期间其他线程可能已经完成请求
+        record = _load_cache()
+        if record is not None:
+            return record
+        return _fetch(config)
+
+def _build_result(json_data: dict, all_version: bool, config: dict) -> dict:
+    """根据版本服务器返回的数据生成版本信息"""
+    current_version = config['version']
+    # 检查服务器返回的状态码
+    api_code = json_data.get('code')
+    if api_code is not None and api_code < 0:
+        # API 返回了错误码（如 code=-4, message="没有这个版本"）
+        api_msg = json_data.get('message', '未知错误')
+        error_msg = f"版本服务器返回错误: {api_msg}(code={api_code})"
+        logger.error(error_msg)
+        return {
+            "error": error_msg,
+            "current_version": config.get('version', 'unknown'),
+            "latest_version": None
+        }
+    # 检查版本是否一致
+    messages = json_data.get('message', [])
+    if not isinstance(messages, list):
+        error_msg = f"版本服务器返回的 message 格式异常: {messages}"
+        logger.error(error_msg)
+        return {
+            "error": error_msg,
+            "current_version": config.get('version', 'unknown'),
+            "latest_version": None
+        }
+    if all_version:
+        all_updates = []
+        for message in messages:
+            if isinstance(message, dict):
+                version_str = message.get('version')
+                version_number, _, version_type = version_str.partition('-')
+                update_info = {
+                    "version": version_str,
+                    "type": message.get('type', ''),
+                    "content": message.get('content', ''),
+                    "requirements": message.get('requirements', ''),
+                    "time": message.get('time', ''),
+                    "link": message.get('link', ''),
+                    "size": message.get('size', ''),
+                    "hash": message.get('hash', '')
                 }
-                logger.info(f"返回数据: {result}")
-                return result
+                all_updates.append(update_info)
+        # 找出最新版本
+        latest_version = None
+        if all_updates:
+            latest = max(all_updates, key=lambda x: x["version"].partition('-')[0])
+            latest_version = f"{latest['version'].partition('-')[0]}-{latest['type'].lower()}" if latest['type'] else latest['version']
+        result = {
+            "current_version": current_version,
+            "latest_version": latest_version,
+            "all_updates": all_updates
+        }
+        logger.info(f"返回数据: {result}")
+        return result
+    else:
+        latest_version = None
+        latest_version_number = None
+        latest_content = ""
+        latest_requirements = ""
+        latest_link = ""
+        latest_type = ""
+        latest_size = ""
+        latest_hash = ""
+        # 找出当前版本的依赖信息
+        current_requirements = ""
+        for message in messages:
+            if isinstance(message, dict):
+                version_str = message.get('version')
+                version_number, _, version_type = version_str.partition('-')
+                # 如果找到当前版本的依赖信息
+                if f"{version_number}-{version_type}".lower() == current_version.lower():
+                    current_requirements = message.get('requirements', '')
+                    break
+        # 找出最新版本
+        for message in messages:
+            if isinstance(message, dict):
+                version_str = message.get('version')
+                version_number, _, version_type = version_str.partition('-')
+                original_type = message.get('type', '')
+                if latest_version_number is None or version_number > latest_version_number:
+                    latest_version = f"{version_number}-{original_type.lower()}"
+                    latest_version_number = version_number
+                    latest_version_type = original_type
+                    latest_content = message.get('content', '')
+                    latest_requirements = message.get('requirements', '')
+                    latest_link = message.get('link', '')
+                    latest_type = original_type
+                    latest_size = message.get('size', '')
+                    latest_hash = message.get('hash', '')
             else:
-                latest_version = None
-                latest_version_number = None
-                latest_content = ""
-                latest_requirements = ""
-                latest_link = ""
-                latest_type = ""
-                latest_size = ""
-                latest_hash = ""
-                # 找出当前版本的依赖信息
-                current_requirements = ""
-                for message in messages:
-                    if isinstance(message, dict):
-                        version_str = message.get('version')
-                        version_number, _, version_type = version_str.partition('-')
-                        # 如果找到当前版本的依赖信息
-                        if f"{version_number}-{version_type}".lower() == current_version.lower():
-                            current_requirements = message.get('requirements', '')
-                            break
-                # 找出最新版本
-                for message in messages:
-                    if isinstance(message, dict):
-                        version_str = message.get('version')
-                        version_number, _, version_type = version_str.partition('-')
-                        original_type = message.get('type', '')
-                        if latest_version_number is None or version_number > latest_version_number:
-                            latest_version = f"{version_number}-{original_type.lower()}"
-                            latest_version_number = version_number
-                            latest_version_type = original_type
-                            latest_content = message.get('content', '')
-                            latest_requirements = message.get('requirements', '')
-                            latest_link = message.get('link', '')
-                            latest_type = original_type
-                            latest_size = message.get('size', '')
-                            latest_hash = message.get('hash', '')
-                    else:
-                        logger.warning(f"版本数据中遇到非字典项: {type(message).__name__} = {message}")
-                        continue
-                if latest_version and (latest_version != current_version):
-                    logger.info(f"当前版本: {current_version}")
-                    msg = f"发现新版本: {latest_version}"
-                    logger.info(msg)
-                    result = {
-                        "current_version": current_version,
-                        "latest_version": latest_version,
-                        "update_log": latest_content,
-                        "current_requirements": current_requirements,
-                        "latest_requirements": latest_requirements,
-                        "type": latest_type,
-                        "link": latest_link,
-                        "hash": latest_hash,
-                        "size": latest_size
-                    }
-                    logger.info(f"返回数据: {result}")
-                    return result
-                else:
-                    msg = f"当前版本已是最新版本: {current_version}"
-                    logger.info(msg)
-                    return {
-                        "current_version": current_version,
-                        "message": msg
-                    }
+                logger.warning(f"版本数据中遇到非字典项: {type(message).__name__} = {message}")
+                continue
+        if latest_version and (latest_version != current_version):
+            logger.info(f"当前版本: {current_version}")
+            msg = f"发现新版本: {latest_version}"
+            logger.info(msg)
+            result = {
+                "current_version": current_version,
+                "latest_version": latest_version,
+                "update_log": latest_content,
+                "current_requirements": current_requirements,
+                "latest_requirements": latest_requirements,
+                "type": latest_type,
+                "link": latest_link,
+                "hash": latest_hash,
+                "size": latest_size
+            }
+            logger.info(f"返回数据: {result}")
+            return result
         else:
-            error_msg = f"请求返回非 200 状态码: {response.status_code}"
-            logger.error(error_msg)
+            msg = f"当前版本已是最新版本: {current_version}"
+            logger.info(msg)
             return {
-                "error": error_msg
+                "current_version": current_version,
+                "message": msg
             }
+
+def get_version(all_version: bool = False) -> dict:
+    """获取版本信息（读取缓存，见 _get_record）"""
+    logger.info("进行获取版本更新...")
+    config = load_config()
+    try:
+        record = _get_record(config)
+    except _StatusError as e:
+        error_msg = str(e)
+        logger.error(error_msg)
+        return {
+            "error": error_msg
+        }
     except requests.RequestException as e:
         error_msg = f"请求出错: {e}"
         logger.error(error_msg)
@@ -185,4 +298,9 @@ def get_version(all_version: bool = False) -> dict:
         return {
             "error": friendly_msg,
             "error_detail": f"请求出错: {e}"  # 仅在内部日志记录原始错误
-        }
\ No newline at end of file
+        }
+    return _build_result(record['data'], all_version, config)
+
+def check_version_in_background():
+    """在后台线程中检查版本并输出提示，不阻塞注册进程启动"""
+    threading.Thread(target=get_version, args=(False,), name='版本检查', daemon=True).start()
\ No newline at end of file
@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import signal
+import asyncio
+import logging
+import subprocess
+from handle.ws_utils import translate_ws_error
+
+logger = logging.getLogger('管道代理')
+
+# 子进程管道单行读取上限（tools/list 等响应可能远超 asyncio 默认的 64KB）
+STREAM_LIMIT = 16 * 1024 * 1024
+
+# 当前存活的子进程 pid，供信号处理/atexit 同步清理
+_child_pids = set()
+
+class McpChild:
+    """MCP 注册子进程
+
+    生命周期与 WebSocket 连接解耦：连接断开时子进程保持运行，
+    重连后重新挂接，并用缓存的 initialize 结果应答服务端的握手。
+    """
+
+    def __init__(self, script: str):
+        self.script = script
+        self.process = None
+        # 首次握手时服务端发来的 initialize 参数，提升备用进程时用于重放握手
+        self.initialize_params = None
+        # 首次握手时子进程返回的 initialize 结果，重连时直接回放
+        self.initialize_result = None
+        # 已转发给子进程、尚未收到响应的请求：id -> method
+        self.pending = {}
+        self._stderr_task = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def initialized(self) -> bool:
+        return self.initialize_result is not None
+
+    async def start(self):
+        """启动子进程并开始转发其标准错误输出"""
+        env = os.environ.copy()
+        from handle.path import get_config_path
+        env['MCP_CONFIG_PATH'] = get_config_path()
+
+        kwargs = {}
+        if sys.platform == 'win32':
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            startupinfo.wShowWindow = subprocess.SW_HIDE
+
+            creationflags = subprocess.CREATE_NEW_PROCESS_GROUP
+            if hasattr(subprocess, 'CREATE_NO_WINDOW'):
+                creationflags |= subprocess.CREATE_NO_WINDOW
+            kwargs.update(startupinfo=startupinfo, creationflags=creationflags)
+
+        self.process = await asyncio.create_subprocess_exec(
+            'python', self.script,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            limit=STREAM_LIMIT,
+            env=env,
+            **kwargs
+        )
+        _child_pids.add(self.process.pid)
+        self.initialize_params = None
+        self.initialize_result = None
+        self.pending.clear()
+        # stderr 必须持续读取，否则子进程日志写满管道后会阻塞
+        from handle.ws_pipe import pipe_process_stderr_to_terminal
+        self._stderr_task = asyncio.create_task(pipe_process_stderr_to_terminal(self.process))
+        logger.info("已启动注册进程")
+
+    async def send(self, data: bytes):
+        """写入一行到子进程 stdin，等待缓冲排空形成背压"""
+        self.process.stdin.write(data + b'\n')
+        await self.process.stdin.drain()
+
+    async def readline(self) -> bytes:
+        """从子进程 stdout 读取一行，进程结束时返回空字节"""
+        return await self.process.stdout.readline()
+
+    async def request(self, message: dict) -> dict:
+        """直接向子进程发送请求并等待对应 id 的响应
+
+        仅在子进程尚未挂接到管道时使用（备用进程探活、重放握手）。
+        """
+        await self.send(json.dumps(message, ensure_ascii=False).encode('utf-8'))
+        while True:
+            data_bytes = await self.readline()
+            if not data_bytes:
+                raise ConnectionError("注册进程已退出")
+            try:
+                data = json.loads(data_bytes)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict) and data.get('id') == message['id']:
+                return data
+
+    async def wait_ready(self):
+        """发送 ping 等待子进程完成注册（MCP 允许在初始化前响应 ping）"""
+        await self.request({"jsonrpc": "2.0", "id": "__proxy_probe__", "method": "ping"})
+
+    async def replay_initialize(self, params: dict):
+        """用缓存的握手参数初始化子进程，使其可以直接接管现有会话"""
+        response = await self.request({
+            "jsonrpc": "2.0",
+            "id": "__proxy_initialize__",
+            "method": "initialize",
+            "params": params,
+        })
+        self.initialize_params = params
+        self.initialize_result = response.get('result')
+        await self.send(json.dumps({
+            "jsonrpc": "2.0",
+            "method": "notifications/initialized",
+        }).encode('utf-8'))
+
+    async def stop(self):
+        """终止子进程"""
+        if self.process is None:
+            return
+        try:
+            if self.process.returncode is None:
+                logger.info("正在终止进程")
+                try:
+                    self.process.terminate()
+                    await asyncio.wait_for(self.process.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    self.process.kill()
+                    await asyncio.wait_for(self.process.wait(), timeout=2)
+                logger.info("进程已终止")
+        except Exception as e:
+            logger.error(f"清理进程时出错: {translate_ws_error(e)}")
+        finally:
+            _child_pids.discard(self.process.pid)
+            if self._stderr_task is not None:
+                self._stderr_task.cancel()
+
+def terminate_all_children():
+    """同步终止所有子进程（信号处理器与 atexit 中调用，事件循环可能已不可用）"""
+    for pid in list(_child_pids):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+        _child_pids.discard(pid)
\ No newline at end of file
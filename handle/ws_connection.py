@@ -1,103 +1,154 @@
-import os
 import ssl
-import random
 import asyncio
 import logging
-import subprocess
 import websockets
 from handle.ws_utils import (
-    is_ssl_error, is_self_signed_cert_error, is_dns_error,
-    translate_ws_error, log_dns_guidance, log_ssl_guidance, cleanup_all_processes,
+    is_ssl_error, is_dns_error,
+    translate_ws_error, log_dns_guidance, log_ssl_guidance,
 )
+from handle.ws_pool import ChildPool
+from handle.ws_outbox import Outbox
+from handle.startup_profile import profiler
+from handle.ws_dialer import open_connection, set_dns_cache_ttl
+from handle.ws_reconnect import ReconnectScheduler, FATAL
+from handle.ws_queue import MessageQueue, POLICY_BLOCK, POLICY_REJECT
 from handle.ws_pipe import (
-    pipe_websocket_to_process, pipe_process_to_websocket, pipe_process_stderr_to_terminal,
+    EndpointSession, pipe_websocket_to_queue, pipe_queue_to_process,
+    pipe_process_to_queue, pipe_queue_to_websocket, fail_pending_requests, reset_child_handshake,
 )
 
 logger = logging.getLogger('管道代理')
 
 # ---------- 连接状态 ----------
-reconnect_attempt = 0
-backoff = 1
 INITIAL_BACKOFF = 1
 MAX_BACKOFF = 60
+# 服务端正常关闭连接后第一次重连的等待时间（秒）
+FAST_RETRY = 0.2
+# 致命错误熔断后的冷却时间（秒）与停止重连前允许的连续熔断次数
+BREAKER_COOLDOWN = 300
+FATAL_LIMIT = 3
 mcp_script = None
+# 常驻的注册子进程，跨 WebSocket 重连复用
+_child = None
+# 子进程可用标志，切换子进程期间清除
+_child_ready = asyncio.Event()
+# 服务端握手时发来的 initialize 参数，换用子进程时用于重放握手
+_session_params = None
+# 备用子进程池及其大小
+_pool = None
+STANDBY_SIZE = 0
+# 工具服务运行方式：process（独立子进程）、pool（独立子进程 + 备用进程池）或 inprocess（管道进程内）
+TRANSPORT_MODE = 'process'
+# 各端点共享的入站队列（WebSocket → 子进程）
+_inbound = MessageQueue('入站', policy=POLICY_REJECT)
+# 出站队列（子进程 → WebSocket）的配置，每个端点一个队列
+_outbound_options = None
+# 端点地址 -> 会话
+_sessions = {}
+# 每个端点的响应发件箱上限：总大小（字节）与保存时间（秒）
+OUTBOX_MAX_BYTES = 16 * 1024 * 1024
+OUTBOX_MAX_AGE = 300
+# 队列统计日志输出间隔（秒），0 表示不输出
+QUEUE_STATS_INTERVAL = 60
+# 与连接无关、常驻运行的子进程收发任务
+_bridge_tasks = []
 
 def set_config(config: dict):
-    """从配置中初始化重连参数"""
-    global INITIAL_BACKOFF, MAX_BACKOFF, reconnect_attempt, backoff
-    reconnect_attempt = config['reconnection']['reconnect_attempt']
-    backoff = config['reconnection']['backoff']
-    INITIAL_BACKOFF = config['reconnection']['initial_backoff']
-    MAX_BACKOFF = config['reconnection']['max_backoff']
+    """从配置中初始化重连、备用进程、传输模式与消息队列参数"""
+    global INITIAL_BACKOFF, MAX_BACKOFF, FAST_RETRY, BREAKER_COOLDOWN, FATAL_LIMIT
+    global STANDBY_SIZE, TRANSPORT_MODE, _inbound, _outbound_options, QUEUE_STATS_INTERVAL
+    global OUTBOX_MAX_BYTES, OUTBOX_MAX_AGE
+    reconnection = config['reconnection']
+    INITIAL_BACKOFF = reconnection['initial_backoff']
+    MAX_BACKOFF = reconnection['max_backoff']
+    FAST_RETRY = reconnection.get('fast_retry', FAST_RETRY)
+    BREAKER_COOLDOWN = reconnection.get('breaker_cooldown', BREAKER_COOLDOWN)
+    FATAL_LIMIT = reconnection.get('fatal_limit', FATAL_LIMIT)
+    set_dns_cache_ttl(reconnection.get('dns_cache_ttl', 300))
+    TRANSPORT_MODE = (config.get('transport') or {}).get('mode') or 'process'
+    # 备用进程池为实验性功能，只在 pool 模式下预启动备用子进程
+    STANDBY_SIZE = (config.get('pool') or {}).get('standby', 0) if TRANSPORT_MODE == 'pool' else 0
+    queue_config = config.get('queue') or {}
+    _inbound = _create_queue('入站', queue_config.get('inbound'), POLICY_REJECT)
+    _outbound_options = queue_config.get('outbound')
+    QUEUE_STATS_INTERVAL = queue_config.get('stats_interval', 60)
+    outbox_config = config.get('outbox') or {}
+    OUTBOX_MAX_BYTES = int(outbox_config.get('max_size_mb', 16) * 1024 * 1024)
+    OUTBOX_MAX_AGE = outbox_config.get('max_age', 300)
+
+def _create_queue(name: str, options: dict, default_policy: str) -> MessageQueue:
+    """按配置创建消息队列"""
+    options = options or {}
+    return MessageQueue(
+        name,
+        high_watermark=options.get('high_watermark', 256),
+        low_watermark=options.get('low_watermark'),
+        policy=options.get('policy') or default_policy,
+    )
 
 def set_mcp_script(script_path: str):
     """设置 MCP 脚本路径"""
     global mcp_script
     mcp_script = script_path
 
+async def connect_endpoints(uris: list) -> int:
+    """同时连接多个端点，所有端点共享同一个注册子进程
+
+    返回值：任一端点因无法重试的错误停止时返回 1
+    """
+    for uri in uris:
+        _get_session(uri)
+    if len(_sessions) > 1:
+        for session in _sessions.values():
+            session.outbound.name = f"出站[{session.name}]"
+    results = await asyncio.gather(*(connect_with_retry(uri) for uri in uris))
+    return max((result or 0 for result in results), default=0)
+
+def _get_session(uri: str) -> EndpointSession:
+    """获取端点会话（首次调用时创建）"""
+    session = _sessions.get(uri)
+    if session is None:
+        outbound = _create_queue('出站', _outbound_options, POLICY_BLOCK)
+        outbox = Outbox(OUTBOX_MAX_BYTES, OUTBOX_MAX_AGE)
+        session = EndpointSession(f"端点{len(_sessions) + 1}", outbound, outbox)
+        session.scheduler = ReconnectScheduler(
+            INITIAL_BACKOFF, MAX_BACKOFF, FAST_RETRY, BREAKER_COOLDOWN, FATAL_LIMIT
+        )
+        _sessions[uri] = session
+    return session
+
 async def connect_with_retry(uri):
-    """带重试机制的WebSocket服务器连接"""
-    global reconnect_attempt, backoff
+    """带重试机制的WebSocket服务器连接，退避与熔断由端点的重连调度器决定"""
+    session = _get_session(uri)
+    scheduler = session.scheduler
     while True:
         try:
-            if reconnect_attempt > 0:
-                wait_time = backoff * (1 + random.random() * 0.1)
-                logger.info(f"等待 {wait_time:.2f} 秒后进行第 {reconnect_attempt} 次重连尝试...")
-                await asyncio.sleep(wait_time)
             await connect_to_server(uri)
-        except ssl.SSLError as e:
-            reconnect_attempt += 1
-            logger.warning(f"连接关闭(尝试次数: {reconnect_attempt}): {translate_ws_error(e)}")
-            if is_self_signed_cert_error(e):
-                log_ssl_guidance()
-                logger.error("自签名证书链错误无法通过重试解决，停止连接")
-                return 1
-            log_ssl_guidance()
-            backoff = min(backoff * 2, MAX_BACKOFF)
-        except websockets.exceptions.WebSocketException as e:
-            reconnect_attempt += 1
-            error_str = str(e)
-            if is_self_signed_cert_error(e):
-                log_ssl_guidance()
-                logger.error("自签名证书链错误无法通过重试解决，停止连接")
-                return 1
-            if is_dns_error(e):
-                log_dns_guidance()
-                logger.error("DNS 解析失败无法通过重试解决，停止连接")
-                return 1
-            if is_ssl_error(e):
-                log_ssl_guidance()
-            logger.warning(f"连接关闭(尝试次数: {reconnect_attempt}): {translate_ws_error(error_str)}")
-            if 'timed out' in error_str:
-                backoff = INITIAL_BACKOFF
-            else:
-                backoff = min(backoff * 2, MAX_BACKOFF)
+            # 连接总以异常结束，正常返回时按服务端正常关闭处理
+            error = websockets.exceptions.ConnectionClosedOK(None, None)
         except Exception as e:
-            reconnect_attempt += 1
-            error_str = str(e)
-            if is_self_signed_cert_error(e):
-                log_ssl_guidance()
-                logger.error("自签名证书链错误无法通过重试解决，停止连接")
-                return 1
-            if is_dns_error(e):
-                log_dns_guidance()
-                logger.error("DNS 解析失败无法通过重试解决，停止连接")
-                return 1
-            if is_ssl_error(e):
-                log_ssl_guidance()
-            logger.warning(f"连接关闭(尝试次数: {reconnect_attempt}): {translate_ws_error(error_str)}")
-            if 'timed out' in error_str:
-                backoff = INITIAL_BACKOFF
-            else:
-                backoff = min(backoff * 2, MAX_BACKOFF)
+            error = e
+        kind, delay = scheduler.failed(error)
+        logger.warning(f"{session.label}连接关闭(尝试次数: {scheduler.attempt}): {translate_ws_error(error)}")
+        if is_dns_error(error):
+            log_dns_guidance()
+        elif is_ssl_error(error):
+            log_ssl_guidance()
+        if delay is None:
+            logger.error(f"{session.label}连续 {scheduler.fatal_count} 次遇到无法通过重试解决的错误，停止连接")
+            return 1
+        if kind == FATAL:
+            logger.error(f"{session.label}该错误无法通过立即重试解决，暂停重连 {delay:.0f} 秒后再试")
+        logger.info(f"{session.label}等待 {delay:.2f} 秒后进行第 {scheduler.attempt} 次重连尝试...")
+        await asyncio.sleep(delay)
 
 async def connect_to_server(uri, on_process_end=None):
     """连接到WebSocket服务器并与`mcp_script`进程建立双向通信"""
-    global reconnect_attempt, backoff
+    session = _get_session(uri)
     try:
-        logger.info("正在连接WebSocket服务器...")
+        logger.info(f"{session.label}正在连接WebSocket服务器...")
         try:
-            websocket = await websockets.connect(uri, open_timeout=5)
+            websocket = await open_connection(uri, open_timeout=5, label=session.label)
         except ssl.SSLCertVerificationError as e:
             log_ssl_guidance()
             raise
@@ -112,63 +163,161 @@ async def connect_to_server(uri, on_process_end=None):
                 log_dns_guidance()
             raise
         async with websocket:
-            logger.info("成功连接到WebSocket服务器")
-            reconnect_attempt = 0
-            backoff = INITIAL_BACKOFF
-            env = os.environ.copy()
-            from handle.path import get_config_path
-            env['MCP_CONFIG_PATH'] = get_config_path()
-            
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-            creationflags = subprocess.CREATE_NEW_PROCESS_GROUP
-            if hasattr(subprocess, 'CREATE_NO_WINDOW'):
-                creationflags |= subprocess.CREATE_NO_WINDOW
-            
-            process = subprocess.Popen(
-                ['python', mcp_script],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                encoding=None,
-                text=False,
-                env=env,
-                startupinfo=startupinfo,
-                creationflags=creationflags
-            )
-            logger.info("已启动注册进程")
-            await asyncio.gather(
-                pipe_websocket_to_process(websocket, process),
-                pipe_process_to_websocket(process, websocket, on_process_end),
-                pipe_process_stderr_to_terminal(process, on_process_end)
-            )
+            logger.info(f"{session.label}成功连接到WebSocket服务器")
+            profiler.mark('首次连接')
+            profiler.report()
+            attempts = session.scheduler.attempt
+            recovery = session.scheduler.connected()
+            if recovery is not None:
+                stats = session.scheduler.recovery_stats()
+                logger.info(
+                    f"{session.label}连接已恢复，距断开 {recovery:.2f} 秒（重试 {attempts} 次，"
+                    f"平均恢复 {stats['avg']:.2f} 秒，最长 {stats['max']:.2f} 秒）"
+                )
+            if _child is not None and _child.alive:
+                logger.info("复用已运行的注册进程")
+            if len(session.outbound):
+                logger.info(f"{session.label}补发断开期间未送达的 {len(session.outbound)} 条响应")
+            _start_bridge(on_process_end)
+            session.websocket = websocket
+            session.outbound.reopen()
+            session.connected = True
+            try:
+                await _run_pipes(
+                    pipe_websocket_to_queue(websocket, session, _inbound, _get_child),
+                    pipe_queue_to_websocket(session.outbound, websocket, session.outbox),
+                )
+            finally:
+                session.connected = False
+                session.websocket = None
+                # 唤醒因出站队列已满而等待的子进程输出任务，避免阻塞其他端点
+                session.outbound.close()
+    except websockets.exceptions.ConnectionClosedOK as e:
+        logger.info(f"{session.label}服务端关闭了WebSocket连接: {translate_ws_error(e)}")
+        raise
     except websockets.exceptions.ConnectionClosed as e:
-        logger.error(f"WebSocket连接关闭: {translate_ws_error(e)}")
+        logger.error(f"{session.label}WebSocket连接关闭: {translate_ws_error(e)}")
         raise
     except Exception as e:
-        logger.error(f"连接错误: {translate_ws_error(e)}")
+        logger.error(f"{session.label}连接错误: {translate_ws_error(e)}")
         raise
-    finally:
-        try:
-            if 'process' in locals() and process.poll() is None:
-                logger.info("正在终止进程")
-                try:
-                    process.terminate()
-                    process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    process.kill()
-                    process.wait(timeout=2)
-                logger.info("进程已终止")
-        except Exception as cleanup_error:
-            logger.error(f"清理进程时出错: {translate_ws_error(cleanup_error)}")
 
+def _start_bridge(on_process_end=None):
+    """启动子进程收发任务（仅首次连接时启动，之后跨重连常驻）"""
+    if _bridge_tasks:
+        return
+    _bridge_tasks.append(asyncio.create_task(_supervise_child(on_process_end)))
+    _bridge_tasks.append(asyncio.create_task(pipe_queue_to_process(_inbound, _get_child)))
+    if QUEUE_STATS_INTERVAL:
+        _bridge_tasks.append(asyncio.create_task(_report_queue_stats()))
+
+async def _supervise_child(on_process_end=None):
+    """维持各端点共享的子进程，并将其输出写入对应端点的出站队列
+
+    子进程在连接断开后保持运行，退出时立即提升备用进程接管；
+    未完成握手即退出多为脚本或环境错误，按退避间隔重新拉起，避免原地反复重启。
+    """
+    restart_delay = INITIAL_BACKOFF
+    while True:
         try:
-            from utils.music.play import GlobalProcessManager
-            process_manager = GlobalProcessManager()
-            process_manager.cleanup_all_processes()
-        except ImportError:
+            await _replace_child()
+        except Exception as e:
+            logger.error(f"启动注册进程失败: {translate_ws_error(e)}，{restart_delay} 秒后重试")
+            await asyncio.sleep(restart_delay)
+            restart_delay = min(restart_delay * 2, MAX_BACKOFF)
+            continue
+        _child_ready.set()
+        try:
+            await pipe_process_to_queue(_child, on_process_end)
+        except Exception:
             pass
-        except Exception as music_cleanup_error:
-            logger.error(f"清理音乐进程时出错: {translate_ws_error(music_cleanup_error)}")
\ No newline at end of file
+        _child_ready.clear()
+        if _child.initialized:
+            restart_delay = INITIAL_BACKOFF
+            logger.warning("注册进程已退出，切换到备用进程")
+        else:
+            logger.error(f"注册进程未完成初始化即退出，{restart_delay} 秒后重新启动")
+            await asyncio.sleep(restart_delay)
+            restart_delay = min(restart_delay * 2, MAX_BACKOFF)
+
+async def _report_queue_stats():
+    """定期输出队列深度、等待时间与丢弃次数，便于判断瓶颈在服务端还是本机"""
+    last = None
+    while True:
+        await asyncio.sleep(QUEUE_STATS_INTERVAL)
+        queues = [_inbound] + [session.outbound for session in _sessions.values()]
+        current = [(queue.enqueued, len(queue)) for queue in queues]
+        if current == last:
+            continue
+        last = current
+        for queue in queues:
+            logger.info(queue.format_stats())
+
+async def _get_child():
+    """获取当前可用的子进程，切换期间等待新进程就绪"""
+    await _child_ready.wait()
+    return _child
+
+async def _run_pipes(*coros):
+    """并发运行双向管道，任一方向结束即取消其余方向并抛出其异常
+
+    队列与子进程不随连接终止，必须显式取消另一方向，避免旧连接的收发任务
+    与重连后的新管道争抢队列中的消息。
+    """
+    tasks = [asyncio.create_task(coro) for coro in coros]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+
+def _get_pool() -> ChildPool:
+    """获取备用子进程池（首次调用时创建）"""
+    global _pool
+    if _pool is None:
+        _pool = ChildPool(mcp_script, STANDBY_SIZE)
+    return _pool
+
+def start_child_pool():
+    """在连接服务器的同时预启动备用子进程"""
+    if TRANSPORT_MODE == 'inprocess':
+        return
+    _get_pool().fill()
+
+async def _replace_child():
+    """换用备用子进程，并用旧进程缓存的握手参数完成初始化"""
+    global _child, _session_params
+    if _child is not None:
+        # 重放握手失败的进程没有记录参数，沿用上一次会话的参数
+        _session_params = _child.initialize_params or _session_params
+        await fail_pending_requests(_child)
+        await _child.stop()
+        _child = None
+    if TRANSPORT_MODE == 'inprocess':
+        from handle.ws_inprocess import InProcessChild
+        _child = InProcessChild()
+        await _child.start()
+    else:
+        _child = await _get_pool().acquire()
+    if _session_params is not None:
+        await _child.replay_initialize(_session_params)
+    else:
+        # 新进程没有可重放的握手参数，下次服务端握手时由管道重新初始化
+        reset_child_handshake()
+
+async def shutdown_child():
+    """终止常驻的注册子进程及所有备用进程"""
+    global _child
+    for task in _bridge_tasks:
+        task.cancel()
+    await asyncio.gather(*_bridge_tasks, return_exceptions=True)
+    _bridge_tasks.clear()
+    if _child is not None:
+        await _child.stop()
+        _child = None
+    if _pool is not None:
+        await _pool.stop()
\ No newline at end of file
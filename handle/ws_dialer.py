@@ -0,0 +1,180 @@
+import ssl
+import time
+import socket
+import asyncio
+import logging
+import itertools
+import websockets
+from websockets.uri import parse_uri
+from websockets.proxy import get_proxy
+
+logger = logging.getLogger('管道代理')
+
+# DNS 解析结果缓存时间（秒），0 表示不缓存
+DNS_CACHE_TTL = 300
+# 解析到多个地址时，上一个地址在该时间（秒）内未连上就同时尝试下一个（Happy Eyeballs，RFC 8305 建议 0.25 秒）
+CONNECT_ATTEMPT_DELAY = 0.25
+# (主机, 端口) -> (地址列表, 过期时间)
+_dns_cache = {}
+# 主机名 -> 最近一次 TLS 会话，重连时用于会话复用
+_tls_sessions = {}
+_ssl_context = None
+
+class _TimedSSLObject(ssl.SSLObject):
+    """记录 TLS 握手完成时间的 SSLObject，用于区分 TLS 握手与 WebSocket 升级耗时"""
+
+    handshake_done_at = None
+
+    def do_handshake(self):
+        super().do_handshake()
+        self.handshake_done_at = time.perf_counter()
+
+class _ResumingSSLContext(ssl.SSLContext):
+    """在整个进程内复用的 TLS 上下文，握手时带上该主机上一次的会话以跳过完整握手"""
+
+    sslobject_class = _TimedSSLObject
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and not server_side:
+            session = _tls_sessions.get(server_hostname)
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+def get_ssl_context() -> ssl.SSLContext:
+    """获取共享的 TLS 上下文（首次调用时创建，证书校验与 create_default_context 一致）"""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = _ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        _ssl_context.load_default_certs()
+    return _ssl_context
+
+def set_dns_cache_ttl(ttl: float):
+    global DNS_CACHE_TTL
+    DNS_CACHE_TTL = ttl
+
+async def _resolve(host: str, port: int, fresh: bool = False):
+    """解析服务器地址，优先使用未过期的缓存
+
+    Returns:
+        (地址列表, 是否来自缓存)
+    """
+    key = (host, port)
+    cached = _dns_cache.get(key)
+    if not fresh and cached is not None and cached[1] > time.monotonic():
+        return cached[0], True
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        if cached is None:
+            raise
+        # 解析失败时沿用过期的地址，服务器地址通常不会变化
+        logger.warning(f"DNS 解析失败，使用之前缓存的 {host} 地址")
+        return cached[0], True
+    addresses = [(family, address) for family, _, _, _, address in infos]
+    if DNS_CACHE_TTL > 0:
+        _dns_cache[key] = (addresses, time.monotonic() + DNS_CACHE_TTL)
+    return addresses, False
+
+def _interleave(addresses) -> list:
+    """按地址族交替排列（如 IPv6、IPv4 交替），一个地址族不通时尽快尝试另一个"""
+    families = {}
+    for item in addresses:
+        families.setdefault(item[0], []).append(item)
+    return [item for group in itertools.zip_longest(*families.values()) for item in group if item is not None]
+
+async def _connect_address(family, address) -> socket.socket:
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        await loop.sock_connect(sock, address)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+async def _tcp_connect(addresses) -> socket.socket:
+    """错开尝试解析到的地址建立 TCP 连接，使用最先连上的连接
+
+    上一个地址失败或 CONNECT_ATTEMPT_DELAY 秒内未连上时开始尝试下一个，
+    先尝试的地址仍在继续，丢包或不可达的地址不会耗尽整个连接超时。
+    """
+    addresses = _interleave(addresses)
+    pending, errors, index = set(), [], 0
+    sock = None
+    try:
+        while sock is None and (index < len(addresses) or pending):
+            if index < len(addresses):
+                pending.add(asyncio.create_task(_connect_address(*addresses[index])))
+                index += 1
+            done, pending = await asyncio.wait(
+                pending, timeout=CONNECT_ATTEMPT_DELAY if index < len(addresses) else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                elif sock is None:
+                    sock = task.result()
+                else:
+                    task.result().close()
+    finally:
+        for task in pending:
+            task.cancel()
+        # 取消的同时恰好连上的连接一并关闭
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(result, socket.socket):
+                result.close()
+    if sock is None:
+        raise errors[-1] if errors else OSError(f"无法连接到 {addresses}")
+    return sock
+
+async def open_connection(uri: str, open_timeout: float = 5, label: str = ''):
+    """建立 WebSocket 连接，复用 DNS 缓存与 TLS 会话，并记录各阶段耗时
+
+    配置了代理时由 websockets 负责连接代理，只复用 TLS 上下文。
+    """
+    ws_uri = parse_uri(uri)
+    ssl_context = get_ssl_context() if ws_uri.secure else None
+    if get_proxy(ws_uri) is not None:
+        return await websockets.connect(uri, open_timeout=open_timeout, ssl=ssl_context)
+
+    start = time.perf_counter()
+    try:
+        async with asyncio.timeout(open_timeout):
+            addresses, cached = await _resolve(ws_uri.host, ws_uri.port)
+            resolved_at = time.perf_counter()
+            try:
+                sock = await _tcp_connect(addresses)
+            except OSError:
+                if not cached:
+                    raise
+                # 缓存的地址可能已失效，重新解析后再试一次
+                addresses, cached = await _resolve(ws_uri.host, ws_uri.port, fresh=True)
+                resolved_at = time.perf_counter()
+                sock = await _tcp_connect(addresses)
+            connected_at = time.perf_counter()
+            try:
+                websocket = await websockets.connect(uri, sock=sock, ssl=ssl_context, open_timeout=None)
+            except BaseException:
+                sock.close()
+                raise
+    except TimeoutError:
+        raise TimeoutError("timed out during opening handshake") from None
+    upgraded_at = time.perf_counter()
+
+    phases = [
+        f"DNS {(resolved_at - start) * 1000:.1f}ms{'（缓存）' if cached else ''}",
+        f"TCP {(connected_at - resolved_at) * 1000:.1f}ms",
+    ]
+    handshake_done_at = connected_at
+    ssl_object = websocket.transport.get_extra_info('ssl_object')
+    if ssl_object is not None:
+        handshake_done_at = getattr(ssl_object, 'handshake_done_at', None) or connected_at
+        reused = '（会话复用）' if ssl_object.session_reused else ''
+        phases.append(f"TLS {(handshake_done_at - connected_at) * 1000:.1f}ms{reused}")
+        if ssl_object.session is not None:
+            _tls_sessions[ws_uri.host] = ssl_object.session
+    phases.append(f"WS 握手 {(upgraded_at - handshake_done_at) * 1000:.1f}ms")
+    logger.info(f"{label}连接耗时 {(upgraded_at - start) * 1000:.1f}ms：{'，'.join(phases)}")
+    return websocket
\ No newline at end of file
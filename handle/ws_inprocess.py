@@ -0,0 +1,132 @@
+import anyio
+import asyncio
+import logging
+import threading
+from mcp.types import JSONRPCMessage
+from mcp.shared.message import SessionMessage
+from handle.ws_child import McpChild
+from handle.ws_utils import translate_ws_error
+
+logger = logging.getLogger('管道代理')
+
+class InProcessChild(McpChild):
+    """进程内运行的 MCP 服务，与 McpChild 提供相同的收发接口
+
+    FastMCP 服务在独立线程的事件循环中运行，通过 anyio 内存流收发消息，
+    省去子进程、标准输入输出管道拷贝以及 stdout 的二次编码。
+    工具函数多为同步阻塞调用，放在独立线程中可避免阻塞 WebSocket 的心跳与收发。
+    """
+
+    def __init__(self):
+        super().__init__(None)
+        self._loop = None
+        self._server_loop = None
+        self._read_send = None
+        self._outgoing = None
+        self._thread = None
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    async def start(self):
+        """在独立线程中创建并运行 MCP 服务，等待工具注册完成"""
+        self._loop = asyncio.get_running_loop()
+        self._outgoing = asyncio.Queue()
+        ready = self._loop.create_future()
+        self._thread = threading.Thread(
+            target=self._serve, args=(ready,), name='进程内服务', daemon=True
+        )
+        self._thread.start()
+        await ready
+        logger.info("已启动进程内注册服务")
+
+    def _serve(self, ready):
+        """服务线程入口"""
+        try:
+            anyio.run(self._serve_async, ready)
+        except Exception as e:
+            logger.error(f"进程内服务异常退出: {translate_ws_error(e)}")
+            self._notify(self._set_exception, ready, e)
+        finally:
+            # 通知读取方服务已结束
+            self._notify(self._outgoing.put_nowait, None)
+
+    def _notify(self, callback, *args):
+        """在管道所在的事件循环中执行回调（事件循环已关闭时忽略）"""
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass
+
+    @staticmethod
+    def _set_exception(future, error):
+        if not future.done():
+            future.set_exception(error)
+
+    async def _serve_async(self, ready):
+        from handle.version import check_version_in_background
+        from handle.check import check_packages
+        from handle.loader import load_config
+        from services.register import create_server
+        from handle.tool_manifest import update_tool_manifest
+        from handle.tool_reload import watch_tool_groups
+        from handle.log_filter import RequestTypeTranslator
+        # 与 aggregate.py 的启动流程保持一致
+        service_logger = logging.getLogger('管道服务')
+        logging.getLogger('mcp.server.lowlevel.server').addFilter(RequestTypeTranslator())
+        service_logger.info("启动环境检查..")
+        check_packages()
+        service_logger.info("环境检查完成")
+        check_version_in_background()
+        service_logger.info("启动注册服务...")
+        mcp = create_server()
+        await update_tool_manifest(mcp, load_config())
+        service_logger.info("服务注册完成，准备接收请求")
+        read_send, read_recv = anyio.create_memory_object_stream(0)
+        write_send, write_recv = anyio.create_memory_object_stream(0)
+        self._server_loop = asyncio.get_running_loop()
+        self._read_send = read_send
+        self._loop.call_soon_threadsafe(ready.set_result, None)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(self._forward_output, write_recv)
+            tg.start_soon(watch_tool_groups, mcp, write_send)
+            await mcp._mcp_server.run(
+                read_recv,
+                write_send,
+                mcp._mcp_server.create_initialization_options(),
+            )
+            tg.cancel_scope.cancel()
+
+    async def _forward_output(self, write_recv):
+        """将服务输出的消息转交到管道所在的事件循环"""
+        async with write_recv:
+            async for session_message in write_recv:
+                self._loop.call_soon_threadsafe(self._outgoing.put_nowait, session_message.message)
+
+    async def send(self, data: bytes):
+        """向服务投递一条消息，等待服务接收形成背压"""
+        try:
+            message = SessionMessage(JSONRPCMessage.model_validate_json(data))
+        except Exception as e:
+            # 与 stdio 传输一致，解析失败的消息交给服务端处理
+            message = e
+        future = asyncio.run_coroutine_threadsafe(self._read_send.send(message), self._server_loop)
+        await asyncio.wrap_future(future)
+
+    async def readline(self) -> bytes:
+        """读取服务输出的一条消息，服务结束时返回空字节"""
+        message = await self._outgoing.get()
+        if message is None:
+            return b''
+        return message.model_dump_json(by_alias=True, exclude_none=True).encode('utf-8')
+
+    async def stop(self):
+        """关闭服务的输入流，使服务线程自然退出"""
+        if self._server_loop is None or not self.alive:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._read_send.aclose(), self._server_loop)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(future), timeout=5)
+        except Exception as e:
+            logger.error(f"关闭进程内服务时出错: {translate_ws_error(e)}")
\ No newline at end of file
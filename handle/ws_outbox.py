@@ -0,0 +1,112 @@
+import json
+import time
+import itertools
+import collections
+
+def request_fingerprint(json_data: dict) -> int:
+    """请求内容指纹（method + params），用于确认重发的请求与原请求一致
+
+    服务端重连后可能从头分配 id，只有 id 与指纹都相同才视为同一个请求。
+    """
+    params = json.dumps(json_data.get('params'), sort_keys=True, ensure_ascii=False)
+    return hash((json_data.get('method'), params))
+
+class Outbox:
+    """端点的响应发件箱，保存尚未送达服务端的子进程响应，按总大小与存放时间淘汰
+
+    响应在写入出站队列时登记并得到一个编号，编号随响应一起放入出站队列，
+    成功发送到 WebSocket 后按编号移除，只保留未送达的响应。
+    连接在工具执行期间断开时，服务端重连后重发同一请求：
+    响应仍在出站队列中（含发送失败后放回队首的）时由队列在重连后发送，重发的请求记为等待中，
+    之后该响应若被出站队列丢弃，由调用方直接用它应答；
+    已被出站队列丢弃、从未发送的响应直接应答，避免重新执行下载、识别、复制等耗时操作。
+    已送达的响应不再保留，之后相同的请求总是重新执行工具。
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, max_age: float = 300):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # id 的 JSON 文本 -> [请求指纹, 响应文本, 保存时间, 编号, 是否仍在出站队列中, 重发的请求是否在等待]
+        self._entries = collections.OrderedDict()
+        # 编号 -> id 的 JSON 文本；编号不重复使用，出站队列中残留的旧编号不会匹配到新的响应
+        self._tokens = {}
+        self._next_token = itertools.count(1)
+        self._bytes = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(request_id) -> str:
+        # 区分 1 与 "1"
+        return json.dumps(request_id)
+
+    def add(self, request_id, fingerprint: int, data: str):
+        """登记一条写入出站队列的响应，返回随响应放入出站队列的编号；响应超出大小上限时不登记，返回 None"""
+        size = len(data)
+        key = self._key(request_id)
+        self._remove(key)
+        if size > self.max_bytes:
+            return None
+        token = next(self._next_token)
+        self._entries[key] = [fingerprint, data, time.monotonic(), token, True, False]
+        self._tokens[token] = key
+        self._bytes += size
+        self._evict()
+        return token
+
+    def _entry(self, token):
+        key = self._tokens.get(token)
+        return (key, self._entries[key]) if key is not None else (None, None)
+
+    def delivered(self, token):
+        """响应已发送到 WebSocket，不再保留"""
+        key, _ = self._entry(token)
+        if key is not None:
+            self._remove(key)
+
+    def dropped(self, token):
+        """响应未发送就被出站队列丢弃
+
+        重发的请求正在等待该响应时返回响应文本，由调用方直接发送（发送成功后调用 delivered），
+        否则返回 None，之后重发的请求可直接用它应答。
+        """
+        _, entry = self._entry(token)
+        if entry is None:
+            return None
+        waiting, entry[4], entry[5] = entry[5], False, False
+        return entry[1] if waiting else None
+
+    def lookup(self, request_id, fingerprint: int):
+        """查找与重发请求一致的未送达响应
+
+        Returns:
+            (响应文本, 是否仍在出站队列中)，不存在或已过期时返回 None；
+            仍在出站队列中的响应记为有请求等待；不在出站队列中的响应随即移除，由调用方直接发送
+        """
+        self._evict()
+        key = self._key(request_id)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != fingerprint:
+            return None
+        self.hits += 1
+        if entry[4]:
+            entry[5] = True
+        else:
+            self._remove(key)
+        return entry[1], entry[4]
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._tokens.pop(entry[3], None)
+            self._bytes -= len(entry[1])
+
+    def _evict(self):
+        deadline = time.monotonic() - self.max_age
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if self._bytes <= self.max_bytes and entry[2] >= deadline:
+                break
+            self._remove(key)
\ No newline at end of file
@@ -1,13 +1,149 @@
 import sys
 import json
-import asyncio
 import logging
+import itertools
+from handle.ws_queue import QueueRejected
+from handle.ws_outbox import request_fingerprint
 from handle.ws_utils import translate_ws_error
+from handle.tool_manifest import initialize_result
 
 logger = logging.getLogger('管道代理')
 
-async def pipe_websocket_to_process(websocket, process):
-    """从WebSocket读取数据并写入进程stdin"""
+# 最近一次 tools/list 响应的 result（已序列化），子进程通知工具列表变更时失效
+_tools_list_cache = None
+# 启动时加载的工具清单，有效时握手由管道直接应答，不等待子进程完成注册
+_manifest = None
+# 管道代替服务端向子进程发起握手时使用的请求 id，响应不转发给任何端点
+INTERNAL_INITIALIZE_ID = '__proxy_initialize__'
+# 已为当前子进程发送过握手，换用没有重放握手的子进程时清除
+_child_handshake_sent = False
+
+# 入站队列已满时返回给服务端的错误码（JSON-RPC 实现自定义服务端错误区间）
+BUSY_ERROR_CODE = -32000
+
+# 已转发给子进程的请求：代理分配的 id -> (会话, 服务端原始 id, 请求指纹)
+_routes = {}
+_request_ids = itertools.count(1)
+# 所有端点会话，子进程发出的通知广播给每个已连接的会话
+_sessions = []
+
+class EndpointSession:
+    """一个服务端端点的会话状态，跨该端点的重连保持
+
+    所有端点共享同一个子进程：转发请求时把 JSON-RPC id 改写为代理内唯一的 id，
+    子进程的响应按该 id 路由回原端点的出站队列并还原为原始 id。
+    """
+
+    def __init__(self, name: str, outbound, outbox):
+        self.name = name
+        self.outbound = outbound
+        # 尚未送达的子进程响应，服务端重发同一请求时用于应答
+        self.outbox = outbox
+        self.connected = False
+        # 当前连接（断开时为 None），出站队列丢弃了重发请求正在等待的响应时直接发送
+        self.websocket = None
+        # 服务端原始 id -> 代理 id，用于改写取消通知中的 requestId
+        self.requests = {}
+        # 该端点的重连调度器（由 ws_connection 创建）
+        self.scheduler = None
+        _sessions.append(self)
+
+    @property
+    def label(self) -> str:
+        """日志前缀，只有一个端点时为空"""
+        return f"[{self.name}] " if len(_sessions) > 1 else ""
+
+def set_tool_manifest(manifest):
+    """使用工具清单预填握手结果与工具列表缓存"""
+    global _manifest, _tools_list_cache
+    _manifest = manifest
+    if manifest is not None:
+        _tools_list_cache = json.dumps(manifest['tools_list'], ensure_ascii=False)
+
+async def _initialize_child(inbound, params):
+    """握手已由管道应答时，用服务端的握手参数在后台初始化子进程（每个子进程只发送一次）
+
+    握手排在入站队列最前，子进程完成注册后先处理握手，再处理之后的工具调用；
+    换用子进程时由 ws_connection 按记录的参数重放握手。
+    """
+    global _child_handshake_sent
+    if _child_handshake_sent:
+        return
+    initialize = {"jsonrpc": "2.0", "id": INTERNAL_INITIALIZE_ID, "method": "initialize", "params": params}
+    initialized = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+    try:
+        for data in (initialize, initialized):
+            await inbound.put((json.dumps(data, ensure_ascii=False), data))
+    except QueueRejected as e:
+        logger.warning(f"{e}，子进程握手将在下次握手时重试")
+        return
+    _child_handshake_sent = True
+
+def reset_child_handshake():
+    """换用未重放握手的子进程后调用，下次服务端握手时重新初始化子进程"""
+    global _child_handshake_sent
+    _child_handshake_sent = False
+
+def _response(request_id, result_json: str) -> str:
+    """拼接 JSON-RPC 响应，result 部分直接使用已序列化的文本"""
+    return f'{{"jsonrpc":"2.0","id":{json.dumps(request_id)},"result":{result_json}}}'
+
+def _error(request_id, code: int, message: str) -> str:
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message},
+    }, ensure_ascii=False)
+
+def _route_request(session, json_data: dict, fingerprint: int):
+    """为转发给子进程的请求分配代理 id，返回改写后的消息文本与数据"""
+    proxy_id = next(_request_ids)
+    _routes[proxy_id] = (session, json_data['id'], fingerprint)
+    session.requests[json_data['id']] = proxy_id
+    json_data = dict(json_data, id=proxy_id)
+    return json.dumps(json_data, ensure_ascii=False), json_data
+
+def _unroute(proxy_id):
+    """移除请求路由，返回 (会话, 服务端原始 id, 请求指纹)，未知 id 返回 (None, None, None)"""
+    session, original_id, fingerprint = _routes.pop(proxy_id, (None, None, None))
+    # 服务端重连后可能复用同一个 id 发出新请求，只移除指向本请求的映射
+    if session is not None and session.requests.get(original_id) == proxy_id:
+        del session.requests[original_id]
+    return session, original_id, fingerprint
+
+def _restore_id(data: str, proxy_id: int, original_id) -> str:
+    """把子进程响应中的代理 id 还原为服务端原始 id
+
+    FastMCP 输出的 id 紧跟在 jsonrpc 字段之后，直接替换文本即可，
+    避免对 tools/list 等大响应重新序列化；格式不符时回退到完整解析。
+    """
+    marker = f'"id":{proxy_id}'
+    index = data.find(marker, 0, 64)
+    end = index + len(marker)
+    if index != -1 and end < len(data) and data[end] in ',}':
+        return data[:index] + f'"id":{json.dumps(original_id, ensure_ascii=False)}' + data[end:]
+    json_data = json.loads(data)
+    json_data['id'] = original_id
+    return json.dumps(json_data, ensure_ascii=False)
+
+async def _fail_request(proxy_id, code: int, message: str):
+    """为已分配代理 id 的请求向其所属端点返回错误"""
+    session, original_id, _ = _unroute(proxy_id)
+    if session is not None:
+        await _deliver(session, _error(original_id, code, message))
+
+async def pipe_websocket_to_queue(websocket, session, inbound, get_child):
+    """从WebSocket读取数据并写入入站队列
+
+    ping 与 tools/list（有缓存时）由管道直接应答，不经过子进程，
+    子进程重启期间也能立即响应，心跳不会排在慢工具之后。
+    有有效的工具清单时，initialize 也由管道直接应答，子进程在后台完成注册与握手。
+    子进程已完成过握手时，服务端重连后发来的 initialize 直接用缓存结果应答，
+    随后的 notifications/initialized 也不再转发，子进程无需重新初始化。
+    其余消息进入有界队列，由独立任务写入子进程，子进程处理缓慢时不会阻塞
+    WebSocket 的读取；队列满时按配置的策略等待、挤出最早消息或直接拒绝。
+    """
+    replayed = False
     try:
         while True:
             message = await websocket.recv()
@@ -17,23 +153,115 @@ async def pipe_websocket_to_process(websocket, process):
                     message = message.decode('utf-8')
                 except UnicodeDecodeError:
                     message = message.decode('gbk')
-            process.stdin.write(message.encode('utf-8') + b'\n')
-            process.stdin.flush()
+
+            try:
+                json_data = json.loads(message)
+            except json.JSONDecodeError:
+                json_data = None
+            proxy_id = None
+            if isinstance(json_data, dict):
+                method = json_data.get('method')
+                if method == 'ping' and 'id' in json_data:
+                    await websocket.send(_response(json_data['id'], '{}'))
+                    continue
+                if (method == 'tools/list' and _tools_list_cache is not None
+                        and not (json_data.get('params') or {}).get('cursor')):
+                    logger.info("使用缓存的工具列表应答")
+                    await websocket.send(_response(json_data.get('id'), _tools_list_cache))
+                    continue
+                if method == 'initialize' and _manifest is not None:
+                    logger.info("使用工具清单应答握手")
+                    params = json_data.get('params')
+                    await websocket.send(_response(
+                        json_data.get('id'), json.dumps(initialize_result(_manifest, params), ensure_ascii=False)
+                    ))
+                    replayed = True
+                    await _initialize_child(inbound, params)
+                    continue
+                if method == 'initialize':
+                    # 子进程重启期间在此等待新进程就绪
+                    child = await get_child()
+                    if child.initialized:
+                        logger.info("子进程已初始化，使用缓存结果应答握手")
+                        await websocket.send(_response(
+                            json_data.get('id'), json.dumps(child.initialize_result, ensure_ascii=False)
+                        ))
+                        replayed = True
+                        continue
+                if method == 'notifications/initialized' and replayed:
+                    continue
+                if method is not None and 'id' in json_data:
+                    # 连接断开后服务端重发的请求：结果未送达时用原结果应答，仍在执行则等待原请求的结果
+                    fingerprint = request_fingerprint(json_data)
+                    cached = session.outbox.lookup(json_data['id'], fingerprint)
+                    if cached is not None:
+                        data, queued = cached
+                        if queued:
+                            # 之后该响应若被出站队列丢弃，由 _deliver 直接发送
+                            logger.info(f"请求 {method} 的结果仍在出站队列中，等待发送")
+                            continue
+                        logger.info(f"请求 {method} 的结果未送达，使用发件箱中的响应应答")
+                        await websocket.send(data)
+                        continue
+                    in_flight = _routes.get(session.requests.get(json_data['id']))
+                    if in_flight is not None and in_flight[2] == fingerprint:
+                        logger.info(f"请求 {method} 仍在执行，等待原请求的结果")
+                        continue
+                    message, json_data = _route_request(session, json_data, fingerprint)
+                    proxy_id = json_data['id']
+                elif method == 'notifications/cancelled':
+                    # 取消通知引用的是服务端原始 id，改写为代理 id
+                    params = json_data.get('params') or {}
+                    target = session.requests.get(params.get('requestId'))
+                    if target is None:
+                        continue
+                    json_data = dict(json_data, params=dict(params, requestId=target))
+                    message = json.dumps(json_data, ensure_ascii=False)
+
+            try:
+                dropped = await inbound.put((message, json_data))
+            except QueueRejected as e:
+                logger.warning(f"{e}，拒绝服务端消息")
+                if proxy_id is not None:
+                    await _fail_request(proxy_id, BUSY_ERROR_CODE,
+                                        f"注册进程繁忙，请求 {json_data['method']} 未被处理，请稍后重试")
+                continue
+            if dropped is not None:
+                logger.warning(f"{inbound.name}队列已满，丢弃最早的消息")
+                dropped_data = dropped[1]
+                if isinstance(dropped_data, dict) and 'method' in dropped_data and 'id' in dropped_data:
+                    await _fail_request(dropped_data['id'], BUSY_ERROR_CODE,
+                                        f"注册进程繁忙，请求 {dropped_data['method']} 未被处理，请稍后重试")
     except Exception as e:
-        logger.error(f"WebSocket到进程管道错误: {translate_ws_error(e)}")
+        logger.error(f"{session.label}WebSocket到进程管道错误: {translate_ws_error(e)}")
         raise
-    finally:
-        if not process.stdin.closed:
-            process.stdin.close()
 
-async def pipe_process_to_websocket(process, websocket, on_process_end=None):
-    """从进程stdout读取数据并发送到WebSocket"""
-    printed = False
+async def pipe_queue_to_process(inbound, get_child):
+    """从入站队列取出消息写入子进程stdin，子进程切换期间等待新进程就绪"""
+    while True:
+        message, json_data = await inbound.get()
+        child = await get_child()
+        if isinstance(json_data, dict) and 'method' in json_data:
+            if json_data['method'] == 'initialize':
+                child.initialize_params = json_data.get('params')
+            if 'id' in json_data:
+                child.pending[json_data['id']] = json_data['method']
+        try:
+            await child.send(message.encode('utf-8'))
+        except Exception as e:
+            # 子进程恰好退出，未完成的请求由进程切换时统一返回错误
+            logger.warning(f"写入注册进程失败: {translate_ws_error(e)}")
+
+async def pipe_process_to_queue(child, on_process_end=None):
+    """从子进程stdout读取数据，按请求 id 写入对应端点的出站队列
+
+    响应路由回发出请求的端点；通知广播给所有已连接的端点；
+    子进程主动发起的请求交给第一个已连接的端点。
+    """
+    global _tools_list_cache
     try:
         while True:
-            data_bytes = await asyncio.get_event_loop().run_in_executor(
-                None, process.stdout.readline
-            )
+            data_bytes = await child.readline()
             if not data_bytes:
                 logger.info("进程输出已结束")
                 break
@@ -45,30 +273,125 @@ async def pipe_process_to_websocket(process, websocket, on_process_end=None):
 
             try:
                 json_data = json.loads(data.strip())
-                if json_data.get('id') == 1 and not printed:
-                    if 'result' in json_data and 'tools' in json_data['result']:
-                        for tool in json_data['result']['tools']:
-                            name = tool.get('name', '')
-                            description = tool.get('description', '')
-                            first_line = description.split('\n')[0]
-                            logger.debug(f"{name} - {first_line}")
-                        logger.info('已注册工具数量：%d' % len(json_data['result']['tools']))
-                    printed = True
             except json.JSONDecodeError:
-                pass
-            logger.info("发送响应...")
-            await websocket.send(data)
+                json_data = None
+            if not isinstance(json_data, dict):
+                await _broadcast(data)
+                continue
+            if 'method' not in json_data:
+                proxy_id = json_data.get('id')
+                method = child.pending.pop(proxy_id, None)
+                result = json_data.get('result')
+                if method == 'initialize' and isinstance(result, dict):
+                    child.initialize_result = result
+                if proxy_id == INTERNAL_INITIALIZE_ID:
+                    if 'error' in json_data:
+                        logger.error(f"注册进程握手失败: {json_data['error']}")
+                    continue
+                elif method == 'tools/list' and isinstance(result, dict) and 'tools' in result:
+                    for tool in result['tools']:
+                        name = tool.get('name', '')
+                        description = tool.get('description', '')
+                        first_line = description.split('\n')[0]
+                        logger.debug(f"{name} - {first_line}")
+                    logger.info('已注册工具数量：%d' % len(result['tools']))
+                    # 分页结果不缓存，只缓存完整列表
+                    if not result.get('nextCursor'):
+                        _tools_list_cache = json.dumps(result, ensure_ascii=False)
+                session, original_id, fingerprint = _unroute(proxy_id)
+                if session is None:
+                    logger.warning(f"收到未知请求 id 的响应，已丢弃: {proxy_id}")
+                    continue
+                data = _restore_id(data.strip(), proxy_id, original_id)
+                # 只登记成功的结果，失败的请求重发时应重新执行
+                token = None
+                if 'error' not in json_data and not (isinstance(result, dict) and result.get('isError')):
+                    token = session.outbox.add(original_id, fingerprint, data)
+                await _deliver(session, data, token)
+                continue
+            if json_data['method'] == 'notifications/tools/list_changed':
+                logger.info("工具列表已变更，清除缓存")
+                _tools_list_cache = None
+            if 'id' in json_data:
+                session = next((s for s in _sessions if s.connected), None)
+                if session is not None:
+                    await _deliver(session, data)
+                continue
+            await _broadcast(data)
     except Exception as e:
         logger.error(f"进程到WebSocket管道错误: {translate_ws_error(e)}")
         raise
 
+async def _broadcast(data: str):
+    """将子进程的通知发送给所有已连接的端点"""
+    for session in _sessions:
+        if session.connected:
+            await _deliver(session, data)
+
+async def _deliver(session, data: str, token=None):
+    """写入端点的出站队列，队列满时按策略处理（子进程无法感知拒绝，只能记录丢弃）
+
+    出站队列中的消息为 (文本, 发件箱编号)，编号为 None 的消息不在发件箱中。
+    端点断开期间出站队列无人读取，队列已满时直接丢弃，不阻塞其他端点。
+    """
+    outbound = session.outbound
+    if not session.connected and outbound.full:
+        logger.warning(f"{session.name}未连接且{outbound.name}队列已满，丢弃注册进程输出")
+        await _dropped(session, token)
+        return
+    try:
+        dropped = await outbound.put((data, token))
+    except QueueRejected as e:
+        logger.warning(f"{e}，丢弃注册进程输出")
+        await _dropped(session, token)
+        return
+    if dropped is not None:
+        logger.warning(f"{outbound.name}队列已满，丢弃最早的注册进程输出")
+        await _dropped(session, dropped[1])
+
+async def _dropped(session, token):
+    """出站队列丢弃了发件箱中的响应：重发的请求正在等待它时直接发送，否则留给之后重发的请求"""
+    if token is None:
+        return
+    data = session.outbox.dropped(token)
+    websocket = session.websocket
+    if data is None or websocket is None:
+        return
+    try:
+        await websocket.send(data)
+    except Exception as e:
+        logger.warning(f"{session.label}发送重发请求的响应失败，留待下次重发: {translate_ws_error(e)}")
+        return
+    session.outbox.delivered(token)
+
+async def pipe_queue_to_websocket(outbound, websocket, outbox=None):
+    """从出站队列取出消息发送到WebSocket，发送失败的消息放回队首等待重连后发送
+
+    发送成功的响应从端点的发件箱中移除。
+    """
+    while True:
+        item = await outbound.get()
+        data, token = item
+        try:
+            logger.info("发送响应...")
+            await websocket.send(data)
+        except BaseException:
+            outbound.requeue(item)
+            raise
+        if outbox is not None and token is not None:
+            outbox.delivered(token)
+
+async def fail_pending_requests(child):
+    """子进程意外退出时，为尚未响应的请求返回错误，避免服务端一直等待"""
+    for proxy_id, method in list(child.pending.items()):
+        await _fail_request(proxy_id, -32603, f"注册进程已退出，请求 {method} 未完成，请重试")
+    child.pending.clear()
+
 async def pipe_process_stderr_to_terminal(process, on_process_end=None):
     """从进程stderr读取数据并打印到终端"""
     try:
         while True:
-            data_bytes = await asyncio.get_event_loop().run_in_executor(
-                None, process.stderr.readline
-            )
+            data_bytes = await process.stderr.readline()
             if not data_bytes:
                 logger.info("进程标准错误输出已结束")
                 if on_process_end:
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from handle.ws_child import McpChild
+from handle.ws_utils import translate_ws_error
+
+logger = logging.getLogger('管道代理')
+
+class ChildPool:
+    """预启动的备用注册子进程池
+
+    备用进程已完成依赖检查与工具注册，停在等待 initialize 的状态；
+    当前进程退出时立即提升一个备用进程接管，并在后台补齐备用数量。
+    """
+
+    def __init__(self, script: str, size: int = 0):
+        self.script = script
+        self.size = max(0, int(size))
+        # 正在启动或已就绪的备用进程任务
+        self._standby = []
+
+    def fill(self):
+        """在后台补齐备用进程"""
+        while len(self._standby) < self.size:
+            self._standby.append(asyncio.create_task(self._spawn()))
+
+    async def _spawn(self) -> McpChild:
+        """启动子进程并等待其完成注册"""
+        child = McpChild(self.script)
+        try:
+            await child.start()
+            await child.wait_ready()
+        except BaseException:
+            await child.stop()
+            raise
+        logger.info(f"备用注册进程已就绪 (PID {child.process.pid})")
+        return child
+
+    async def acquire(self) -> McpChild:
+        """取出一个可用的子进程，优先使用已就绪的备用进程"""
+        child = None
+        # 先取已就绪的，再等待启动中的
+        ready = [task for task in self._standby if task.done()]
+        booting = [task for task in self._standby if not task.done()]
+        for task in ready + booting:
+            self._standby.remove(task)
+            try:
+                candidate = await task
+            except Exception as e:
+                logger.warning(f"备用注册进程启动失败: {translate_ws_error(e)}")
+                continue
+            if candidate.alive:
+                child = candidate
+                break
+            await candidate.stop()
+
+        if child is None:
+            child = McpChild(self.script)
+            await child.start()
+        else:
+            logger.info(f"已提升备用注册进程 (PID {child.process.pid})")
+        self.fill()
+        return child
+
+    async def stop(self):
+        """终止所有备用进程"""
+        for task in self._standby:
+            task.cancel()
+        for task in self._standby:
+            try:
+                child = await task
+            except BaseException:
+                continue
+            await child.stop()
+        self._standby.clear()
\ No newline at end of file
@@ -0,0 +1,138 @@
+import time
+import asyncio
+import collections
+
+# 队列溢出策略
+POLICY_BLOCK = 'block'              # 写入方等待，直到队列回落到低水位
+POLICY_DROP_OLDEST = 'drop_oldest'  # 丢弃最早的消息，为新消息腾出位置
+POLICY_REJECT = 'reject'            # 拒绝新消息
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_REJECT)
+
+class QueueRejected(Exception):
+    """队列已满且策略为 reject 时抛出"""
+
+class MessageQueue:
+    """带高/低水位与溢出策略的有界消息队列
+
+    达到高水位后按策略处理新消息；block 策略下写入方一直等待到
+    队列回落至低水位，避免在临界点反复唤醒。
+    同时统计队列深度、排队等待时间与丢弃/拒绝次数。
+    """
+
+    def __init__(self, name: str, high_watermark: int = 256, low_watermark: int = None,
+                 policy: str = POLICY_BLOCK):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的队列溢出策略: {policy}，可选值: {', '.join(POLICIES)}")
+        self.name = name
+        self.high_watermark = max(1, int(high_watermark))
+        if low_watermark is None:
+            low_watermark = self.high_watermark // 2
+        self.low_watermark = max(0, min(int(low_watermark), self.high_watermark - 1))
+        self.policy = policy
+        self._items = collections.deque()
+        self._not_empty = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        # 关闭期间（如端点断开、无人读取）队列满时不再等待，block 策略按 reject 处理
+        self.closed = False
+        # 统计
+        self.max_depth = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.blocked = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._dequeued = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def full(self) -> bool:
+        return len(self._items) >= self.high_watermark
+
+    async def put(self, item):
+        """写入消息
+
+        Returns:
+            drop_oldest 策略下被挤出的最早消息，其余情况返回 None
+
+        Raises:
+            QueueRejected: 队列已满且策略为 reject
+        """
+        dropped = None
+        if len(self._items) >= self.high_watermark:
+            if self.policy == POLICY_REJECT or (self.policy == POLICY_BLOCK and self.closed):
+                self.rejected += 1
+                raise QueueRejected(f"{self.name}队列已满（{len(self._items)}）")
+            if self.policy == POLICY_DROP_OLDEST:
+                dropped, _ = self._items.popleft()
+                self.dropped += 1
+            else:
+                self.blocked += 1
+                self._drained.clear()
+        while not self._drained.is_set():
+            await self._drained.wait()
+        if self.closed and self.policy == POLICY_BLOCK and len(self._items) >= self.high_watermark:
+            # 等待期间队列被关闭
+            self.rejected += 1
+            raise QueueRejected(f"{self.name}队列已满且无人读取（{len(self._items)}）")
+        self._items.append((item, time.monotonic()))
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._not_empty.set()
+        return dropped
+
+    async def get(self):
+        """取出最早的消息，队列为空时等待"""
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        item, enqueued_at = self._items.popleft()
+        waited = time.monotonic() - enqueued_at
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._dequeued += 1
+        if not self._drained.is_set() and len(self._items) <= self.low_watermark:
+            self._drained.set()
+        return item
+
+    def close(self):
+        """停止读取（如端点断开）：唤醒等待中的写入方，之后队列满时直接拒绝新消息"""
+        self.closed = True
+        self._drained.set()
+
+    def reopen(self):
+        """恢复读取，队列满时重新按策略处理"""
+        self.closed = False
+
+    def requeue(self, item):
+        """将未能送达的消息放回队首"""
+        self._items.appendleft((item, time.monotonic()))
+        self._not_empty.set()
+
+    def stats(self) -> dict:
+        """当前统计数据，统计等待时间后重置区间内的最大等待"""
+        average = self._wait_total / self._dequeued if self._dequeued else 0.0
+        result = {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "high_watermark": self.high_watermark,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "blocked": self.blocked,
+            "avg_wait_ms": average * 1000,
+            "max_wait_ms": self._wait_max * 1000,
+        }
+        self._wait_max = 0.0
+        return result
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (
+            f"{self.name}队列 深度 {s['depth']}/{s['high_watermark']}（峰值 {s['max_depth']}），"
+            f"平均等待 {s['avg_wait_ms']:.1f}ms，最大等待 {s['max_wait_ms']:.1f}ms，"
+            f"入队 {s['enqueued']}，阻塞 {s['blocked']}，丢弃 {s['dropped']}，拒绝 {s['rejected']}"
+        )
\ No newline at end of file
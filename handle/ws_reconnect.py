@@ -0,0 +1,103 @@
+import time
+import random
+import collections
+import websockets.exceptions
+from handle.ws_utils import is_self_signed_cert_error
+
+# 断开原因分类
+FATAL = 'fatal'            # 重试无法解决（自签名证书链），进入熔断
+TRANSIENT = 'transient'    # 网络抖动、DNS 解析失败、超时、服务端异常断开等，按退避重试
+CLEAN = 'clean'            # 服务端正常关闭连接（如服务端重启），立即快速重连一次
+
+def classify_error(error: Exception) -> str:
+    """判断连接断开的原因类别"""
+    # DNS 解析失败多为断网或网络切换，网络恢复后即可解析，不熔断
+    if is_self_signed_cert_error(error):
+        return FATAL
+    if isinstance(error, websockets.exceptions.ConnectionClosedOK):
+        return CLEAN
+    return TRANSIENT
+
+class ReconnectScheduler:
+    """单个端点的重连调度器
+
+    - 临时错误使用 decorrelated jitter 退避：
+      下次等待 = min(最大等待, random(初始等待, 上次等待 × 3))，
+      既能快速拉开间隔，又能打散多个客户端同时重连的时间点。
+    - 已建立的连接被服务端正常关闭时，第一次重连只等待 fast_retry 秒。
+    - 致命错误打开熔断器，冷却 breaker_cooldown 秒后试探一次；
+      连续 fatal_limit 次熔断仍未恢复则停止重连。
+    - 记录每次从断开到恢复连接的耗时（time-to-recover）。
+    """
+
+    def __init__(self, initial_backoff: float = 1, max_backoff: float = 600,
+                 fast_retry: float = 0.2, breaker_cooldown: float = 300, fatal_limit: int = 3):
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max(max_backoff, initial_backoff)
+        self.fast_retry = fast_retry
+        self.breaker_cooldown = breaker_cooldown
+        self.fatal_limit = fatal_limit
+        # 连续失败次数
+        self.attempt = 0
+        # 连续致命错误（熔断）次数
+        self.fatal_count = 0
+        self._delay = initial_backoff
+        self._established = False
+        self._disconnected_at = None
+        # 最近的恢复耗时（秒）
+        self.recoveries = collections.deque(maxlen=100)
+
+    @property
+    def breaker_open(self) -> bool:
+        return self.fatal_count > 0
+
+    def connected(self):
+        """连接建立成功：重置退避与熔断状态
+
+        Returns:
+            本次从断开到恢复的耗时（秒），首次连接返回 None
+        """
+        recovery = None
+        if self._disconnected_at is not None:
+            recovery = time.monotonic() - self._disconnected_at
+            self.recoveries.append(recovery)
+        self.attempt = 0
+        self.fatal_count = 0
+        self._delay = self.initial_backoff
+        self._established = True
+        self._disconnected_at = None
+        return recovery
+
+    def failed(self, error: Exception):
+        """记录一次连接失败或断开
+
+        Returns:
+            (类别, 下次重连前的等待秒数)；等待秒数为 None 表示应停止重连
+        """
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+        was_established = self._established
+        self._established = False
+        self.attempt += 1
+        kind = classify_error(error)
+        if kind == FATAL:
+            self.fatal_count += 1
+            if self.fatal_count >= self.fatal_limit:
+                return kind, None
+            return kind, self.breaker_cooldown
+        self.fatal_count = 0
+        if kind == CLEAN and was_established:
+            return kind, self.fast_retry
+        self._delay = min(self.max_backoff, random.uniform(self.initial_backoff, self._delay * 3))
+        return kind, self._delay
+
+    def recovery_stats(self) -> dict:
+        """恢复耗时统计（秒）"""
+        if not self.recoveries:
+            return {"count": 0, "last": None, "avg": None, "max": None}
+        return {
+            "count": len(self.recoveries),
+            "last": self.recoveries[-1],
+            "avg": sum(self.recoveries) / len(self.recoveries),
+            "max": max(self.recoveries),
+        }
\ No newline at end of file
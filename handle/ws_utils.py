@@ -101,6 +101,8 @@ def log_ssl_guidance():
 def cleanup_all_processes():
     """清理所有相关进程的全局函数"""
     logger.info("开始全局进程清理...")
+    from handle.ws_child import terminate_all_children
+    terminate_all_children()
     try:
         from utils.music.play import GlobalProcessManager
         process_manager = GlobalProcessManager()
@@ -7,19 +7,29 @@ import signal
 import atexit
 import asyncio
 import logging
+# 启动分析须最先导入，才能记录之后所有模块的导入耗时
+from handle.startup_profile import PROFILE_FLAG, profiler
+# 启动分析参数不传给子进程脚本，由环境变量让子进程一并分析
+args = [arg for arg in sys.argv[1:] if arg != PROFILE_FLAG]
+if len(args) < len(sys.argv) - 1:
+    profiler.enable()
 from handle.loader import load_config
 from handle.logger import setup_logging
 from handle.ws_connection import set_config
 from handle.ws_utils import cleanup_all_processes
 from handle.signal_handler import make_signal_handler
 from handle.app_entry import main as _app_main
+profiler.mark('导入模块')
 
 config = load_config()
+profiler.mark('加载配置')
 logger = setup_logging()
 logger = logging.getLogger('管道代理')
+profiler.mark('日志初始化')
 
 # 从配置初始化连接参数
 set_config(config)
+profiler.mark('连接参数')
 
 signal_handler = make_signal_handler('管道代理')
 
@@ -33,7 +43,7 @@ if __name__ == "__main__":
     atexit.register(cleanup_all_processes)
 
     try:
-        asyncio.run(_app_main(config, logger))
+        asyncio.run(_app_main(config, logger, args))
     except KeyboardInterrupt:
         logger.info("程序被用户中断")
     except Exception as e:
@@ -1,72 +1,160 @@
-import io
-import sys
 import logging
+import functools
+import importlib
 from handle.loader import load_config
+from handle.bundle import bundle_archive
 from mcp.server.fastmcp import FastMCP
-from utils.tools import register_alone
-from utils.file.tools import register_file
-from utils.open.tools import register_open
-from utils.scan.tools import register_scan
-from utils.mouse.tools import register_mouse
-from utils.music.tools import register_music
+from mcp.server.lowlevel import NotificationOptions
+from handle.lazy_import import enable_lazy_imports
+from handle.startup_profile import profiler
+from handle.tool_compact import compact_tools
+
+# 工具模块导入前安装延迟导入钩子，重量级依赖在工具首次调用时才加载
+if load_config().get('startup', {}).get('lazy_import', True):
+    enable_lazy_imports()
+
 from utils.version.tools import register_version
-from utils.speaker.tools import register_speaker
-from utils.browser.tools import register_browser
-from utils.keyboard.tools import register_keyboard
-from utils.clipboard.tools import register_clipboard
-from utils.automation.tools import register_automation
-from utils.screenshot.tools import register_screenshot
-from utils.application.tools import register_application
-from utils.image.tools import register_image
 
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# 工具注册配置列表：(配置路径, 注册函数, 分组名)
+# 注册函数写为 "模块:函数"，分组启用时才导入对应模块；打包时据此只打包启用的分组（须保持为字面量）
+TOOL_REGISTRATIONS = [
+    (['utils', 'application'], 'utils.application.tools:register_application', "程序"),
+    (['utils', 'automation', 'document'], 'utils.automation.tools:register_automation', "自动化"),
+    (['utils', 'file'], 'utils.file.tools:register_file', "文件"),
+    (['utils', 'keyboard'], 'utils.keyboard.tools:register_keyboard', "键盘"),
+    (['utils', 'mouse'], 'utils.mouse.tools:register_mouse', "鼠标"),
+    (['utils', 'open'], 'utils.open.tools:register_open', "打开"),
+    (['utils', 'scan'], 'utils.scan.tools:register_scan', "扫描"),
+    (['utils', 'speaker'], 'utils.speaker.tools:register_speaker', "扬声器"),
+    (['utils', 'browser'], 'utils.browser.tools:register_browser', "浏览器"),
+    (['utils', 'alone'], 'utils.tools:register_alone', "单独"),
+    (['utils', 'image'], 'utils.image.tools:register_image', "图像"),
+    (['utils', 'screenshot'], 'utils.screenshot.tools:register_screenshot', "截图"),
+    (['utils', 'clipboard'], 'utils.clipboard.tools:register_clipboard', "剪贴板"),
+    (['utils', 'music', 'module'], 'utils.music.tools:register_music', "音乐")
+]
 
-def register_tool(mcp: FastMCP, config_path: list, register_func, tool_name: str, logger):
-    """统一工具注册函数"""
-    # 获取配置
-    config = load_config()
+def _tool_names(mcp: FastMCP) -> list:
+    return [tool.name for tool in mcp._tool_manager.list_tools()]
+
+def _group_config(config: dict, config_path: list):
     tool_config = config
     for key in config_path:
         tool_config = tool_config.get(key, {})
+    return tool_config
+
+def _resolve(register_func):
+    """把 "模块:函数" 形式的注册函数导入为函数对象"""
+    if not isinstance(register_func, str):
+        return register_func
+    module_name, func_name = register_func.split(':')
+    return getattr(importlib.import_module(module_name), func_name)
+
+def _missing_from_bundle(register_func, error: ImportError) -> bool:
+    """导入失败是否因为打包文件中没有该分组的模块（打包时该分组未启用）
+
+    只有以打包文件运行、且缺少的正是分组自身的模块（或其所在的包）时才是；
+    依赖未安装或模块内部导入出错时应照常报错。
+    """
+    if bundle_archive() is None or not isinstance(register_func, str):
+        return False
+    if not isinstance(error, ModuleNotFoundError) or not error.name:
+        return False
+    module_name = register_func.split(':')[0]
+    return module_name == error.name or module_name.startswith(error.name + '.')
+
+def register_tool(mcp: FastMCP, config_path: list, register_func, tool_name: str, logger):
+    """统一工具注册函数"""
+    # 获取配置，注册成功后记录该分组的开关（配置变化时据此判断是否需要重新注册）
+    tool_config = _group_config(load_config(), config_path)
     
     # 检查是否有启用的工具
     has_tools = any(tool_config.values()) if isinstance(tool_config, dict) else False
     
     if has_tools:
-        # 注册工具
-        register_func(mcp)
+        # 注册工具，并记录该分组注册了哪些工具（写入工具清单）
+        before = _tool_names(mcp)
+        with profiler.phase(f"注册{tool_name}工具"):
+            try:
+                resolved = _resolve(register_func)
+            except ImportError as e:
+                if not _missing_from_bundle(register_func, e):
+                    raise
+                # 打包版本只包含打包时启用的工具分组；不记录配置，之后同步配置时再次尝试
+                logger.warning(f"打包文件中没有{tool_name}工具（打包时未启用该分组），跳过注册: {e}")
+                return
+            resolved(mcp)
+        mcp._tool_groups[tool_name] = {
+            'config': config_path,
+            'tools': [name for name in _tool_names(mcp) if name not in before],
+        }
     else:
         logger.info(f"所有{tool_name}工具已禁用，跳过注册")
+    mcp._group_configs[tool_name] = tool_config
+
+def unregister_tool(mcp: FastMCP, tool_name: str, logger):
+    """注销一个分组注册的全部工具，已导入的工具模块保留，重新启用时无需再次导入"""
+    group = mcp._tool_groups.pop(tool_name, None)
+    if group is None:
+        return
+    tool_manager = mcp._tool_manager
+    for name in group['tools']:
+        if tool_manager.get_tool(name) is not None:
+            tool_manager.remove_tool(name)
+    logger.info(f"已注销{tool_name}工具（{len(group['tools'])} 个）")
+
+def sync_tool_groups(mcp: FastMCP) -> bool:
+    """按当前配置重新注册开关有变化的工具分组，返回工具列表是否变化"""
+    logger = logging.getLogger('集中注册')
+    config = load_config()
+    before = _tool_names(mcp)
+    for config_path, register_func, tool_name in TOOL_REGISTRATIONS:
+        if _group_config(config, config_path) == mcp._group_configs.get(tool_name):
+            continue
+        logger.info(f"{tool_name}工具配置已变化，重新注册")
+        unregister_tool(mcp, tool_name, logger)
+        register_tool(mcp, config_path, register_func, tool_name, logger)
+    # 重新注册的工具带完整说明，需要重新压缩；压缩配置变化时同样生效
+    described = compact_tools(mcp, config)
+    return _tool_names(mcp) != before or described
 
 def register(mcp: FastMCP):
     """集中注册所有工具"""
     logger = logging.getLogger('集中注册')
     logger.info("进行所有工具注册...")
     
-    # 工具注册配置列表
-    tool_registrations = [
-        (['utils', 'application'], register_application, "程序"),
-        (['utils', 'automation', 'document'], register_automation, "自动化"),
-        (['utils', 'file'], register_file, "文件"),
-        (['utils', 'keyboard'], register_keyboard, "键盘"),
-        (['utils', 'mouse'], register_mouse, "鼠标"),
-        (['utils', 'open'], register_open, "打开"),
-        (['utils', 'scan'], register_scan, "扫描"),
-        (['utils', 'speaker'], register_speaker, "扬声器"),
-        (['utils', 'browser'], register_browser, "浏览器"),
-        (['utils', 'alone'], register_alone, "单独"),
-        (['utils', 'image'], register_image, "图像"),
-        (['utils', 'screenshot'], register_screenshot, "截图"),
-        (['utils', 'clipboard'], register_clipboard, "剪贴板"),
-        (['utils', 'music', 'module'], register_music, "音乐")
-    ]
-    
     # 批量注册所有工具
-    for config_path, register_func, tool_name in tool_registrations:
+    for config_path, register_func, tool_name in TOOL_REGISTRATIONS:
         register_tool(mcp, config_path, register_func, tool_name, logger)
     
     # 注册版本工具（无需配置检查）
-    register_version(mcp)
+    before = _tool_names(mcp)
+    with profiler.phase("注册版本工具"):
+        register_version(mcp)
+    mcp._tool_groups["版本"] = {
+        'config': None,
+        'tools': [name for name in _tool_names(mcp) if name not in before],
+    }
     
-    logger.info("所有工具注册完成")
\ No newline at end of file
+    logger.info("所有工具注册完成")
+
+def create_server() -> FastMCP:
+    """创建 MCP 服务器并注册所有工具"""
+    with profiler.phase("创建 FastMCP"):
+        mcp = FastMCP("管道服务")
+    # 工具分组可按配置热更新，声明支持工具列表变更通知（notifications/tools/list_changed）
+    mcp._mcp_server.create_initialization_options = functools.partial(
+        mcp._mcp_server.create_initialization_options,
+        notification_options=NotificationOptions(tools_changed=True),
+    )
+    # 分组名 -> {配置路径, 工具名列表}
+    mcp._tool_groups = {}
+    # 分组名 -> 注册时该分组的配置
+    mcp._group_configs = {}
+    register(mcp)
+    # 压缩 tools/list 中的工具说明，完整说明通过 get_tool_detail 查看
+    with profiler.phase("压缩工具说明"):
+        compact_tools(mcp, load_config())
+    # 添加初始化完成标志
+    mcp._initialized = True
+    return mcp
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试直接导入项目模块（handle、services、utils 为命名空间包），与运行入口脚本时相同
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
\ No newline at end of file
@@ -0,0 +1,72 @@
+import sys
+import logging
+import pytest
+from handle.color_formatter import ColoredFormatter, FIELD_DATEFMT, FIELD_FORMAT, LEVEL_COLORS
+
+MESSAGES = [
+    "启动完成",
+    "连接关闭(尝试次数: 1): 服务端重启",
+    "最新版本: 0.2.5.6-rc",
+    "返回数据：{'cpu': {'percent': 12.5}}",
+    "：以冒号开头",
+    "以冒号结尾：",
+    "当前窗口顺序：\n记事本\n浏览器: 新标签页",
+    "",
+]
+NAMES = ['管道代理', '日志器', 'mcp.server.lowlevel.server']
+
+@pytest.fixture(autouse=True)
+def chinese_level_names():
+    # 与 setup_logging 相同的中文级别名称，测试后恢复
+    levels = (logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL)
+    original = [logging.getLevelName(level) for level in levels]
+    for level, name in zip(levels, LEVEL_COLORS):
+        logging.addLevelName(level, name)
+    yield
+    for level, name in zip(levels, original):
+        logging.addLevelName(level, name)
+
+def _record(name: str, level: int, message: str, exc_info=None, created: float = None):
+    record = logging.LogRecord(name, level, __file__, 1, message, None, exc_info)
+    if created is not None:
+        record.created = created
+    return record
+
+def _both(record_factory):
+    formatter = ColoredFormatter(FIELD_FORMAT, datefmt=FIELD_DATEFMT)
+    assert formatter._by_fields
+    return formatter.format(record_factory()), formatter._format_by_regex(record_factory())
+
+@pytest.mark.parametrize('message', MESSAGES)
+@pytest.mark.parametrize('level', [logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL])
+@pytest.mark.parametrize('name', NAMES)
+def test_field_path_matches_regex(name, level, message):
+    by_fields, by_regex = _both(lambda: _record(name, level, message, created=1767225600.25))
+    assert by_fields == by_regex
+
+def test_field_path_matches_regex_with_exception():
+    try:
+        raise ValueError("参数错误: x")
+    except ValueError:
+        exc_info = sys.exc_info()
+    by_fields, by_regex = _both(lambda: _record('管道代理', logging.ERROR, "调用失败", exc_info, 1767225600.0))
+    assert by_fields == by_regex
+    assert 'ValueError' in by_fields
+
+def test_cached_time_is_reused_within_a_second():
+    formatter = ColoredFormatter(FIELD_FORMAT, datefmt=FIELD_DATEFMT)
+    first = formatter.format(_record('管道代理', logging.INFO, "a", created=1767225600.1))
+    second = formatter.format(_record('管道代理', logging.INFO, "a", created=1767225600.9))
+    third = formatter.format(_record('管道代理', logging.INFO, "a", created=1767225601.0))
+    assert first == second != third
+
+def test_name_with_fullwidth_colon_uses_regex():
+    formatter = ColoredFormatter(FIELD_FORMAT, datefmt=FIELD_DATEFMT)
+    record = _record('名称：含冒号', logging.INFO, "消息", created=1767225600.0)
+    assert formatter.format(record) == formatter._format_by_regex(_record('名称：含冒号', logging.INFO, "消息",
+                                                                         created=1767225600.0))
+
+def test_custom_format_uses_regex():
+    formatter = ColoredFormatter('%(levelname)s %(message)s')
+    assert not formatter._by_fields
+    assert formatter.format(_record('管道代理', logging.INFO, "消息")) == '信息 消息'
\ No newline at end of file
@@ -0,0 +1,113 @@
+import random
+import pytest
+from handle import log_index
+from handle.log_index import LEVELS, parse_level, parse_time, query
+from handle.log_rotation import compress_segment, segment_path
+
+NAMES = ['管道代理', '管道服务', '音乐播放', '系统信息']
+LEVEL_NAMES = ['信息', '警告', '错误', '严重错误']
+
+def _lines(rng: random.Random, day: str, count: int) -> list:
+    lines = []
+    for i in range(count):
+        seconds = 86399 * i // count
+        moment = f"{day} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        message = f"消息 {rng.randint(0, 9999)}" + ("，重连" if rng.random() < 0.1 else "")
+        lines.append(f"{moment} - {rng.choice(NAMES)}：{rng.choice(LEVEL_NAMES)}，{message}")
+        if rng.random() < 0.02:
+            # 多行的异常信息属于上一行日志
+            lines.append("Traceback (most recent call last):")
+    return lines
+
+def _write(path: str, lines: list):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.writelines(line + '\n' for line in lines)
+
+def _scan(records: list, start, end, loggers, level, contains) -> list:
+    """逐条筛选（多行日志作为一条记录），作为查询的期望结果"""
+    min_level = parse_level(level)
+    result = []
+    for lines in records:
+        first = lines[0]
+        moment, rest = first[:19], first[22:]
+        name, level_name = rest.split('：', 1)[0], rest.split('：', 1)[1].split('，', 1)[0]
+        if (start and moment < start) or (end and moment > end) or (loggers and name not in loggers):
+            continue
+        if min_level and LEVELS[level_name] < min_level:
+            continue
+        for line in lines:
+            if not contains or contains in line:
+                result.append(line)
+    return result
+
+def _records(lines: list) -> list:
+    records = []
+    for line in lines:
+        if line.startswith('Traceback'):
+            records[-1].append(line)
+        else:
+            records.append([line])
+    return records
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    # 小数据块，使查询跨越多个数据块
+    monkeypatch.setattr(log_index, 'BLOCK_SIZE', 2048)
+    return str(tmp_path)
+
+QUERIES = [
+    ('2026-01-02 10:00:00', '2026-01-02 11:00:59', ['音乐播放'], '错误', None),
+    ('2026-01-01 00:00:00', '2026-01-01 23:59:59', ['管道代理', '管道服务'], None, None),
+    (None, None, None, '警告', '重连'),
+    (None, None, None, None, None),
+]
+
+@pytest.mark.parametrize('start, end, loggers, level, contains', QUERIES)
+def test_query_matches_scan(log_dir, start, end, loggers, level, contains):
+    rng = random.Random(0)
+    lines = []
+    for day in ('2026-01-01', '2026-01-02'):
+        day_lines = _lines(rng, day, 2000)
+        _write(segment_path(log_dir, day), day_lines)
+        lines.extend(day_lines)
+    expected = _scan(_records(lines), start, end, loggers, level, contains)
+    stats = {}
+    assert list(query(log_dir, start, end, loggers, level, contains, stats)) == expected
+    if loggers and level:
+        # 只读取可能匹配的数据块
+        assert stats['candidates'] < stats['blocks']
+    # 索引已存在时结果相同
+    assert list(query(log_dir, start, end, loggers, level, contains)) == expected
+
+def test_query_after_segment_grows(log_dir):
+    rng = random.Random(1)
+    path = segment_path(log_dir, '2026-01-01')
+    lines = _lines(rng, '2026-01-01', 500)
+    _write(path, lines[:300])
+    assert list(query(log_dir, level='错误')) == _scan(_records(lines[:300]), None, None, None, '错误', None)
+    _write(path, lines[300:])
+    assert list(query(log_dir, level='错误')) == _scan(_records(lines), None, None, None, '错误', None)
+
+def test_query_compressed_segment(log_dir):
+    pytest.importorskip('zstandard')
+    rng = random.Random(2)
+    path = segment_path(log_dir, '2026-01-01')
+    lines = _lines(rng, '2026-01-01', 3000)
+    _write(path, lines)
+    expected = _scan(_records(lines), None, None, ['系统信息'], '警告', None)
+    assert list(query(log_dir, loggers=['系统信息'], level='警告')) == expected
+    # 压缩前后共用同一个索引
+    assert compress_segment(path, 3)
+    assert list(query(log_dir, loggers=['系统信息'], level='警告')) == expected
+
+def test_parse_time_and_level():
+    assert parse_time('10:00', day='2026-01-02') == '2026-01-02 10:00:00'
+    assert parse_time('10:00', end=True, day='2026-01-02') == '2026-01-02 10:00:59'
+    assert parse_time('2026-01-02', end=True) == '2026-01-02 23:59:59'
+    assert parse_time(None) is None
+    with pytest.raises(ValueError):
+        parse_time('明天')
+    assert parse_level('error') == parse_level('错误') == 40
+    assert parse_level(None) is None
+    with pytest.raises(ValueError):
+        parse_level('verbose')
\ No newline at end of file
@@ -0,0 +1,62 @@
+import os
+import time
+from handle.log_rotation import CLOSE_DELAY, INDEX_SUFFIX, LogArchiver, list_segments, segment_path
+
+DAY = 86400
+
+def _write(path: str, size: int, age: float):
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+def test_list_segments_order(tmp_path):
+    for name in ('2026-01-02.log', '2026-01-01.1.log.zst', '2026-01-01.log.zst', '2026-01-01.log', 'other.txt'):
+        (tmp_path / name).write_bytes(b'')
+    segments = list_segments(str(tmp_path))
+    assert [(s.day, s.index, s.compressed) for s in segments] == [
+        ('2026-01-01', 0, False), ('2026-01-01', 1, True), ('2026-01-02', 0, False),
+    ]
+
+def test_retention_by_days_keeps_other_files(tmp_path):
+    log_dir = str(tmp_path)
+    old = segment_path(log_dir, '2026-01-01')
+    _write(old + '.zst', 100, 10 * DAY)
+    _write(old + INDEX_SUFFIX, 10, 10 * DAY)
+    _write(segment_path(log_dir, '2026-01-09'), 100, 2 * DAY)
+    _write(segment_path(log_dir, '2026-01-10'), 100, 0)
+    # 不属于日志分段的文件不受保留策略影响
+    _write(os.path.join(log_dir, 'startup-aggregate.json'), 100, 10 * DAY)
+    LogArchiver(log_dir, compress=False, max_days=7)._enforce_retention()
+    assert sorted(os.listdir(log_dir)) == ['2026-01-09.log', '2026-01-10.log', 'startup-aggregate.json']
+
+def test_retention_by_total_size(tmp_path):
+    log_dir = str(tmp_path)
+    for i, day in enumerate(('2026-01-01', '2026-01-02', '2026-01-03', '2026-01-04')):
+        _write(segment_path(log_dir, day), 1000, (4 - i) * DAY)
+    LogArchiver(log_dir, compress=False, max_total_bytes=2500)._enforce_retention()
+    assert sorted(os.listdir(log_dir)) == ['2026-01-03.log', '2026-01-04.log']
+
+def test_retention_keeps_active_and_recent_segments(tmp_path):
+    log_dir = str(tmp_path)
+    _write(segment_path(log_dir, '2026-01-01'), 1000, CLOSE_DELAY / 2)
+    _write(segment_path(log_dir, '2026-01-02'), 1000, 30 * DAY)
+    LogArchiver(log_dir, compress=False, max_total_bytes=1, max_days=1)._enforce_retention()
+    # 最新的分段正在写入，最近写入过的分段可能还有其他进程在写
+    assert sorted(os.listdir(log_dir)) == ['2026-01-01.log', '2026-01-02.log']
+
+def test_retention_removes_orphan_index(tmp_path):
+    log_dir = str(tmp_path)
+    _write(segment_path(log_dir, '2026-01-01') + INDEX_SUFFIX, 10, DAY)
+    _write(segment_path(log_dir, '2026-01-02') + INDEX_SUFFIX, 10, DAY)
+    _write(segment_path(log_dir, '2026-01-02'), 100, DAY)
+    _write(segment_path(log_dir, '2026-01-03'), 100, 0)
+    LogArchiver(log_dir, compress=False, max_days=30)._enforce_retention()
+    assert sorted(os.listdir(log_dir)) == ['2026-01-02.log', '2026-01-02.log.idx', '2026-01-03.log']
+
+def test_retention_disabled(tmp_path):
+    log_dir = str(tmp_path)
+    _write(segment_path(log_dir, '2026-01-01'), 100, 100 * DAY)
+    _write(segment_path(log_dir, '2026-01-02'), 100, 0)
+    LogArchiver(log_dir, compress=False)._enforce_retention()
+    assert len(os.listdir(log_dir)) == 2
\ No newline at end of file
@@ -0,0 +1,71 @@
+import random
+import pytest
+from handle.missing_params import _compile_validator
+
+def positional_and_keyword(path: str, mode: str = 'r', *, encoding: str = None, limit: int = 0):
+    """
+    Args:
+        path (str): 文件路径
+        mode (str): 打开方式
+        encoding (str): 编码
+        limit (int): 最多读取多少字节
+    """
+
+def without_defaults(x: int, y: int, z: int = None):
+    """
+    Args:
+        x (int): 横坐标
+        y (int): 纵坐标
+        z (int): 层级
+    """
+
+def keyword_only(*, name: str = None, count: int = None):
+    """
+    Args:
+        name (str): 名称
+        count (int): 数量
+    """
+
+def no_params():
+    """没有参数"""
+
+# (工具函数, 必填参数)；ghost 不在签名中，始终视为缺失
+CASES = [
+    (positional_and_keyword, ('path',)),
+    (positional_and_keyword, ('path', 'encoding')),
+    (positional_and_keyword, ('mode', 'limit', 'ghost')),
+    (without_defaults, ('x', 'y')),
+    (without_defaults, ('z',)),
+    (keyword_only, ('name', 'count')),
+    (keyword_only, ('ghost',)),
+    (no_params, ()),
+    (no_params, ('ghost',)),
+]
+VALUES = [None, '', '  ', 'value', 0, 1, [], ['item'], ()]
+# 签名之外的关键字参数
+EXTRA_NAMES = ('ghost', 'unknown')
+
+def _random_call(rng: random.Random, func):
+    names = list(func.__code__.co_varnames[:func.__code__.co_argcount + func.__code__.co_kwonlyargcount])
+    args = tuple(rng.choice(VALUES) for _ in range(rng.randint(0, func.__code__.co_argcount + 1)))
+    candidates = names + list(EXTRA_NAMES)
+    kwargs = {name: rng.choice(VALUES) for name in rng.sample(candidates, rng.randint(0, len(candidates)))}
+    return args, kwargs
+
+@pytest.mark.parametrize('func, required', CASES, ids=lambda case: getattr(case, '__name__', str(case)))
+def test_compiled_validator_matches_signature_bind(func, required):
+    """预先计算的校验与 Signature.bind 版本对相同的随机参数返回相同的结果"""
+    validate = _compile_validator(func, required)
+    validate_bind = _compile_validator(func, required, use_bind=True)
+    assert validate is not validate_bind
+    rng = random.Random(f'{func.__name__}{required}')
+    for _ in range(2000):
+        args, kwargs = _random_call(rng, func)
+        assert validate(args, kwargs) == validate_bind(args, kwargs), (args, kwargs)
+
+def test_variadic_signature_uses_signature_bind():
+    def variadic(*items, flag: bool = None):
+        """可变参数"""
+    validate = _compile_validator(variadic, ('flag',))
+    assert validate((), {'flag': True}) is None
+    assert validate((1, 2), {})['missing_params'][0]['name'] == 'flag'
\ No newline at end of file
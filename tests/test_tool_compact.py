@@ -0,0 +1,57 @@
+from handle.tool_compact import DETAIL_TOOL, compact_description, find_boilerplate
+
+DOC = """打开指定的应用程序。
+    必须先确认应用已安装。
+    Args:
+        name (str): 应用名称，必须
+        wait (bool): 是否等待启动完成
+    Returns:
+        dict: 包含操作结果的字典，格式为:
+            {
+                "success": bool
+            }
+    注意事项：
+        不要同时打开多个应用。
+    """
+
+def test_compact_description_drops_returns_and_arg_types():
+    compact = compact_description(DOC)
+    assert 'Returns' not in compact and '"success"' not in compact
+    assert 'name: 应用名称，必须' in compact
+    assert '(str)' not in compact
+    # 缩进减半
+    assert '\n  name:' in compact
+    assert compact.splitlines()[0] == '打开指定的应用程序。'
+    assert '不要同时打开多个应用。' in compact
+
+def test_compact_description_removes_boilerplate():
+    compact = compact_description(DOC, {'必须先确认应用已安装。'})
+    assert '必须先确认应用已安装。' not in compact
+    assert '打开指定的应用程序。' in compact
+
+def test_compact_description_budget_keeps_intro_and_args():
+    compact = compact_description(DOC, max_bytes=140)
+    assert '打开指定的应用程序。' in compact and 'name:' in compact
+    assert '不要同时打开多个应用。' not in compact
+    assert f'省略了注意事项，完整说明请调用 {DETAIL_TOOL} 查看' in compact
+
+def test_compact_description_truncates_single_section():
+    compact = compact_description('说明' * 200, max_bytes=30)
+    body = compact.split('\n')[0]
+    assert body.endswith('…') and len(body[:-1].encode('utf-8')) <= 30
+
+def test_compact_description_empty():
+    assert compact_description('') == ''
+    assert compact_description(None) is None
+
+def test_find_boilerplate():
+    texts = [
+        f"工具{i}。\n必须先确认应用已安装。\nArgs:\n    path (str): 文件路径，必须\nReturns:\n    dict: 包含操作结果的字典"
+        for i in range(3)
+    ]
+    texts.append("其他工具。\nArgs:\n    path (str): 文件路径，必须")
+    assert find_boilerplate(texts, 3) == ['必须先确认应用已安装。']
+    # Args 段与 Returns 段中的重复行不视为样板
+    assert find_boilerplate(texts, 2) == ['必须先确认应用已安装。']
+    assert find_boilerplate(texts, 4) == []
+    assert find_boilerplate(texts, 0) == []
\ No newline at end of file
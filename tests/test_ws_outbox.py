@@ -0,0 +1,68 @@
+from handle import ws_outbox
+from handle.ws_outbox import Outbox, request_fingerprint
+
+def _fingerprint(**params):
+    return request_fingerprint({'method': 'tools/call', 'params': params})
+
+def test_fingerprint_ignores_key_order():
+    assert _fingerprint(a=1, b=2) == request_fingerprint({'method': 'tools/call', 'params': {'b': 2, 'a': 1}})
+    assert _fingerprint(a=1) != _fingerprint(a=2)
+
+def test_delivered_response_is_not_kept():
+    outbox = Outbox()
+    token = outbox.add(1, _fingerprint(a=1), 'r1')
+    assert outbox.lookup(1, _fingerprint(a=1)) == ('r1', True)
+    outbox.delivered(token)
+    assert len(outbox) == 0
+    assert outbox.lookup(1, _fingerprint(a=1)) is None
+
+def test_dropped_response_answers_resent_request():
+    outbox = Outbox()
+    token = outbox.add(1, _fingerprint(a=1), 'r1')
+    # 没有重发的请求在等待
+    assert outbox.dropped(token) is None
+    assert outbox.lookup(1, _fingerprint(a=1)) == ('r1', False)
+    # 不在出站队列中的响应应答后移除
+    assert len(outbox) == 0
+
+def test_dropped_response_is_returned_to_waiting_request():
+    outbox = Outbox()
+    token = outbox.add(1, _fingerprint(a=1), 'r1')
+    assert outbox.lookup(1, _fingerprint(a=1)) == ('r1', True)
+    assert outbox.dropped(token) == 'r1'
+    outbox.delivered(token)
+    assert len(outbox) == 0
+
+def test_id_and_fingerprint_must_match():
+    outbox = Outbox()
+    outbox.add(1, _fingerprint(a=1), 'r1')
+    assert outbox.lookup(1, _fingerprint(a=2)) is None
+    # 区分 1 与 "1"
+    assert outbox.lookup('1', _fingerprint(a=1)) is None
+    assert outbox.hits == 0
+
+def test_stale_token_does_not_match_new_response():
+    outbox = Outbox()
+    old = outbox.add(1, _fingerprint(a=1), 'r1')
+    new = outbox.add(1, _fingerprint(a=1), 'r2')
+    assert old != new
+    outbox.delivered(old)
+    assert outbox.dropped(old) is None
+    assert outbox.lookup(1, _fingerprint(a=1)) == ('r2', True)
+
+def test_evicts_by_size():
+    outbox = Outbox(max_bytes=10)
+    assert outbox.add(1, 0, 'x' * 11) is None
+    outbox.add(1, 0, 'x' * 6)
+    outbox.add(2, 0, 'y' * 6)
+    assert outbox.lookup(1, 0) is None
+    assert outbox.lookup(2, 0) == ('y' * 6, True)
+
+def test_evicts_by_age(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ws_outbox.time, 'monotonic', lambda: now[0])
+    outbox = Outbox(max_age=300)
+    outbox.add(1, 0, 'r1')
+    now[0] += 301
+    assert outbox.lookup(1, 0) is None
+    assert len(outbox) == 0
\ No newline at end of file
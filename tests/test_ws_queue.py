@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from handle.ws_queue import MessageQueue, QueueRejected, POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_REJECT
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        MessageQueue('测试', policy='unknown')
+
+def test_watermarks_are_clamped():
+    queue = MessageQueue('测试', high_watermark=0, low_watermark=5)
+    assert (queue.high_watermark, queue.low_watermark) == (1, 0)
+    assert MessageQueue('测试', high_watermark=10).low_watermark == 5
+
+def test_reject_policy():
+    async def main():
+        queue = MessageQueue('测试', high_watermark=2, policy=POLICY_REJECT)
+        await queue.put(1)
+        await queue.put(2)
+        with pytest.raises(QueueRejected):
+            await queue.put(3)
+        assert queue.rejected == 1 and len(queue) == 2
+        assert [await queue.get(), await queue.get()] == [1, 2]
+    run(main())
+
+def test_drop_oldest_policy():
+    async def main():
+        queue = MessageQueue('测试', high_watermark=2, policy=POLICY_DROP_OLDEST)
+        assert await queue.put(1) is None
+        await queue.put(2)
+        assert await queue.put(3) == 1
+        assert queue.dropped == 1
+        assert [await queue.get(), await queue.get()] == [2, 3]
+    run(main())
+
+def test_block_policy_waits_for_low_watermark():
+    async def main():
+        queue = MessageQueue('测试', high_watermark=4, low_watermark=1, policy=POLICY_BLOCK)
+        for i in range(4):
+            await queue.put(i)
+        writer = asyncio.create_task(queue.put(4))
+        await asyncio.sleep(0)
+        assert not writer.done() and queue.blocked == 1
+        # 回落到低水位之前写入方一直等待
+        await queue.get()
+        await queue.get()
+        await asyncio.sleep(0)
+        assert not writer.done()
+        await queue.get()
+        await writer
+        assert [await queue.get(), await queue.get()] == [3, 4]
+    run(main())
+
+def test_close_wakes_blocked_writer():
+    async def main():
+        queue = MessageQueue('测试', high_watermark=1, policy=POLICY_BLOCK)
+        await queue.put(1)
+        writer = asyncio.create_task(queue.put(2))
+        await asyncio.sleep(0)
+        queue.close()
+        with pytest.raises(QueueRejected):
+            await writer
+        # 关闭期间队列满时直接拒绝，重新打开后恢复等待
+        with pytest.raises(QueueRejected):
+            await queue.put(3)
+        queue.reopen()
+        writer = asyncio.create_task(queue.put(4))
+        await asyncio.sleep(0)
+        assert not writer.done()
+        assert await queue.get() == 1
+        await writer
+        assert await queue.get() == 4
+        assert queue.rejected == 2
+    run(main())
+
+def test_requeue_puts_item_first():
+    async def main():
+        queue = MessageQueue('测试')
+        await queue.put('b')
+        queue.requeue('a')
+        assert [await queue.get(), await queue.get()] == ['a', 'b']
+    run(main())
+
+def test_stats():
+    async def main():
+        queue = MessageQueue('测试', high_watermark=3)
+        for i in range(3):
+            await queue.put(i)
+        await queue.get()
+        stats = queue.stats()
+        assert stats['depth'] == 2 and stats['max_depth'] == 3 and stats['enqueued'] == 3
+        assert '测试队列 深度 2/3' in queue.format_stats()
+    run(main())
\ No newline at end of file
@@ -0,0 +1,71 @@
+import ssl
+import socket
+import pytest
+
+websockets = pytest.importorskip('websockets')
+
+from handle import ws_reconnect
+from handle.ws_reconnect import ReconnectScheduler, classify_error, CLEAN, FATAL, TRANSIENT
+
+def _closed_ok():
+    return websockets.exceptions.ConnectionClosedOK(None, None)
+
+def _self_signed():
+    return ssl.SSLCertVerificationError(1, '[SSL: CERTIFICATE_VERIFY_FAILED] self-signed certificate in certificate chain')
+
+def test_classify_error():
+    assert classify_error(_closed_ok()) == CLEAN
+    assert classify_error(_self_signed()) == FATAL
+    # DNS 解析失败多为网络暂时不可用，按退避重试
+    assert classify_error(socket.gaierror(11001, 'getaddrinfo failed')) == TRANSIENT
+    assert classify_error(ConnectionResetError()) == TRANSIENT
+    assert classify_error(TimeoutError()) == TRANSIENT
+
+def test_transient_backoff_is_bounded(monkeypatch):
+    monkeypatch.setattr(ws_reconnect.random, 'uniform', lambda low, high: high)
+    scheduler = ReconnectScheduler(initial_backoff=1, max_backoff=20)
+    delays = [scheduler.failed(TimeoutError())[1] for _ in range(5)]
+    assert delays == [3, 9, 20, 20, 20]
+    assert scheduler.attempt == 5
+
+def test_backoff_range():
+    scheduler = ReconnectScheduler(initial_backoff=1, max_backoff=600)
+    last = 1
+    for _ in range(50):
+        kind, delay = scheduler.failed(TimeoutError())
+        assert kind == TRANSIENT and 1 <= delay <= min(600, last * 3)
+        last = delay
+
+def test_clean_close_retries_fast_once():
+    scheduler = ReconnectScheduler(initial_backoff=1, fast_retry=0.2)
+    assert scheduler.connected() is None
+    assert scheduler.failed(_closed_ok()) == (CLEAN, 0.2)
+    # 还没有重新连上时不再快速重连
+    kind, delay = scheduler.failed(_closed_ok())
+    assert kind == CLEAN and delay >= 1
+
+def test_breaker_opens_and_gives_up():
+    scheduler = ReconnectScheduler(breaker_cooldown=300, fatal_limit=3)
+    assert scheduler.failed(_self_signed()) == (FATAL, 300)
+    assert scheduler.breaker_open
+    assert scheduler.failed(_self_signed()) == (FATAL, 300)
+    assert scheduler.failed(_self_signed()) == (FATAL, None)
+
+def test_breaker_resets_after_transient_error_or_connect():
+    scheduler = ReconnectScheduler(fatal_limit=2)
+    scheduler.failed(_self_signed())
+    scheduler.failed(TimeoutError())
+    assert not scheduler.breaker_open
+    assert scheduler.failed(_self_signed())[1] is not None
+    scheduler.connected()
+    assert not scheduler.breaker_open and scheduler.attempt == 0
+
+def test_recovery_stats():
+    scheduler = ReconnectScheduler()
+    assert scheduler.recovery_stats()['count'] == 0
+    scheduler.connected()
+    scheduler.failed(TimeoutError())
+    recovery = scheduler.connected()
+    assert recovery is not None and recovery >= 0
+    stats = scheduler.recovery_stats()
+    assert stats['count'] == 1 and stats['last'] == stats['max'] == recovery
\ No newline at end of file
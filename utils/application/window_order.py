@@ -2,6 +2,7 @@ import logging
 import win32gui
 import win32con
 from typing import List, Tuple, Optional
+from handle.payload_log import log_payload
 
 logger = logging.getLogger('窗口Z序')
 
@@ -75,14 +76,15 @@ def get_z_order_top_to_bottom() -> List[Tuple[int, str, Tuple[int, int, int, int
         f"{_C.GRN}|  {_C.GRN}句柄{_C.RST}  "
         f"{_C.GRN}|  {_C.GRN}位置{_C.RST}"
     )
-    items = [
+    # 窗口列表在需要输出时才生成，过长时按载荷日志策略截断
+    items = lambda: "\n".join([sep, col_header] + [
         f"{_C.YLW}{i:>2}.{_C.RST} "
         f"{_C.BWHT}{title}{_C.RST}  "
         f"{_C.GRN}|{_C.RST}  {_C.GRN}{hwnd}{_C.RST}  "
         f"{_C.GRN}|{_C.RST}  {_C.BLU}{rect}{_C.RST}"
         for i, (hwnd, title, rect) in enumerate(z_order, 1)
-    ]
-    logger.info("\n".join([header, sep, col_header] + items))
+    ])
+    log_payload(logger, header + "\n", items)
 
     return z_order
 
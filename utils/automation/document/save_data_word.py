@@ -1,6 +1,6 @@
 import os
 import logging
-from docx import Document
+import docx
 from mcp.server.fastmcp import FastMCP
 from handle.missing_params import ask_on_missing
 
@@ -25,7 +25,7 @@ def save_data_to_word(mcp: FastMCP):
             if not os.path.exists(save_dir):
                 os.makedirs(save_dir)
             # 创建 Word 文档对象
-            doc = Document()
+            doc = docx.Document()
             doc.add_paragraph(content)
             # 若文件名没有 .docx 后缀，则自动添加
             if not file_name.lower().endswith('.docx'):
@@ -1,5 +1,5 @@
 import logging
-from wxauto import WeChat
+import wxauto
 from mcp.server.fastmcp import FastMCP
 from utils.is_process_running import is_process_running
 
@@ -26,7 +26,7 @@ def get_current_wechat_chat_window_message(mcp: FastMCP):
             logger.error(msg)
             return msg
         # 初始化微信实例
-        wx = WeChat()
+        wx = wxauto.WeChat()
         # 获取当前聊天窗口的所有消息
         msgs = wx.GetAllMessage()
         # 加载当前窗口更多聊天记录
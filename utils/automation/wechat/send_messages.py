@@ -1,6 +1,6 @@
 import os
 import logging
-from wxauto import WeChat
+import wxauto
 from mcp.server.fastmcp import FastMCP
 from utils.is_process_running import is_process_running
 
@@ -43,7 +43,7 @@ def send_wechat_messages_or_files(mcp: FastMCP):
             logger.error(msg)
             return msg
         # 初始化微信实例
-        wx = WeChat()
+        wx = wxauto.WeChat()
         msg = ''
         for item in data:
             content = item.get('content', '')
@@ -4,6 +4,7 @@ import sqlite3
 import logging
 from pathlib import Path
 from mcp.server.fastmcp import FastMCP
+from handle.payload_log import log_payload
 from utils.browser.edge import get_edge_bookmarks
 from utils.browser.chrome import get_chrome_bookmarks
 from utils.browser.firefox import get_firefox_bookmarks
@@ -55,7 +56,7 @@ def get_browser_bookmarks(mcp: FastMCP):
                     except:
                         bookmarks = get_edge_bookmarks()
             logger.info(f"成功获取{browser_type or ' 默认 '}浏览器书签")
-            logger.info(f"书签内容：{bookmarks}")
+            log_payload(logger, "书签内容：", bookmarks)
             return {
                 "success": True,
                 "browser_type": browser_type or 'auto',
@@ -1,15 +1,15 @@
 import os
 import io
 import logging
-from PIL import Image
-from PIL import ImageGrab
+import PIL.Image
+import PIL.ImageGrab
 
 logger = logging.getLogger('剪切板图片')
 
 def get_image() -> dict:
     try:
         logger.info("开始获取剪切板图片...")
-        img = ImageGrab.grabclipboard()
+        img = PIL.ImageGrab.grabclipboard()
         if img is None:
             msg = "错误：剪贴板中没有图片内容" 
             logger.error(msg)
@@ -22,13 +22,13 @@ def get_image() -> dict:
                 # 如果是文件路径列表，直接返回第一个文件路径
                 logger.info(f"获取到剪切板图片路径: {img[0]}")
                 return {"success": True, "result": img[0]}
-            elif img and isinstance(img[0], Image.Image):
+            elif img and isinstance(img[0], PIL.Image.Image):
                 img = img[0]
             else:
                 msg = "错误：剪贴板中的内容不是有效的图片列表或文件路径列表" 
                 logger.error(msg)
                 return {"success": False, "result": msg}
-        elif isinstance(img, Image.Image):
+        elif isinstance(img, PIL.Image.Image):
             img_byte_arr = io.BytesIO()
             img.save(img_byte_arr, format='PNG')
             logger.info("获取到剪切板图片字节流")
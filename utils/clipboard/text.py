@@ -1,6 +1,7 @@
 import logging
 import pyperclip
 from mcp.server.fastmcp import FastMCP
+from handle.payload_log import log_payload
 
 logger = logging.getLogger('剪切板文字')
 
@@ -18,7 +19,7 @@ def get_clipboard_text(mcp: FastMCP):
                 msg = "剪切板没有有效文字"
                 logger.info(msg)
                 return msg
-            logger.info(f"获取到剪切板文字: {content}")
+            log_payload(logger, "获取到剪切板文字: ", content)
             return content
         except Exception as e:
             msg = f"获取剪切板内容时出错: {e}"
@@ -4,6 +4,7 @@ import platform
 import subprocess
 from mcp.server.fastmcp import FastMCP
 from handle.missing_params import ask_on_missing
+from handle.payload_log import log_payload
 from utils.application.check_activity import get_window_active
 
 logger = logging.getLogger('临时写入')
@@ -32,7 +33,7 @@ def temporary_write_to_notepad(mcp: FastMCP):
                         # 仅在成功打开时返回
                 }
         """
-        logger.info(f"收到请求，准备写入内容到记事本：{content}")
+        log_payload(logger, "收到请求，准备写入内容到记事本：", content)
         import uuid
         temp_dir = os.path.join(os.getcwd(), "tmp")
         os.makedirs(temp_dir, exist_ok=True)
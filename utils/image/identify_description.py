@@ -2,9 +2,9 @@ import os
 import os.path
 import logging
 import requests
-from PIL import Image
+import PIL.Image
 from io import BytesIO
-from getmac import get_mac_address
+import getmac
 from handle.loader import load_config
 
 logger = logging.getLogger('图像描述')
@@ -35,7 +35,7 @@ def identify_description(question: str, img_data) -> dict:
             temp_file_path = os.path.join(tmp_dir, f"clipboard_{timestamp}.png")
             # 使用PIL处理字节流并保存为JPG格式
             try:
-                pil_image = Image.open(BytesIO(img_data))
+                pil_image = PIL.Image.open(BytesIO(img_data))
                 # 如果图片有透明通道，转换为RGB模式以支持JPG格式
                 if pil_image.mode in ('RGBA', 'LA', 'P'):
                     pil_image = pil_image.convert('RGB')
@@ -53,7 +53,7 @@ def identify_description(question: str, img_data) -> dict:
         # 直接读取本地图片文件
         with open(img_path, 'rb') as f:
             img = f.read()
-        mac_address = get_mac_address()
+        mac_address = getmac.get_mac_address()
         files = {
             'file': (img_name, img, 'image/jpeg')
         }
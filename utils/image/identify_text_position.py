@@ -2,7 +2,7 @@ import os
 import logging
 import requests
 from handle.loader import load_config
-from requests.exceptions import ConnectionError
+from handle.payload_log import log_payload
 
 logger = logging.getLogger('图像文字识别')
 
@@ -77,9 +77,9 @@ def identify_image_text_coordinates(image: str) -> dict:
             logger.error(msg)
             return {"success": False, "result": msg}
         logger.info(f"成功识别图像 {image} 的文字")
-        logger.info(f"识别结果: {ocr_out}")
+        log_payload(logger, "识别结果: ", ocr_out)
         return {"success": True, "result": ocr_out}
-    except ConnectionError as e:
+    except requests.exceptions.ConnectionError as e:
         msg = f"错误：无法连接到OCR服务：{str(e)}"
         logger.error(msg)
         return {"success": False, "result": msg}
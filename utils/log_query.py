@@ -0,0 +1,53 @@
+import re
+import logging
+from collections import deque
+from mcp.server.fastmcp import FastMCP
+from handle.path import get_log_dir
+from handle.payload_log import truncate_text
+from handle.log_index import parse_level, parse_time, query
+
+logger = logging.getLogger('日志查询')
+
+# 每行日志返回的最大字节数（UTF-8），超出时保留开头与结尾
+LINE_MAX_BYTES = 500
+_ANSI = re.compile(r'\x1b\[[0-9;]*m')
+
+def query_logs(mcp: FastMCP):
+    @mcp.tool()
+    def query_logs(logger_name: str = None, level: str = None, start: str = None, end: str = None,
+                   contains: str = None, limit: int = 50) -> str:
+        """查询本程序的运行日志，用于排查工具调用失败、运行缓慢等问题。
+        按时间范围、日志器名称与最低级别筛选，返回最新的若干行。
+        例如查询 10:00 到 11:00 音乐播放的错误：logger_name='音乐播放'，level='错误'，start='10:00'，end='11:00'。
+        Args:
+            logger_name (str): 日志器名称，多个用逗号分隔，例如 '音乐播放,管道代理'（可选，默认全部）
+            level (str): 最低级别：信息、警告、错误、严重错误（可选，默认全部）
+            start (str): 开始时间，格式为 'HH:MM'（当天）、'YYYY-MM-DD' 或 'YYYY-MM-DD HH:MM'（可选）
+            end (str): 结束时间（包含），格式同开始时间（可选）
+            contains (str): 日志中包含的文字（可选）
+            limit (int): 最多返回多少行（最新的），默认50
+        Returns:
+            str: 符合条件的日志，每行一条
+        """
+        logger.info(f"查询日志：日志器 {logger_name}，级别 {level}，时间 {start} ~ {end}，关键字 {contains}")
+        try:
+            start_time = parse_time(start)
+            # 只给出开始日期时查询到当天结束
+            end_time = parse_time(end or (start if start and ':' not in start else None), end=True)
+            parse_level(level)
+        except ValueError as e:
+            logger.error(str(e))
+            return str(e)
+        loggers = [name.strip() for name in logger_name.split(',') if name.strip()] if logger_name else None
+        try:
+            lines = deque(query(get_log_dir(), start_time, end_time, loggers, level, contains), maxlen=max(1, int(limit or 50)))
+        except Exception as e:
+            msg = f"查询日志失败：{e}"
+            logger.error(msg)
+            return msg
+        if not lines:
+            msg = "没有符合条件的日志"
+            logger.info(msg)
+            return msg
+        logger.info(f"查询到 {len(lines)} 行日志")
+        return '\n'.join(truncate_text(_ANSI.sub('', line), LINE_MAX_BYTES, LINE_MAX_BYTES // 4) for line in lines)
\ No newline at end of file
@@ -2,6 +2,7 @@ import os
 import logging
 from mcp.server.fastmcp import FastMCP
 from handle.missing_params import ask_on_missing
+from handle.payload_log import log_payload
 
 logger = logging.getLogger('扫描文件夹')
 
@@ -51,7 +52,7 @@ def scan_folder_or_file(mcp: FastMCP):
                 else:
                     result_str = "没有找到子文件夹"
             msg = f"扫描完成: {result_str}"
-            logger.info(msg)
+            log_payload(logger, "扫描完成: ", result_str)
             return {"success": True,"result": msg}
             logger.info(f"扫描完成: {result_str}")
         except Exception as e:
@@ -1,6 +1,6 @@
 import logging
 from mcp.server.fastmcp import FastMCP
-from pycaw.pycaw import AudioUtilities
+import pycaw.pycaw
 from handle.missing_params import ask_on_missing
 
 logger = logging.getLogger('设置应用音量')
@@ -21,7 +21,7 @@ def set_app_volume(mcp: FastMCP):
         logger.info(f"尝试将 {app_name} 的音量设置为 {level * 100:.0f}%")
         level = max(0.0, min(1.0, level))
         try:
-            sessions = AudioUtilities.GetAllSessions()
+            sessions = pycaw.pycaw.AudioUtilities.GetAllSessions()
             for session in sessions:
                 if session.Process and session.Process.name().lower() == app_name.lower():
                     volume = session.SimpleAudioVolume
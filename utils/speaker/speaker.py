@@ -1,10 +1,10 @@
-from comtypes import CLSCTX_ALL
+import comtypes
+import pycaw.pycaw
 from ctypes import cast, POINTER
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
 
 def get_speaker():
     """获取默认扬声器设备"""
-    devices = AudioUtilities.GetSpeakers()
+    devices = pycaw.pycaw.AudioUtilities.GetSpeakers()
     interface = devices.Activate(
-        IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-    return cast(interface, POINTER(IAudioEndpointVolume))
\ No newline at end of file
+        pycaw.pycaw.IAudioEndpointVolume._iid_, comtypes.CLSCTX_ALL, None)
+    return cast(interface, POINTER(pycaw.pycaw.IAudioEndpointVolume))
\ No newline at end of file
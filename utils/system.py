@@ -4,6 +4,7 @@ import logging
 import platform
 from datetime import datetime
 from mcp.server.fastmcp import FastMCP
+from handle.payload_log import log_payload
 
 logger = logging.getLogger('系统信息')
 
@@ -76,5 +77,5 @@ def get_system_status(mcp: FastMCP):
             'network': network_info
         }
         logger.info("成功获取系统状态信息")
-        logger.info(f"返回数据：{system_status}")
+        log_payload(logger, "返回数据：", system_status)
         return system_status
\ No newline at end of file
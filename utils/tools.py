@@ -4,6 +4,7 @@ from mcp.server.fastmcp import FastMCP
 from utils.system import get_system_status
 from utils.download import download_url_file
 from utils.command import run_computer_command
+from utils.log_query import query_logs
 
 def register_alone(mcp: FastMCP):
     """注册单独工具"""
@@ -32,4 +33,7 @@ def register_alone(mcp: FastMCP):
     if alone_config.get('run_command', False):
         run_computer_command(mcp)
     
+    if alone_config.get('query_logs', False):
+        query_logs(mcp)
+    
     logger.info("注册完成")
\ No newline at end of file
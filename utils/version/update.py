@@ -1,7 +1,7 @@
 import shutil
 import logging
 import threading
-from ruamel.yaml import YAML
+import ruamel.yaml
 from handle.version import get_version
 from mcp.server.fastmcp import FastMCP
 from handle.path import get_config_path
@@ -40,7 +40,7 @@ def update_client(mcp: FastMCP):
                                 src_config = get_config_path()
                                 dst_config = f"{download_dir}/config.yaml"
                                 shutil.copy2(src_config, dst_config)
-                                yaml = YAML()
+                                yaml = ruamel.yaml.YAML()
                                 yaml.preserve_quotes = True
                                 with open(dst_config, 'r', encoding='utf-8') as f:
                                     config = yaml.load(f)